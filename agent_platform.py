@@ -22,12 +22,25 @@ Usage:
     # Run the event loop once
     orchestrator.run_once()
 
+Tasks are kept in a priority queue (higher ``priority`` first, then
+first-in first-out) and routed through a table built from each agent's
+``task_types``, so draining the queue is linear in the number of tasks.
+``Orchestrator.run(workers=N)`` drains it with several worker threads.
+
 """
 
-import random
-import string
+import heapq
+import itertools
+import threading
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from incluu_agents import datagen
+from incluu_agents.kpis import KpiEngine
+from incluu_agents.leads import LeadIndex
+from incluu_agents.records import RecordStore
 
 
 def stub_authenticate(token: Optional[str]) -> bool:
@@ -52,6 +65,7 @@ class Task:
     """Represents a unit of work for an agent to perform."""
     type: str
     payload: Dict[str, Any] = field(default_factory=dict)
+    priority: int = 0
 
 
 @dataclass
@@ -62,9 +76,15 @@ class Result:
 
 
 class Agent:
-    """Base class for all agents.  Subclasses must implement execute()."""
+    """Base class for all agents.  Subclasses must implement execute().
+
+    Agents should list the task types they handle in ``task_types`` so the
+    orchestrator can route to them directly.  Agents that leave it empty
+    are offered every unrouted task, as before.
+    """
 
     name: str = "base"
+    task_types: Tuple[str, ...] = ()
 
     def execute(self, task: Task) -> Optional[Result]:
         raise NotImplementedError
@@ -77,38 +97,42 @@ class SalesAgent(Agent):
     """A simple agent that generates and prioritises synthetic leads."""
 
     name = "SalesAgent"
+    task_types = ("sales_outreach",)
 
-    def __init__(self):
-        # Prepopulate with some synthetic leads
+    def __init__(self, kpis: Optional[KpiEngine] = None):
+        # Prepopulate with some synthetic leads, stored column-wise.  The
+        # index holds live views of the rows and keeps uncontacted leads
+        # ordered by score.
+        self.kpis = kpis or KpiEngine()
         self.leads = self._generate_leads(10)
-
-    def _generate_leads(self, n: int) -> List[Dict[str, Any]]:
-        industries = ["SaaS", "Retail", "Healthcare", "Finance"]
-        return [
-            {
-                "id": i,
-                "name": self._random_name(),
-                "industry": random.choice(industries),
-                "email": f"lead{i}@example.com",
-                "score": random.randint(1, 100),
-            }
-            for i in range(n)
-        ]
-
-    def _random_name(self) -> str:
-        first = ''.join(random.choices(string.ascii_uppercase, k=5))
-        last = ''.join(random.choices(string.ascii_uppercase, k=7))
-        return f"{first} {last}"
+        self.index = LeadIndex(self.leads.views())
+        for score in self.leads.column("score"):
+            self.kpis.publish("lead_added", score)
+
+    def _generate_leads(self, n: int, seed: Optional[int] = None) -> RecordStore:
+        rng = datagen.make_rng(seed)
+        ids = np.arange(n)
+        return RecordStore.from_table(datagen.ColumnTable({
+            "id": ids,
+            "name": datagen.random_words(rng, n, 5, 7),
+            "industry": datagen.choice(rng, ["SaaS", "Retail", "Healthcare", "Finance"], n),
+            "email": datagen.Formatted("lead{}@example.com", ids),
+            "score": rng.integers(1, 101, n, dtype=np.int8),
+            "status": datagen.Categorical(np.zeros(n, dtype=np.int8), ["new"]),
+        }))
 
     def execute(self, task: Task) -> Optional[Result]:
         if task.type == "sales_outreach":
-            count = task.payload.get("count", 1)
-            # Sort leads by descending score and pick top N
-            leads_sorted = sorted(self.leads, key=lambda x: x["score"], reverse=True)
-            selected = leads_sorted[:count]
-            # Simulate sending outreach emails
-            for lead in selected:
-                lead["status"] = "contacted"
+            # Take the top N matching leads and simulate sending outreach emails
+            status = task.payload.get("status", "new")
+            selected = self.index.contact_top(
+                task.payload.get("count", 1),
+                status=status,
+                industry=task.payload.get("industry"),
+            )
+            if status != "contacted":
+                for lead in selected:
+                    self.kpis.publish("lead_contacted", lead["score"])
             return Result(task_type=task.type, data={"contacted_leads": selected})
         return None
 
@@ -117,11 +141,15 @@ class SupportAgent(Agent):
     """An agent that summarises support tickets and suggests responses."""
 
     name = "SupportAgent"
+    task_types = ("support_summary",)
 
-    def __init__(self):
+    def __init__(self, kpis: Optional[KpiEngine] = None):
+        self.kpis = kpis or KpiEngine()
         self.tickets = self._generate_tickets(5)
+        for _ in range(len(self.tickets)):
+            self.kpis.publish("ticket_opened")
 
-    def _generate_tickets(self, n: int) -> List[Dict[str, Any]]:
+    def _generate_tickets(self, n: int, seed: Optional[int] = None) -> RecordStore:
         categories = ["billing", "technical", "product", "other"]
         descriptions = [
             "Cannot login to account",
@@ -129,39 +157,41 @@ class SupportAgent(Agent):
             "Bug in latest update",
             "Feature request"
         ]
-        return [
-            {
-                "id": i,
-                "category": random.choice(categories),
-                "description": random.choice(descriptions),
-                "customer": f"customer{i}@example.com",
-                "status": "open",
-            }
-            for i in range(n)
-        ]
+        rng = datagen.make_rng(seed)
+        ids = np.arange(n)
+        return RecordStore.from_table(datagen.ColumnTable({
+            "id": ids,
+            "category": datagen.choice(rng, categories, n),
+            "description": datagen.choice(rng, descriptions, n),
+            "customer": datagen.Formatted("customer{}@example.com", ids),
+            "status": datagen.Categorical(np.zeros(n, dtype=np.int8), ["open"]),
+        }))
 
     def execute(self, task: Task) -> Optional[Result]:
         if task.type == "support_summary":
             # Count tickets by category
-            summary: Dict[str, int] = {}
-            for ticket in self.tickets:
-                summary[ticket["category"]] = summary.get(ticket["category"], 0) + 1
+            summary = self.tickets.count_by("category")
             # Suggest responses for open tickets
             suggestions = [
                 {
                     "id": ticket["id"],
                     "response": f"Hello, regarding your issue '{ticket['description']}', our team is investigating."
                 }
-                for ticket in self.tickets if ticket["status"] == "open"
+                for ticket in self.tickets.select(status="open")
             ]
             return Result(task_type=task.type, data={"summary": summary, "suggestions": suggestions})
         return None
 
 
 class AnalyticsAgent(Agent):
-    """Aggregates metrics from other agents and produces simple reports."""
+    """Aggregates metrics from other agents and produces simple reports.
+
+    Figures come from the running KPI aggregates the sales and support
+    agents publish to, so reports do not rescan leads or tickets.
+    """
 
     name = "AnalyticsAgent"
+    task_types = ("analytics_report",)
 
     def __init__(self, sales_agent: SalesAgent, support_agent: SupportAgent):
         self.sales_agent = sales_agent
@@ -169,60 +199,141 @@ class AnalyticsAgent(Agent):
 
     def execute(self, task: Task) -> Optional[Result]:
         if task.type == "analytics_report":
-            # Count contacted leads
-            contacted = [lead for lead in self.sales_agent.leads if lead.get("status") == "contacted"]
-            ticket_count = len(self.support_agent.tickets)
+            sales = self.sales_agent.kpis
+            support = self.support_agent.kpis
             return Result(
                 task_type=task.type,
                 data={
-                    "contacted_leads": len(contacted),
-                    "total_leads": len(self.sales_agent.leads),
-                    "open_tickets": ticket_count,
+                    "contacted_leads": sales.count("lead_contacted"),
+                    "total_leads": sales.count("lead_added"),
+                    "open_tickets": support.count("ticket_opened") - support.count("ticket_closed"),
+                    "contacted_last_hour": sales.window("lead_contacted", "1h")["count"],
                 },
             )
         return None
 
 
-class Orchestrator:
-    """Coordinates tasks between agents using a simple event queue."""
+class TaskQueue:
+    """Thread-safe priority queue of tasks.
+
+    Tasks with a higher ``priority`` are popped first; tasks of equal
+    priority come out in the order they were pushed.
+    """
 
     def __init__(self):
+        self._heap: List[Tuple[int, int, Task]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, task: Task) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, (-task.priority, next(self._counter), task))
+
+    def pop(self) -> Optional[Task]:
+        """Remove and return the next task, or None if the queue is empty."""
+        with self._lock:
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)[2]
+
+
+class Orchestrator:
+    """Coordinates tasks between agents using a priority task queue.
+
+    Set ``verbose=False`` to silence the per-task progress output when
+    draining large queues.
+    """
+
+    def __init__(self, verbose: bool = True):
         self.agents: List[Agent] = []
-        self.task_queue: List[Task] = []
+        self.routes: Dict[str, Agent] = {}
+        self.task_queue = TaskQueue()
+        self.verbose = verbose
+        self._unrouted: List[Agent] = []
+        self._agent_locks: Dict[int, threading.Lock] = {}
 
     def register_agent(self, agent: Agent) -> None:
-        print(f"Registering {agent.describe()}")
+        if self.verbose:
+            print(f"Registering {agent.describe()}")
         self.agents.append(agent)
-
-    def post_task(self, task_payload: Dict[str, Any]) -> None:
+        self._agent_locks[id(agent)] = threading.Lock()
+        if not agent.task_types:
+            self._unrouted.append(agent)
+        for task_type in agent.task_types:
+            # The first agent registered for a type keeps it, matching the
+            # original first-match scan.
+            self.routes.setdefault(task_type, agent)
+
+    def post_task(self, task_payload: Dict[str, Any], priority: int = 0) -> None:
         """Add a task to the queue.  task_payload must include 'type'."""
         task_type = task_payload.get("type")
         if not task_type:
             raise ValueError("Task payload must include a 'type'")
-        task = Task(type=task_type, payload={k: v for k, v in task_payload.items() if k != "type"})
-        print(f"Posting task: {task.type} with payload {task.payload}")
-        self.task_queue.append(task)
-
-    def run_once(self) -> None:
-        """Process all tasks currently in the queue once."""
-        while self.task_queue:
-            task = self.task_queue.pop(0)
-            handled = False
-            for agent in self.agents:
+        task = Task(
+            type=task_type,
+            payload={k: v for k, v in task_payload.items() if k != "type"},
+            priority=priority,
+        )
+        if self.verbose:
+            print(f"Posting task: {task.type} with payload {task.payload}")
+        self.task_queue.push(task)
+
+    def run_once(self) -> int:
+        """Process all tasks currently in the queue once.
+
+        Returns the number of tasks taken off the queue.
+        """
+        processed = 0
+        while True:
+            task = self.task_queue.pop()
+            if task is None:
+                return processed
+            self._dispatch(task)
+            processed += 1
+
+    def run(self, workers: int = 4) -> int:
+        """Drain the queue with ``workers`` threads.
+
+        Each agent still runs one task at a time, so agents do not need
+        to be thread-safe; tasks for different agents run in parallel.
+        Returns the number of tasks processed.
+        """
+        counts = [0] * workers
+
+        def work(slot: int) -> None:
+            counts[slot] = self.run_once()
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(counts)
+
+    def _dispatch(self, task: Task) -> Optional[Result]:
+        routed = self.routes.get(task.type)
+        candidates = self._unrouted if routed is None else [routed, *self._unrouted]
+        for agent in candidates:
+            with self._agent_locks[id(agent)]:
                 result = agent.execute(task)
-                if result is not None:
-                    handled = True
+            if result is not None:
+                if self.verbose:
                     print(f"Task '{task.type}' handled by {agent.name}: {result.data}")
-                    break
-            if not handled:
-                print(f"No agent could handle task '{task.type}'")
+                return result
+        if self.verbose:
+            print(f"No agent could handle task '{task.type}'")
+        return None
 
 
 def demo():
     """Run a simple demonstration of the orchestrator with synthetic data."""
     # Instantiate agents
-    sales_agent = SalesAgent()
-    support_agent = SupportAgent()
+    kpis = KpiEngine()
+    sales_agent = SalesAgent(kpis)
+    support_agent = SupportAgent(kpis)
     analytics_agent = AnalyticsAgent(sales_agent, support_agent)
 
     orchestrator = Orchestrator()
@@ -2,23 +2,38 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Dict, Any, List, Optional
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
-from incluu_agents import (
-    Orchestrator,
-    SalesAgent,
-    SupportAgent,
-    AnalyticsAgent,
-    JobsAgent,
-    HealthAgent,
-    LegalAgent,
-)
+from incluu_agents import Orchestrator, registry, serialization
+from incluu_agents.admission import AdmissionController, Rejected
+from incluu_agents.airtable import AirtableError, AirtableMirror
+from incluu_agents.jobqueue import JobManager, QueueFull
+from incluu_agents.metrics import render_prometheus
+from incluu_agents.profiling import hooks_from_env
+from incluu_agents.state import StateStore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    orch.warm_up(name.strip() for name in AGENT_WARMUP.split(",") if name.strip())
+    jobs.start()
+    crm.start()
+    yield
+    await crm.stop()
+    await jobs.stop()
+    orch.shutdown(wait=False)
 
-app = FastAPI(title="Incluu Agent Service", version="0.2.0")
+
+app = FastAPI(title="Incluu Agent Service", version="0.2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,60 +42,417 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Instantiate orchestrator and register all agents
-orch = Orchestrator()
-for agent_cls in [SalesAgent, SupportAgent, AnalyticsAgent, JobsAgent, HealthAgent, LegalAgent]:
-    orch.register_agent(agent_cls())
+# Instantiate orchestrator and register all agents. Agents are imported
+# on first use, except those listed in AGENT_WARMUP (agent or task names,
+# comma separated, or "*"), which are loaded at startup. Agent data is
+# shared between worker processes when AGENT_STATE_DB names a SQLite file.
+orch = Orchestrator(store=StateStore.from_env())
+orch.register_specs(registry.discover())
+jobs = JobManager.from_env(orch)
+# Local copy of the Airtable contacts table, synced every
+# AIRTABLE_SYNC_INTERVAL seconds when AIRTABLE_API_KEY/AIRTABLE_BASE_ID are set.
+crm = AirtableMirror.from_env(orch.store)
+# Per-key rate limits and a global concurrency limit for the task
+# endpoints (AGENT_RATE_LIMIT, AGENT_MAX_CONCURRENCY, AGENT_TASK_LIMITS...).
+admission = AdmissionController.from_env()
+# Sampling profilers around agent dispatch, on when AGENT_PROFILE_DIR is set.
+for hook in hooks_from_env():
+    orch.add_hook(hook)
 
 API_KEY = os.environ.get("API_KEY", "")  # optional API key
+AGENT_WARMUP = os.environ.get("AGENT_WARMUP", "")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "100"))
+MAX_BATCH_CONCURRENCY = int(os.environ.get("MAX_BATCH_CONCURRENCY", "8"))
+MAX_JOB_WAIT = float(os.environ.get("MAX_JOB_WAIT", "30"))
 
 def verify_api_key(x_api_key: Optional[str] = Header(None)) -> None:
     if API_KEY and x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
 
+def caller(request: Request, x_api_key: Optional[str] = Header(None)) -> str:
+    """Who rate limits apply to: the API key, else the client address."""
+    if x_api_key:
+        return f"key:{x_api_key}"
+    return f"ip:{request.client.host if request.client else ''}"
+
+
+@app.exception_handler(Rejected)
+async def rejected(request: Request, exc: Rejected) -> JSONResponse:
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None
+    return JSONResponse(status_code=exc.status, content={"detail": str(exc), "reason": exc.reason}, headers=headers)
+
+
+@asynccontextmanager
+async def admitted(name: str) -> AsyncIterator[None]:
+    """Hold a concurrency slot for ``name`` while the block runs."""
+    await admission.acquire(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        admission.release(name, time.perf_counter() - started)
+
+
 @app.get("/health")
 async def health() -> Dict[str, str]:
     """Health check endpoint."""
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics(format: str = "prometheus") -> Any:
+    """Dispatch metrics for every agent and task.
+
+    Served in the Prometheus text format by default; ``?format=json``
+    returns the same figures as JSON for the dashboard.
+    """
+    snapshot = orch.metrics_snapshot()
+    snapshot["admission"] = admission.stats()
+    if format == "json":
+        return snapshot
+    if format != "prometheus":
+        raise HTTPException(status_code=400, detail="Query parameter 'format' must be 'prometheus' or 'json'")
+    return PlainTextResponse(render_prometheus(snapshot), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/agents")
 async def get_agents() -> List[Dict[str, Any]]:
     """Return a list of all registered agents and their tasks."""
-    agents = []
-    for agent in orch.registered_agents():
-        agents.append({"name": agent.name, "tasks": list(agent.tasks)})
-    return agents
+    return [{"name": entry["name"], "tasks": entry["tasks"]} for entry in orch.catalog()]
 
 
 @app.get("/marketplace")
 async def marketplace() -> List[Dict[str, Any]]:
     """Return marketplace entries for each agent with placeholder pricing."""
     entries = []
-    for agent in orch.registered_agents():
+    for entry in orch.catalog():
         entries.append({
-            "name": agent.name,
-            "description": f"Agent capable of {', '.join(agent.tasks)}",
+            "name": entry["name"],
+            "description": f"Agent capable of {', '.join(entry['tasks'])}",
             "pricing": {"tier": "free", "rate": 0.0},
         })
     return entries
 
 
+def parse_task(body: Any, prefix: str = "") -> Tuple[str, Dict[str, Any]]:
+    """Validate a ``{name, payload}`` object and return its parts."""
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail=f"{prefix}Task must be an object")
+    if not isinstance(body.get("name"), str):
+        raise HTTPException(status_code=400, detail=f"{prefix}Field 'name' must be a string")
+    payload = body.get("payload", {})
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail=f"{prefix}Field 'payload' must be an object")
+    return body["name"], payload
+
+
 @app.post("/tasks")
 async def post_task(
     body: Dict[str, Any],
     api_key: None = Depends(verify_api_key),
-) -> Dict[str, Any]:
+    client: str = Depends(caller),
+    x_debug_profile: Optional[str] = Header(None),
+) -> Response:
     """Submit a task to the orchestrator.
 
     The request body should contain:
     * ``name``: The task name.
     * ``payload``: A dictionary of task parameters.
+
+    Agents run off the event loop, so a slow task does not hold up
+    other requests. The result is encoded straight to JSON (see
+    :mod:`incluu_agents.serialization`). Requests over the rate or
+    concurrency limits are rejected with 429 or 503 and ``Retry-After``.
+    When profiling is on, ``X-Debug-Profile: 1`` profiles this call (see
+    :mod:`incluu_agents.profiling`); otherwise the header is ignored.
     """
-    if not isinstance(body.get("name"), str):
-        raise HTTPException(status_code=400, detail="Field 'name' must be a string")
-    payload = body.get("payload", {})
-    if not isinstance(payload, dict):
-        raise HTTPException(status_code=400, detail="Field 'payload' must be an object")
-    return orch.post_task(name=body["name"], payload=payload)
\ No newline at end of file
+    name, payload = parse_task(body)
+    debug = bool(orch.hooks) and x_debug_profile not in (None, "", "0")
+    admission.check_rate(client, name)
+    async with admitted(name):
+        result = await orch.post_task_async(name=name, payload=payload, debug=debug)
+    return Response(serialization.dumps(result), media_type="application/json")
+
+
+STREAM_FORMATS = ("ndjson", "sse")
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """A streaming response that runs ``on_close`` however it ends.
+
+    The body generator's own ``finally`` is not enough: if the client
+    disconnects before the first chunk is requested, Starlette cancels
+    the response without ever starting the generator.
+    """
+
+    def __init__(self, content: Any, on_close: Callable[[], Awaitable[None]], **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
+
+@app.post("/tasks/stream")
+async def post_task_stream(
+    body: Dict[str, Any],
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    api_key: None = Depends(verify_api_key),
+    client: str = Depends(caller),
+) -> StreamingResponse:
+    """Submit a task and stream its records as they are produced.
+
+    The response is a sequence of events: ``meta`` (the result without
+    its streamed list), one ``record`` per item, then ``end`` with the
+    record count, or ``error`` if the agent fails part way. They are
+    written as NDJSON lines (``{"event": ..., ...}``) or, with
+    ``?format=sse`` or ``Accept: text/event-stream``, as server-sent
+    events. Records are only produced as fast as the client reads them.
+    """
+    if format is None:
+        format = "sse" if accept and "text/event-stream" in accept else "ndjson"
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(STREAM_FORMATS)}")
+    name, payload = parse_task(body)
+    admission.check_rate(client, name)
+    # The slot is held until the last record has been sent.
+    await admission.acquire(name)
+    started = time.perf_counter()
+    try:
+        stream = await orch.post_task_stream(name=name, payload=payload)
+    except BaseException:
+        admission.release(name)
+        raise
+
+    if format == "sse":
+        def encode(event: str, data: Any) -> bytes:
+            return b"event: " + event.encode() + b"\ndata: " + serialization.dumps(data) + b"\n\n"
+    else:
+        def encode(event: str, data: Any) -> bytes:
+            return serialization.dumps({"event": event, **data}) + b"\n"
+
+    async def events() -> AsyncIterator[bytes]:
+        yield encode("meta", stream.response)
+        count = 0
+        try:
+            async for chunk in stream.chunks:
+                # One write per chunk rather than per record.
+                yield b"".join(encode("record", {"data": record}) for record in chunk)
+                count += len(chunk)
+        except Exception as exc:
+            yield encode("error", {"error": str(exc)})
+            return
+        yield encode("end", {"count": count})
+
+    body = events()
+
+    async def finish() -> None:
+        try:
+            await body.aclose()
+            await stream.aclose()
+        finally:
+            admission.release(name, time.perf_counter() - started)
+
+    if format == "sse":
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return AdmittedStreamingResponse(body, finish, media_type="text/event-stream", headers=headers)
+    return AdmittedStreamingResponse(body, finish, media_type="application/x-ndjson")
+
+
+@app.post("/tasks/batch")
+async def post_task_batch(
+    body: Dict[str, Any],
+    stream: bool = False,
+    api_key: None = Depends(verify_api_key),
+    client: str = Depends(caller),
+) -> Any:
+    """Submit several tasks in one request.
+
+    The request body should contain:
+    * ``tasks``: A list of ``{name, payload}`` objects.
+    * ``max_concurrency``: Optional cap on tasks running at once.
+
+    Results are returned as ``{"results": [...]}`` in request order.
+    With ``?stream=true`` the response is NDJSON instead: one line per
+    task, written as soon as it finishes and tagged with its ``index``.
+    Each task counts against the caller's rate limit for its name, and
+    the batch is rejected unless all of them fit. Each task also takes a
+    concurrency slot while it runs; a task that cannot get one fails
+    with the rejection as its error.
+    """
+    tasks = body.get("tasks")
+    if not isinstance(tasks, list):
+        raise HTTPException(status_code=400, detail="Field 'tasks' must be a list")
+    if len(tasks) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_SIZE} tasks are allowed per batch"
+        )
+    items = []
+    for i, task in enumerate(tasks):
+        name, payload = parse_task(task, prefix=f"tasks[{i}]: ")
+        items.append({"name": name, "payload": payload})
+    max_concurrency = body.get("max_concurrency", MAX_BATCH_CONCURRENCY)
+    if not isinstance(max_concurrency, int) or isinstance(max_concurrency, bool) or max_concurrency < 1:
+        raise HTTPException(status_code=400, detail="Field 'max_concurrency' must be a positive integer")
+    max_concurrency = min(max_concurrency, MAX_BATCH_CONCURRENCY)
+    admission.check_rates(client, Counter(item["name"] for item in items))
+
+    if not stream:
+        results = await orch.post_tasks_async(items, max_concurrency=max_concurrency, admit=admitted)
+        return {"results": results}
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for index, result in orch.stream_tasks(items, max_concurrency=max_concurrency, admit=admitted):
+            yield serialization.dumps({"index": index, **result}) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", status_code=202)
+async def post_job(
+    body: Dict[str, Any],
+    api_key: None = Depends(verify_api_key),
+) -> Any:
+    """Queue a task to run in the background and return its job id.
+
+    The body is a task (``name``, ``payload``) with an optional integer
+    ``priority``; higher priorities run first. When the queue is full
+    the response is ``429`` with a ``Retry-After`` header.
+    """
+    name, payload = parse_task(body)
+    priority = body.get("priority", 0)
+    if not isinstance(priority, int):
+        raise HTTPException(status_code=400, detail="Field 'priority' must be an integer")
+    try:
+        job = jobs.submit(name, payload, priority=priority)
+    except QueueFull as exc:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    return JSONResponse(
+        status_code=202, content=job.to_dict(), headers={"Location": f"/jobs/{job.id}"}
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = 0.0,
+    api_key: None = Depends(verify_api_key),
+) -> Dict[str, Any]:
+    """Return a job's status and, once it is ``done``, its result.
+
+    With ``?wait=<seconds>`` the request long-polls: it returns as soon
+    as the job finishes, or after ``wait`` seconds (at most
+    ``MAX_JOB_WAIT``) with the job still pending.
+    """
+    job = await jobs.wait(job_id, min(max(wait, 0.0), MAX_JOB_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+@app.post("/analytics/summary")
+async def analytics_summary(
+    request: Request,
+    dtype: str = "float64",
+    bins: Optional[int] = None,
+    api_key: None = Depends(verify_api_key),
+    client: str = Depends(caller),
+) -> Dict[str, Any]:
+    """Summarise a raw binary array of numbers.
+
+    The request body is the array itself: little-endian values of
+    ``dtype`` sent as ``application/octet-stream``. This avoids encoding
+    millions of numbers as a JSON list. Bodies of up to
+    ``stats.CHUNK_SIZE`` values are summarised exactly by the
+    ``generate_report`` task; larger ones are folded into a
+    :class:`~incluu_agents.stats.StreamingSummary` as they arrive, so
+    memory use does not grow with the upload. The request is admitted
+    like a ``generate_report`` task on ``/tasks``.
+    """
+    # Imported here so NumPy is only loaded once this route is used.
+    import numpy as np
+
+    from incluu_agents import stats
+
+    if dtype not in stats.DTYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported dtype '{dtype}'")
+    bins = stats.DEFAULT_BINS if bins is None else bins
+    try:
+        stats.check_bins(bins)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    admission.check_rate(client, "generate_report")
+    # The slot covers reading the body too, as that is where large
+    # uploads are folded into the summary.
+    async with admitted("generate_report"):
+        return await _summarize_upload(request, np.dtype(dtype).newbyteorder("<"), bins)
+
+
+async def _summarize_upload(request: Request, item: Any, bins: int) -> Dict[str, Any]:
+    import numpy as np
+
+    from incluu_agents import stats
+
+    chunk_bytes = stats.CHUNK_SIZE * item.itemsize
+    pending = bytearray()
+    summary: Optional[stats.StreamingSummary] = None
+    async for part in request.stream():
+        pending += part
+        if len(pending) >= chunk_bytes:
+            # Fold whole values only; a split value waits for the next part.
+            usable = len(pending) - len(pending) % item.itemsize
+            values = np.frombuffer(bytes(pending[:usable]), dtype=item)
+            del pending[:usable]
+            summary = summary or stats.StreamingSummary()
+            await asyncio.to_thread(summary.update, values)
+    if len(pending) % item.itemsize:
+        raise HTTPException(status_code=400, detail=f"Body length is not a multiple of the {item.name} item size")
+    values = np.frombuffer(bytes(pending), dtype=item)
+    if summary is not None:
+        await asyncio.to_thread(summary.update, values)
+    return await orch.post_task_async(name="generate_report", payload={
+        "data": values if summary is None else summary,
+        "bins": bins,
+    })
+
+
+@app.get("/crm/contacts")
+def get_contacts(
+    stage: Optional[str] = None,
+    persona: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    api_key: None = Depends(verify_api_key),
+) -> Dict[str, Any]:
+    """Query the local copy of the Airtable contacts table.
+
+    ``stage`` and ``persona`` filter on exact (case-insensitive) values.
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page.
+    A plain ``def`` so the store reads run in the threadpool.
+    """
+    try:
+        contacts, next_cursor = crm.query({"Stage": stage, "Persona": persona}, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # query() has just refreshed the index; only the sync time is read here.
+    return {"contacts": contacts, "next_cursor": next_cursor, "synced_at": crm.sync_state().get("synced_at")}
+
+
+@app.post("/crm/sync")
+async def sync_contacts(full: bool = False, api_key: None = Depends(verify_api_key)) -> Dict[str, Any]:
+    """Pull changes from Airtable now (everything with ``?full=true``)."""
+    if crm.client is None:
+        raise HTTPException(status_code=503, detail="Airtable is not configured")
+    try:
+        return await asyncio.to_thread(crm.sync, full or None)
+    except AirtableError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
@@ -0,0 +1,6 @@
+"""Benchmark suite for the orchestrator, agents and HTTP layer.
+
+Run ``python -m benchmarks`` (or ``make bench``); see
+``python -m benchmarks --help`` for filtering, baselines and the
+regression threshold.
+"""
@@ -0,0 +1,52 @@
+"""Command line entry point: ``python -m benchmarks``."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts (e.g. 0.1 for a quick run)")
+    parser.add_argument("--output", default="benchmarks/results/latest.json", help="where to write results")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing (fraction, default 0.10)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write the results to PATH as a new baseline")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    # Keep audit output from the service module out of the working tree.
+    os.environ.setdefault("AGENT_AUDIT_LOG", os.path.join(tempfile.gettempdir(), "incluu-bench-audit.log"))
+
+    from . import suite  # noqa: F401  (registers benchmarks)
+    from .runner import REGISTRY, compare, load, run_suite, save
+
+    if args.list:
+        for name in REGISTRY:
+            print(name)
+        return 0
+
+    results = run_suite(args.filter, args.scale)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    save(results, args.output)
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        save(results, args.save_baseline)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
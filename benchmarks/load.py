@@ -0,0 +1,527 @@
+"""Load generator for the agent service: ``python -m benchmarks.load``.
+
+Unlike the micro-benchmarks in :mod:`benchmarks.suite`, this drives the
+service with many concurrent requests for a fixed time and reports how
+it copes:
+
+* ``--target inprocess`` (default) calls an :class:`Orchestrator` with
+  every agent registered, in this process; ``--target http://host:port``
+  posts to ``/tasks`` on a running server over keep-alive connections.
+* ``--mode closed`` runs ``--concurrency`` clients that each send the
+  next request as soon as the previous one returns. ``--mode open``
+  starts requests at a fixed ``--rate`` per second (or with
+  ``--arrivals poisson``) whether or not earlier ones have finished, and
+  measures latency from when each request was due, so a stalled server
+  shows up as latency instead of as fewer requests.
+* ``--task NAME[:WEIGHT[:PAYLOAD_JSON]]`` (repeatable) or ``--mix FILE``
+  (a JSON list of ``{"name", "payload", "weight"}``) sets the task mix.
+
+Every ``--interval`` seconds it prints throughput, error rate and
+latency percentiles for that interval, then a summary for the whole run.
+Latencies go into a log-linear histogram (as in HdrHistogram) with under
+1% error at any magnitude, so long tails are reported faithfully. ``--output`` writes the run as JSON;
+``--baseline`` compares against an earlier run's JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .runner import load, save
+
+CLOSED = "closed"
+OPEN = "open"
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies, recorded in microseconds.
+
+    Values below ``2 ** precision`` µs get a bucket each; above that,
+    every power of two is split into ``2 ** (precision - 1)`` buckets,
+    so a bucket is never wider than ``2 / 2 ** precision`` of its values.
+    """
+
+    def __init__(self, precision: int = 8) -> None:
+        self.precision = precision
+        self._sub = 1 << precision
+        self._half = self._sub >> 1
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1e6))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency in seconds at or below which ``q`` percent of values fall."""
+        value = self._percentile_us(q)
+        return value / 1e6 if value is not None else None
+
+    def summary(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1e3 if self.count else None,
+            "min_ms": self.min / 1e3 if self.min is not None else None,
+            "max_ms": self.max / 1e3 if self.max is not None else None,
+        }
+        for q in PERCENTILES:
+            value = self._percentile_us(q)
+            result[f"p{q:g}_ms"] = value / 1e3 if value is not None else None
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sparse bucket counts, enough to rebuild or merge the histogram."""
+        return {
+            "unit": "us",
+            "precision": self.precision,
+            "buckets": [[self._upper(index), count] for index, count in sorted(self.counts.items())],
+        }
+
+    def _percentile_us(self, q: float) -> Optional[int]:
+        if not self.count:
+            return None
+        rank = max(1, round(q / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Report the bucket's upper edge, but never beyond the largest value.
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def _index(self, value: int) -> int:
+        if value < self._sub:
+            return value
+        shift = value.bit_length() - self.precision
+        return self._sub + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _upper(self, index: int) -> int:
+        if index < self._sub:
+            return index
+        shift, offset = divmod(index - self._sub, self._half)
+        shift += 1
+        return ((offset + self._half + 1) << shift) - 1
+
+
+class _Window:
+    """Counters for one reporting interval (or the whole run)."""
+
+    __slots__ = ("latency", "ok", "errors", "dropped", "statuses")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.ok = 0
+        self.errors = 0
+        self.dropped = 0
+        self.statuses: Dict[str, int] = {}
+
+    def add(self, seconds: float, ok: bool, status: str) -> None:
+        self.latency.record(seconds)
+        if ok:
+            self.ok += 1
+        else:
+            self.errors += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def merge(self, other: "_Window") -> None:
+        self.latency.merge(other.latency)
+        self.ok += other.ok
+        self.errors += other.errors
+        self.dropped += other.dropped
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    def summary(self, seconds: float) -> Dict[str, Any]:
+        done = self.ok + self.errors
+        return {
+            "requests": done,
+            "throughput_rps": done / seconds if seconds else 0.0,
+            "errors": self.errors,
+            "error_rate": self.errors / done if done else 0.0,
+            "dropped": self.dropped,
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency": self.latency.summary(),
+        }
+
+
+# Targets: async callables (name, payload) -> (ok, status label).
+Target = Callable[[str, Dict[str, Any]], Awaitable[Tuple[bool, str]]]
+
+
+class InProcessTarget:
+    """Dispatch through an orchestrator with every discovered agent registered."""
+
+    def __init__(self, orch: Any = None) -> None:
+        if orch is None:
+            from incluu_agents import Orchestrator, registry
+
+            orch = Orchestrator()
+            orch.register_specs(registry.discover())
+        self.orch = orch
+
+    async def __call__(self, name: str, payload: Dict[str, Any]) -> Tuple[bool, str]:
+        response = await self.orch.post_task_async(name, payload)
+        return bool(response["ok"]), "ok" if response["ok"] else "error"
+
+    async def close(self) -> None:
+        self.orch.shutdown(wait=False)
+
+
+class HttpTarget:
+    """POST ``/tasks`` to a running server over reused HTTP/1.1 connections."""
+
+    def __init__(self, url: str, api_key: Optional[str] = None, max_idle: int = 256, timeout: float = 30.0) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported target URL: {url}")
+        self._host = parts.hostname
+        self._port = parts.port or (443 if parts.scheme == "https" else 80)
+        self._ssl = parts.scheme == "https"
+        self._path = parts.path.rstrip("/") + "/tasks"
+        self._head = f"POST {self._path} HTTP/1.1\r\nHost: {parts.netloc}\r\nContent-Type: application/json\r\n"
+        if api_key:
+            self._head += f"X-API-Key: {api_key}\r\n"
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._max_idle = max_idle
+        self._timeout = timeout
+
+    async def __call__(self, name: str, payload: Dict[str, Any]) -> Tuple[bool, str]:
+        body = json.dumps({"name": name, "payload": payload}).encode()
+        if self._idle:
+            reader, writer = self._idle.pop()
+        else:
+            reader, writer = await asyncio.open_connection(self._host, self._port, ssl=self._ssl or None)
+        try:
+            writer.write(f"{self._head}Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            status, keep_alive, raw = await asyncio.wait_for(_read_response(reader), self._timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive and len(self._idle) < self._max_idle:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        ok = False
+        if status == 200:
+            try:
+                ok = json.loads(raw).get("ok") is True
+            except ValueError:
+                pass
+        return ok, str(status)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool, bytes]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    status = int(status_line.split()[1])
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip().lower()
+    keep_alive = headers.get("connection") != "close"
+    if "content-length" in headers:
+        return status, keep_alive, await reader.readexactly(int(headers["content-length"]))
+    if headers.get("transfer-encoding") == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                await reader.readline()
+                return status, keep_alive, b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    return status, False, await reader.read()
+
+
+class Mix:
+    """Weighted choice of ``(name, payload)`` requests."""
+
+    def __init__(self, entries: Sequence[Dict[str, Any]], seed: Optional[int] = None) -> None:
+        if not entries:
+            raise ValueError("The task mix is empty")
+        self.entries = [
+            {"name": e["name"], "payload": dict(e.get("payload") or {}), "weight": float(e.get("weight", 1))}
+            for e in entries
+        ]
+        self._weights = [e["weight"] for e in self.entries]
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def parse(cls, specs: Sequence[str], seed: Optional[int] = None) -> "Mix":
+        """Build a mix from ``NAME[:WEIGHT[:PAYLOAD_JSON]]`` strings."""
+        entries = []
+        for spec in specs:
+            name, _, rest = spec.partition(":")
+            weight, _, payload = rest.partition(":")
+            entries.append({"name": name, "weight": float(weight or 1), "payload": json.loads(payload or "{}")})
+        return cls(entries, seed)
+
+    def choose(self) -> Tuple[str, Dict[str, Any]]:
+        entry = self._rng.choices(self.entries, self._weights)[0]
+        return entry["name"], entry["payload"]
+
+
+class LoadRun:
+    """One load test: drives ``target`` with requests from ``mix``."""
+
+    def __init__(
+        self,
+        target: Target,
+        mix: Mix,
+        mode: str = CLOSED,
+        concurrency: int = 16,
+        rate: float = 100.0,
+        duration: float = 10.0,
+        warmup: float = 0.0,
+        interval: float = 1.0,
+        arrivals: str = "constant",
+        max_in_flight: int = 10_000,
+        echo: Callable[[str], None] = print,
+    ) -> None:
+        if mode not in (CLOSED, OPEN):
+            raise ValueError(f"mode must be '{CLOSED}' or '{OPEN}'")
+        self.target = target
+        self.mix = mix
+        self.mode = mode
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.interval = interval
+        self.arrivals = arrivals
+        self.max_in_flight = max_in_flight
+        self.echo = echo
+        self._window = _Window()
+        self._total = _Window()
+        self._intervals: List[Dict[str, Any]] = []
+        self._in_flight = 0
+        self._flushed = 0.0
+
+    async def run(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        self._start = loop.time()
+        self._measure_from = self._start + self.warmup
+        self._end = self._measure_from + self.duration
+        self._flushed = self._measure_from
+        reporter = loop.create_task(self._report())
+        try:
+            if self.mode == CLOSED:
+                await asyncio.gather(*(self._client() for _ in range(self.concurrency)))
+            else:
+                await self._open_loop()
+        finally:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+        self._flush(loop.time(), final=True)
+        measured = min(loop.time(), self._end) - self._measure_from
+        return {
+            "config": {
+                "mode": self.mode,
+                "concurrency": self.concurrency if self.mode == CLOSED else None,
+                "rate": self.rate if self.mode == OPEN else None,
+                "arrivals": self.arrivals if self.mode == OPEN else None,
+                "duration": self.duration,
+                "warmup": self.warmup,
+                "mix": self.mix.entries,
+            },
+            "summary": self._total.summary(measured),
+            "intervals": self._intervals,
+            "histogram": self._total.latency.to_dict(),
+        }
+
+    async def _client(self) -> None:
+        loop = asyncio.get_running_loop()
+        while loop.time() < self._end:
+            await self._request(loop.time())
+            # Cached results return without suspending; let the other clients run.
+            await asyncio.sleep(0)
+
+    async def _open_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        rng = random.Random()
+        pending = set()
+        due = self._start
+        while due < self._end:
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self._in_flight >= self.max_in_flight:
+                if due >= self._measure_from:
+                    self._window.dropped += 1
+            else:
+                task = loop.create_task(self._request(due))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            due += rng.expovariate(self.rate) if self.arrivals == "poisson" else 1.0 / self.rate
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def _request(self, due: float) -> None:
+        name, payload = self.mix.choose()
+        self._in_flight += 1
+        try:
+            ok, status = await self.target(name, payload)
+        except Exception as exc:
+            ok, status = False, type(exc).__name__
+        finally:
+            self._in_flight -= 1
+        now = asyncio.get_running_loop().time()
+        if due >= self._measure_from:
+            self._window.add(now - due, ok, status)
+
+    async def _report(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_at = self._measure_from + self.interval
+        while True:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            self._flush(next_at)
+            next_at += self.interval
+
+    def _flush(self, now: float, final: bool = False) -> None:
+        window, self._window = self._window, _Window()
+        self._total.merge(window)
+        elapsed, self._flushed = now - self._flushed, now
+        if elapsed <= 0 or not (window.ok or window.errors or window.dropped):
+            return
+        if final and self._intervals and elapsed < self.interval / 2:
+            # Stragglers finishing after the last interval only count in the total.
+            return
+        summary = window.summary(elapsed)
+        summary["t"] = round(now - self._measure_from, 3)
+        self._intervals.append(summary)
+        self.echo(format_line(f"{summary['t']:>7.1f}s", summary))
+
+
+def format_line(label: str, summary: Dict[str, Any]) -> str:
+    latency = summary["latency"]
+
+    def ms(key: str) -> str:
+        value = latency[key]
+        return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+
+    return (
+        f"{label}  {summary['throughput_rps']:>9,.1f} req/s  err {summary['error_rate']:>6.1%}"
+        f"  p50 {ms('p50_ms')}  p90 {ms('p90_ms')}  p99 {ms('p99_ms')}  p99.9 {ms('p99.9_ms')}"
+        f"  max {ms('max_ms')} ms"
+    )
+
+
+def compare_runs(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe how throughput, error rate and latency moved against ``baseline``."""
+    lines = []
+    cur, base = current["summary"], baseline["summary"]
+    for label, key in (("throughput", "throughput_rps"), ("error rate", "error_rate")):
+        lines.append(f"{label:<12} {base[key]:>12,.4g} -> {cur[key]:>12,.4g}{_change(cur[key], base[key])}")
+    for q in PERCENTILES:
+        key = f"p{q:g}_ms"
+        old, new = base["latency"].get(key), cur["latency"].get(key)
+        if old is not None and new is not None:
+            lines.append(f"{key:<12} {old:>12,.3f} -> {new:>12,.3f}{_change(new, old)}")
+    return lines
+
+
+def _change(new: float, old: float) -> str:
+    return f"  ({(new - old) / old:+.1%})" if old else ""
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", default="inprocess", help="'inprocess' or the base URL of a running service")
+    parser.add_argument("--mode", choices=(CLOSED, OPEN), default=CLOSED)
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="clients in closed mode")
+    parser.add_argument("-r", "--rate", type=float, default=100.0, help="requests per second in open mode")
+    parser.add_argument("--arrivals", choices=("constant", "poisson"), default="constant")
+    parser.add_argument("--max-in-flight", type=int, default=10_000, help="open mode: drop arrivals beyond this")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="seconds to measure")
+    parser.add_argument("--warmup", type=float, default=0.0, help="seconds to run before measuring")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between progress lines")
+    parser.add_argument("-t", "--task", action="append", default=[], metavar="NAME[:WEIGHT[:PAYLOAD]]")
+    parser.add_argument("--mix", help="JSON file with a list of {name, payload, weight}")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY"), help="X-API-Key for HTTP targets")
+    parser.add_argument("--seed", type=int, help="seed for the task mix")
+    parser.add_argument("--output", help="write the run as JSON")
+    parser.add_argument("--baseline", help="compare against a JSON file from an earlier run")
+    args = parser.parse_args(argv)
+
+    if args.mix:
+        mix = Mix(load(args.mix), args.seed)
+    else:
+        mix = Mix.parse(args.task or ["job_search"], args.seed)
+
+    if args.target == "inprocess":
+        # Keep audit output from the load run out of the working tree.
+        os.environ.setdefault("AGENT_AUDIT_LOG", os.path.join(tempfile.gettempdir(), "incluu-load-audit.log"))
+        target: Any = InProcessTarget()
+    else:
+        target = HttpTarget(args.target, api_key=args.api_key)
+
+    run = LoadRun(
+        target, mix, mode=args.mode, concurrency=args.concurrency, rate=args.rate,
+        duration=args.duration, warmup=args.warmup, interval=args.interval,
+        arrivals=args.arrivals, max_in_flight=args.max_in_flight,
+    )
+
+    async def go() -> Dict[str, Any]:
+        try:
+            return await run.run()
+        finally:
+            await target.close()
+
+    result = asyncio.run(go())
+    result["meta"] = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "target": args.target}
+    print()
+    print(format_line("   total", result["summary"]))
+    if result["summary"]["dropped"]:
+        print(f"{result['summary']['dropped']} arrivals dropped (over --max-in-flight)")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        save(result, args.output)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        print(f"\nAgainst {args.baseline}:")
+        for line in compare_runs(result, load(args.baseline)):
+            print(f"  {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
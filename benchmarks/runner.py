@@ -0,0 +1,145 @@
+"""Timing, reporting and baseline comparison for the benchmark suite."""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# Benchmarks register themselves here via the ``benchmark`` decorator.
+REGISTRY: Dict[str, "Benchmark"] = {}
+
+
+@dataclass
+class Benchmark:
+    """A named callable plus how many times to run it.
+
+    ``setup`` builds the state once; ``fn`` receives it on every call.
+    ``ops`` is the number of logical operations one call performs (e.g.
+    the number of tasks drained), used to compute throughput.
+    """
+
+    name: str
+    fn: Callable[[Any], Any]
+    setup: Callable[[], Any]
+    iterations: int
+    ops: int = 1
+    teardown: Optional[Callable[[Any], None]] = None
+
+
+def benchmark(
+    name: str,
+    setup: Callable[[], Any] = lambda: None,
+    iterations: int = 1000,
+    ops: int = 1,
+    teardown: Optional[Callable[[Any], None]] = None,
+) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+    """Register ``fn`` as a benchmark called ``name``."""
+
+    def register(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        if name in REGISTRY:
+            raise ValueError(f"Benchmark '{name}' already registered")
+        REGISTRY[name] = Benchmark(name, fn, setup, iterations, ops, teardown)
+        return fn
+
+    return register
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(bench: Benchmark, scale: float = 1.0, warmup: int = 3) -> Dict[str, Any]:
+    """Run ``bench`` and return its latency and throughput figures."""
+    state = bench.setup()
+    try:
+        iterations = max(1, int(bench.iterations * scale))
+        for _ in range(min(warmup, iterations)):
+            bench.fn(state)
+        timings: List[float] = []
+        clock = time.perf_counter
+        for _ in range(iterations):
+            start = clock()
+            bench.fn(state)
+            timings.append(clock() - start)
+    finally:
+        if bench.teardown is not None:
+            bench.teardown(state)
+    timings.sort()
+    total = sum(timings)
+    return {
+        "iterations": iterations,
+        "ops_per_call": bench.ops,
+        "throughput_ops_s": bench.ops * iterations / total if total else float("inf"),
+        "mean_ms": statistics.fmean(timings) * 1e3,
+        "p50_ms": percentile(timings, 50) * 1e3,
+        "p95_ms": percentile(timings, 95) * 1e3,
+        "p99_ms": percentile(timings, 99) * 1e3,
+    }
+
+
+def run_suite(pattern: str = "", scale: float = 1.0, echo: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run every registered benchmark whose name contains ``pattern``."""
+    results: Dict[str, Any] = {}
+    for name, bench in REGISTRY.items():
+        if pattern not in name:
+            continue
+        results[name] = run_benchmark(bench, scale)
+        echo(format_row(name, results[name]))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def format_row(name: str, result: Dict[str, Any]) -> str:
+    return (
+        f"{name:<48} {result['throughput_ops_s']:>14,.0f} ops/s"
+        f"  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms"
+        f"  p99 {result['p99_ms']:>9.3f} ms"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """Return descriptions of benchmarks that regressed by more than ``threshold``.
+
+    A benchmark regresses when its p50 latency grew, or its throughput
+    shrank, by more than ``threshold`` (a fraction) relative to the
+    baseline. Benchmarks missing from either run are ignored.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if result["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p50 {base['p50_ms']:.3f} ms -> {result['p50_ms']:.3f} ms"
+            )
+        elif result["throughput_ops_s"] < base["throughput_ops_s"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {base['throughput_ops_s']:,.0f} -> {result['throughput_ops_s']:,.0f} ops/s"
+            )
+    return regressions
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save(results: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+        fh.write("\n")
@@ -0,0 +1,193 @@
+"""Benchmark definitions.
+
+Importing this module registers every benchmark with
+:data:`benchmarks.runner.REGISTRY`. Names are grouped by layer:
+
+* ``orchestrator.post_task[<task>]`` – full dispatch, result cache off
+  (plus a cached variant and variants on the SQLite state store);
+* ``agent.handle[<agent>.<task>]`` – the agent alone;
+* ``datagen.<helper>[<n>]`` – synthetic data generators;
+* ``providers.search[<filters>]`` – provider directory search over
+  200k doctors;
+* ``agent_platform.run_once[<n>]`` / ``agent_platform.run[<n>x<workers>]``
+  – enqueue and drain a queue of ``n`` tasks;
+* ``http.post[/tasks <task>]`` – the FastAPI route through TestClient.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Dict
+
+import agent_platform
+from incluu_agents import (
+    Orchestrator,
+    SalesAgent,
+    SupportAgent,
+    AnalyticsAgent,
+    JobsAgent,
+    HealthAgent,
+    LegalAgent,
+)
+from incluu_agents import datagen
+from incluu_agents.cache import ResultCache
+from incluu_agents.orchestrator import buffer_records, fake_jobs, fake_leads, fake_tickets
+from incluu_agents.providers import ProviderIndex
+from incluu_agents.state import SQLiteStore
+
+from .runner import benchmark
+
+AGENT_CLASSES = [SalesAgent, SupportAgent, AnalyticsAgent, JobsAgent, HealthAgent, LegalAgent]
+
+TASK_PAYLOADS: Dict[str, Dict[str, Any]] = {
+    "sales_outreach": {"count": 3},
+    "lead_generation": {"count": 10},
+    "support_summary": {},
+    "customer_support": {},
+    "generate_report": {},
+    "job_search": {"count": 5},
+    "health_search": {},
+    "health_appointment": {"doctor_id": 1, "date": "2025-09-15"},
+    "legal_search": {},
+    "legal_appointment": {"lawyer_id": 1, "date": "2025-09-20"},
+}
+
+_AUDIT_DIR = tempfile.mkdtemp(prefix="incluu-bench-")
+
+
+def _make_agent(cls: type) -> Any:
+    # Give outreach enough leads that repeated calls never run dry.
+    if cls is SalesAgent:
+        return SalesAgent(leads=fake_leads(50_000))
+    return cls()
+
+
+def _orchestrator(cached: bool = False, sqlite: bool = False) -> Orchestrator:
+    orch = Orchestrator(
+        log_file=os.path.join(_AUDIT_DIR, "audit.log"),
+        cache=None if cached else ResultCache(max_entries=0),
+        store=SQLiteStore(os.path.join(tempfile.mkdtemp(dir=_AUDIT_DIR), "state.db")) if sqlite else None,
+    )
+    for cls in AGENT_CLASSES:
+        orch.register_agent(_make_agent(cls))
+    return orch
+
+
+def _shutdown(orch: Orchestrator) -> None:
+    orch.shutdown()
+
+
+def _register_orchestrator_benchmarks() -> None:
+    for task_name, payload in TASK_PAYLOADS.items():
+        benchmark(
+            f"orchestrator.post_task[{task_name}]",
+            setup=_orchestrator,
+            teardown=_shutdown,
+            iterations=2000,
+        )(lambda orch, n=task_name, p=payload: orch.post_task(n, p))
+    benchmark(
+        "orchestrator.post_task[job_search,cached]",
+        setup=lambda: _orchestrator(cached=True),
+        teardown=_shutdown,
+        iterations=20_000,
+    )(lambda orch: orch.post_task("job_search", TASK_PAYLOADS["job_search"]))
+    for task_name in ("sales_outreach", "lead_generation", "support_summary", "health_appointment"):
+        benchmark(
+            f"orchestrator.post_task[{task_name},sqlite]",
+            setup=lambda: _orchestrator(sqlite=True),
+            teardown=_shutdown,
+            iterations=1000,
+        )(lambda orch, n=task_name: orch.post_task(n, TASK_PAYLOADS[n]))
+
+
+def _register_agent_benchmarks() -> None:
+    from incluu_agents import Task
+
+    for cls in AGENT_CLASSES:
+        for task_name in cls.tasks:
+            task = Task(name=task_name, payload=TASK_PAYLOADS[task_name])
+            benchmark(
+                f"agent.handle[{cls.name}.{task_name}]",
+                setup=lambda cls=cls: _make_agent(cls),
+                iterations=2000,
+            )(lambda agent, t=task: buffer_records(agent.handle(t).data))
+
+
+def _register_datagen_benchmarks() -> None:
+    for helper in (fake_leads, fake_jobs, fake_tickets):
+        for n, iterations in ((100, 500), (10_000, 30), (1_000_000, 3)):
+            benchmark(
+                f"datagen.{helper.__name__}[{n}]", iterations=iterations, ops=n
+            )(lambda _, f=helper, n=n: f(n))
+
+
+_SEARCHES: Dict[str, Dict[str, Any]] = {
+    "speciality": {"speciality": "Cardiologist"},
+    "speciality+location": {"speciality": "Cardiologist", "location": "Austin"},
+    "name": {"name": "dr ma"},
+    "page": {"speciality": "Cardiologist", "limit": 100},
+}
+
+
+def _directory() -> ProviderIndex:
+    return ProviderIndex(datagen.providers_table(200_000, "Dr.", datagen.DOCTOR_SPECIALITIES, seed=1))
+
+
+def _register_search_benchmarks() -> None:
+    for label, query in _SEARCHES.items():
+        benchmark(f"providers.search[{label}]", setup=_directory, iterations=2000)(
+            lambda index, q=query: index.query(q)
+        )
+
+
+def _platform() -> agent_platform.Orchestrator:
+    orch = agent_platform.Orchestrator(verbose=False)
+    sales = agent_platform.SalesAgent()
+    support = agent_platform.SupportAgent()
+    for agent in (sales, support, agent_platform.AnalyticsAgent(sales, support)):
+        orch.register_agent(agent)
+    return orch
+
+
+_PLATFORM_TYPES = ("sales_outreach", "support_summary", "analytics_report")
+
+
+def _fill(orch: agent_platform.Orchestrator, n: int) -> None:
+    for i in range(n):
+        orch.task_queue.push(agent_platform.Task(type=_PLATFORM_TYPES[i % 3]))
+
+
+def _register_platform_benchmarks() -> None:
+    for n, iterations in ((10_000, 10), (100_000, 3)):
+        benchmark(f"agent_platform.run_once[{n}]", setup=_platform, iterations=iterations, ops=n)(
+            lambda orch, n=n: (_fill(orch, n), orch.run_once())
+        )
+    benchmark("agent_platform.run[100000x4]", setup=_platform, iterations=3, ops=100_000)(
+        lambda orch: (_fill(orch, 100_000), orch.run(workers=4))
+    )
+
+
+def _client() -> Any:
+    from fastapi.testclient import TestClient
+
+    from app.main import app, orch
+
+    orch.cache.max_entries = 0
+    return TestClient(app)
+
+
+def _register_http_benchmarks() -> None:
+    for task_name in ("job_search", "health_search", "generate_report"):
+        body = {"name": task_name, "payload": TASK_PAYLOADS[task_name]}
+        benchmark(f"http.post[/tasks {task_name}]", setup=_client, iterations=500)(
+            lambda client, b=body: client.post("/tasks", json=b)
+        )
+
+
+_register_orchestrator_benchmarks()
+_register_agent_benchmarks()
+_register_datagen_benchmarks()
+_register_search_benchmarks()
+_register_platform_benchmarks()
+_register_http_benchmarks()
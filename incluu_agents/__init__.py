@@ -1,9 +1,29 @@
-"""Top‑level package for Incluu agents."""
-
-from .orchestrator import Orchestrator, Task, Result  # noqa: F401
-from .agents.sales import SalesAgent  # noqa: F401
-from .agents.support import SupportAgent  # noqa: F401
-from .agents.analytics import AnalyticsAgent  # noqa: F401
-from .agents.jobs import JobsAgent  # noqa: F401
-from .agents.health import HealthAgent  # noqa: F401
-from .agents.legal import LegalAgent  # noqa: F401
\ No newline at end of file
+"""Top‑level package for Incluu agents.
+
+Agent classes are imported on first attribute access, so importing the
+package (or the orchestrator) does not pull in every agent's
+dependencies.
+"""
+
+from importlib import import_module
+from typing import Any
+
+from .orchestrator import Agent, Orchestrator, Task, Result  # noqa: F401
+
+_AGENT_MODULES = {
+    "SalesAgent": ".agents.sales",
+    "SupportAgent": ".agents.support",
+    "AnalyticsAgent": ".agents.analytics",
+    "JobsAgent": ".agents.jobs",
+    "HealthAgent": ".agents.health",
+    "LegalAgent": ".agents.legal",
+}
+
+__all__ = ["Agent", "Orchestrator", "Task", "Result", *_AGENT_MODULES]
+
+
+def __getattr__(name: str) -> Any:
+    module = _AGENT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, __name__), name)
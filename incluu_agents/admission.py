@@ -0,0 +1,285 @@
+"""Admission control for the task endpoints.
+
+Under a traffic spike it is better to turn requests away quickly than to
+accept all of them and let every request's latency grow. Before a task
+runs, :class:`AdmissionController` checks:
+
+* a token bucket per API key and task name, refilled at ``rate`` tokens
+  per second up to ``burst``; an empty bucket rejects the request with
+  ``429`` and the time until the next token;
+* a global limit on tasks running at once, plus an optional limit per
+  task name. Requests over the limit wait in a short FIFO queue for at
+  most ``max_wait`` seconds; if the queue is full, or the wait runs out,
+  they are rejected with ``503`` and a ``Retry-After`` estimated from
+  recent task durations.
+
+Limits are given per task name, with ``"*"`` as the default (see
+:meth:`AdmissionController.from_env`). A rate of 0 disables the bucket
+and a concurrency of 0 removes the per-task limit.
+
+The controller lives on the event loop and takes no locks: each check is
+a couple of dict lookups and some arithmetic. Idle buckets are pruned
+once there are more than ``max_buckets`` of them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+DEFAULT = "*"
+
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+TIMED_OUT = "timed_out"
+OVER_BURST = "over_burst"
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted."""
+
+    def __init__(self, status: int, reason: str, retry_after: Optional[float], message: Optional[str] = None) -> None:
+        super().__init__(message or f"Request rejected ({reason}), retry after {retry_after:g}s")
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class TaskLimits:
+    """Limits for one task name: requests per second per key, burst and concurrency."""
+
+    rate: float = 0.0
+    burst: float = 0.0
+    concurrency: int = 0
+
+    @classmethod
+    def parse(cls, value: Mapping[str, Any], base: Optional["TaskLimits"] = None) -> "TaskLimits":
+        """Read ``{rate, burst, concurrency}``, taking missing values from ``base``.
+
+        A new ``rate`` without a ``burst`` allows one second's worth of burst.
+        """
+        base = base or cls()
+        rate = float(value.get("rate", base.rate))
+        burst = value.get("burst", max(rate, 1.0) if "rate" in value else base.burst)
+        return cls(rate=rate, burst=float(burst), concurrency=int(value.get("concurrency", base.concurrency)))
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class AdmissionController:
+    """Token buckets per key and task, and a bounded concurrency limit."""
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, TaskLimits]] = None,
+        max_concurrency: int = 64,
+        queue_size: int = 128,
+        max_wait: float = 1.0,
+        max_buckets: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limits = dict(limits or {})
+        self.default = self.limits.pop(DEFAULT, TaskLimits())
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._running = 0
+        self._running_by_task: Dict[str, int] = {}
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self._duration = 0.05  # moving average of task durations, seconds
+        self._admitted: Dict[str, int] = {}
+        self._rejected: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build a controller from ``AGENT_*`` environment variables.
+
+        ``AGENT_RATE_LIMIT``/``AGENT_RATE_BURST`` set the default bucket,
+        ``AGENT_MAX_CONCURRENCY``, ``AGENT_ADMISSION_QUEUE`` and
+        ``AGENT_ADMISSION_WAIT`` the concurrency limit, and
+        ``AGENT_TASK_LIMITS`` (JSON, ``{task: {rate, burst,
+        concurrency}}``) overrides them per task.
+        """
+        rate = float(os.environ.get("AGENT_RATE_LIMIT", "0"))
+        default = TaskLimits(rate=rate, burst=float(os.environ.get("AGENT_RATE_BURST", max(rate, 1.0))))
+        overrides = json.loads(os.environ.get("AGENT_TASK_LIMITS") or "{}")
+        if DEFAULT in overrides:
+            default = TaskLimits.parse(overrides.pop(DEFAULT), default)
+        limits = {name: TaskLimits.parse(value, default) for name, value in overrides.items()}
+        limits[DEFAULT] = default
+        return cls(
+            limits,
+            max_concurrency=int(os.environ.get("AGENT_MAX_CONCURRENCY", "64")),
+            queue_size=int(os.environ.get("AGENT_ADMISSION_QUEUE", "128")),
+            max_wait=float(os.environ.get("AGENT_ADMISSION_WAIT", "1")),
+        )
+
+    def check_rate(self, key: str, task: str, cost: float = 1.0) -> None:
+        """Take ``cost`` tokens from the bucket of ``key`` and ``task``; raise :class:`Rejected` if empty."""
+        limits = self.limits.get(task, self.default)
+        if limits.rate <= 0:
+            return
+        bucket = self._bucket(key, task, limits, self._clock())
+        if bucket.tokens < cost:
+            self._reject(task, RATE_LIMITED)
+            raise Rejected(429, RATE_LIMITED, _seconds((cost - bucket.tokens) / limits.rate))
+        bucket.tokens -= cost
+
+    def check_rates(self, key: str, costs: Mapping[str, float]) -> None:
+        """Like :meth:`check_rate` for several tasks at once: all or nothing.
+
+        No tokens are taken unless every bucket has enough. A cost above
+        a bucket's burst could never be met, so it is rejected with
+        ``413`` and no ``retry_after``.
+        """
+        now = self._clock()
+        taken = []
+        for task, cost in costs.items():
+            limits = self.limits.get(task, self.default)
+            if limits.rate <= 0:
+                continue
+            if cost > limits.burst:
+                self._reject(task, OVER_BURST)
+                raise Rejected(
+                    413, OVER_BURST, None,
+                    f"At most {limits.burst:g} '{task}' tasks fit in one request (burst), got {cost:g}",
+                )
+            bucket = self._bucket(key, task, limits, now)
+            if bucket.tokens < cost:
+                self._reject(task, RATE_LIMITED)
+                raise Rejected(429, RATE_LIMITED, _seconds((cost - bucket.tokens) / limits.rate))
+            taken.append((bucket, cost))
+        for bucket, cost in taken:
+            bucket.tokens -= cost
+
+    async def acquire(self, task: str) -> None:
+        """Wait for a slot to run ``task``; raise :class:`Rejected` on overload.
+
+        Every successful call must be paired with :meth:`release`.
+        """
+        if not self._waiters and self._has_room(task):
+            self._start(task)
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject(task, QUEUE_FULL)
+            raise Rejected(503, QUEUE_FULL, self.retry_after())
+        waiter = (task, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        # Waiters ahead may only be held back by their own task's limit.
+        self._wake()
+        future = waiter[1]
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._leave(waiter)
+                self._reject(task, TIMED_OUT)
+                raise Rejected(503, TIMED_OUT, self.retry_after()) from None
+        except asyncio.CancelledError:
+            # The client went away; give up the slot if one was handed over.
+            if future.done():
+                self.release(task)
+            else:
+                self._leave(waiter)
+            raise
+
+    def release(self, task: str, seconds: Optional[float] = None) -> None:
+        """Free the slot taken by :meth:`acquire`, noting how long the task ran."""
+        self._running -= 1
+        self._running_by_task[task] -= 1
+        if seconds:
+            self._duration += 0.1 * (seconds - self._duration)
+        self._wake()
+
+    def retry_after(self) -> float:
+        """Estimate when a rejected request would get a slot, in whole seconds."""
+        return _seconds(self._duration * (len(self._waiters) + 1) / max(self.max_concurrency, 1))
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load, limits and admission counters, for monitoring."""
+        return {
+            "running": self._running,
+            "waiting": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "queue_size": self.queue_size,
+            "buckets": len(self._buckets),
+            "avg_duration": self._duration,
+            "admitted": dict(self._admitted),
+            "rejected": [
+                {"task": task, "reason": reason, "count": count}
+                for (task, reason), count in sorted(self._rejected.items())
+            ],
+        }
+
+    def _bucket(self, key: str, task: str, limits: TaskLimits, now: float) -> _Bucket:
+        bucket = self._buckets.get((key, task))
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            bucket = self._buckets[(key, task)] = _Bucket(limits.burst, now)
+        else:
+            bucket.tokens = min(limits.burst, bucket.tokens + (now - bucket.updated) * limits.rate)
+            bucket.updated = now
+        return bucket
+
+    def _has_room(self, task: str) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        limit = self.limits.get(task, self.default).concurrency
+        return not limit or self._running_by_task.get(task, 0) < limit
+
+    def _start(self, task: str) -> None:
+        self._running += 1
+        self._running_by_task[task] = self._running_by_task.get(task, 0) + 1
+        self._admitted[task] = self._admitted.get(task, 0) + 1
+
+    def _wake(self) -> None:
+        # Hand free slots to the oldest waiters that fit; a waiter held
+        # back only by its own task's limit does not block the others.
+        while self._waiters and self._running < self.max_concurrency:
+            for i, (task, future) in enumerate(self._waiters):
+                if self._has_room(task):
+                    del self._waiters[i]
+                    self._start(task)
+                    future.set_result(None)
+                    break
+            else:
+                return
+
+    def _leave(self, waiter: Tuple[str, asyncio.Future]) -> None:
+        self._waiters.remove(waiter)
+        waiter[1].cancel()
+
+    def _reject(self, task: str, reason: str) -> None:
+        key = (task, reason)
+        self._rejected[key] = self._rejected.get(key, 0) + 1
+
+    def _prune(self, now: float) -> None:
+        # Buckets that have refilled completely carry no state.
+        full = [
+            key for key, bucket in self._buckets.items()
+            if bucket.tokens + (now - bucket.updated) * self.limits.get(key[1], self.default).rate
+            >= self.limits.get(key[1], self.default).burst
+        ]
+        for key in full:
+            del self._buckets[key]
+
+
+def _seconds(value: float) -> int:
+    return max(1, math.ceil(value))
@@ -1,8 +1,25 @@
-"""Expose agent classes for import convenience."""
-
-from .sales import SalesAgent  # noqa: F401
-from .support import SupportAgent  # noqa: F401
-from .analytics import AnalyticsAgent  # noqa: F401
-from .jobs import JobsAgent  # noqa: F401
-from .health import HealthAgent  # noqa: F401
-from .legal import LegalAgent  # noqa: F401
\ No newline at end of file
+"""Expose agent classes for import convenience.
+
+Each class is imported on first access.
+"""
+
+from importlib import import_module
+from typing import Any
+
+_AGENT_MODULES = {
+    "SalesAgent": ".sales",
+    "SupportAgent": ".support",
+    "AnalyticsAgent": ".analytics",
+    "JobsAgent": ".jobs",
+    "HealthAgent": ".health",
+    "LegalAgent": ".legal",
+}
+
+__all__ = list(_AGENT_MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    module = _AGENT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, __name__), name)
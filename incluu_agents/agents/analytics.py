@@ -2,23 +2,66 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Any, Dict, Iterable
 
-from ..orchestrator import Agent, Task, Result, fake_leads, fake_tickets
+from .. import stats
+from ..kpis import KpiEngine
+from ..orchestrator import Agent, Task, Result
 
 
 class AnalyticsAgent(Agent):
-    """Agent that generates simple KPI reports."""
+    """Agent that generates KPI reports.
+
+    Reports are read from the running aggregates of the orchestrator's
+    :class:`~incluu_agents.kpis.KpiEngine`, so their cost does not grow
+    with the number of leads, tickets or appointments.
+
+    If the payload carries numbers, the report also includes a
+    ``summary`` of them (see :func:`incluu_agents.stats.summarize`).
+    They can be sent as a ``data`` list, as ``data_b64`` (base64 of raw
+    little-endian values of ``dtype``, default ``float64``) or, for
+    in-process callers, as a NumPy array or a filled
+    :class:`~incluu_agents.stats.StreamingSummary` in ``data``. ``percentiles``
+    and ``bins`` tune the summary.
+    """
 
     name: str = "analytics_agent"
     tasks: Iterable[str] = ("generate_report",)
+    read_only_tasks: Iterable[str] = ("generate_report",)
+    # KPIs move as other agents work, so keep cached reports short-lived.
+    cache_ttl: float = 5.0
 
     def handle(self, task: Task) -> Result:
-        leads = fake_leads(10)
-        tickets = fake_tickets(6)
+        engine = self.kpis or KpiEngine()
         kpis = {
-            "total_leads": len(leads),
-            "avg_lead_score": sum(l["score"] for l in leads) / len(leads),
-            "open_tickets": len(tickets),
+            "total_leads": engine.count("lead_added"),
+            "avg_lead_score": engine.stats("lead_added")["mean"],
+            "contacted_leads": engine.count("lead_contacted"),
+            "open_tickets": engine.count("ticket_opened") - engine.count("ticket_closed"),
+            "appointments": engine.count("appointment_booked"),
         }
-        return Result(ok=True, data={"kpis": kpis})
\ No newline at end of file
+        windows = {
+            label: {
+                event: engine.window(event, label)["count"]
+                for event in ("lead_contacted", "ticket_opened", "ticket_closed", "appointment_booked")
+            }
+            for label in engine.windows
+        }
+        report = {"kpis": kpis, "windows": windows}
+        if "data" in task.payload or "data_b64" in task.payload:
+            try:
+                report["summary"] = self._summarize(task.payload)
+            except ValueError as exc:
+                return Result(ok=False, error=str(exc))
+        return Result(ok=True, data=report)
+
+    def _summarize(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if "data_b64" in payload:
+            values = stats.decode_array(payload["data_b64"], payload.get("dtype", "float64"))
+        else:
+            values = payload["data"]
+        return stats.summarize(
+            values,
+            percentiles=payload.get("percentiles", stats.DEFAULT_PERCENTILES),
+            bins=int(payload.get("bins", stats.DEFAULT_BINS)),
+        )
\ No newline at end of file
@@ -2,22 +2,57 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Any, Dict, Iterable, Optional
 
+from ..appointments import AppointmentCalendar, SlotConflict, run_appointment_task
 from ..orchestrator import Agent, Task, Result, fake_doctors
+from ..providers import ProviderIndex
+from ..state import MemoryStore, StateStore
 
 
 class HealthAgent(Agent):
-    """Agent that handles health related tasks."""
+    """Agent that handles health related tasks.
+
+    ``health_search`` filters the doctor directory by ``speciality``,
+    ``location`` and ``name`` prefix through a :class:`ProviderIndex`
+    and pages through the matches with ``limit`` and ``cursor``.
+
+    ``health_appointment`` books, cancels or reschedules appointments
+    (``action``) in 30 minute slots without double-booking, or lists
+    the next free slots across doctors (see
+    :func:`~incluu_agents.appointments.run_appointment_task`). Booking
+    without a ``time`` takes the first free slot from ``date`` on.
+    Appointments are kept in the state store.
+    """
 
     name: str = "health_agent"
     tasks: Iterable[str] = ("health_search", "health_appointment")
+    read_only_tasks: Iterable[str] = ("health_search",)
+    mutating_tasks: Iterable[str] = ("health_appointment",)
+
+    def __init__(self, doctors: Optional[Iterable[Dict[str, Any]]] = None) -> None:
+        self.directory = ProviderIndex(doctors if doctors is not None else fake_doctors())
+        self.bind_store(MemoryStore())
+
+    def bind_store(self, store: StateStore) -> None:
+        super().bind_store(store)
+        self.calendar = AppointmentCalendar(store, "doctor_id")
 
     def handle(self, task: Task) -> Result:
         if task.name == "health_search":
-            return Result(ok=True, data={"doctors": fake_doctors()})
+            try:
+                doctors, cursor = self.directory.query(task.payload)
+            except ValueError as exc:
+                return Result(ok=False, error=str(exc))
+            return Result(ok=True, data={"doctors": doctors, "next_cursor": cursor})
         elif task.name == "health_appointment":
-            doctor_id = task.payload.get("doctor_id", 1)
-            date = task.payload.get("date", "2025-09-15")
-            return Result(ok=True, data={"appointment": {"doctor_id": doctor_id, "date": date}})
+            try:
+                data = run_appointment_task(self.calendar, task.payload, "2025-09-15", self.directory)
+            except KeyError as exc:
+                return Result(ok=False, error=f"Appointment {exc.args[0]!r} not found")
+            except (SlotConflict, ValueError) as exc:
+                return Result(ok=False, error=str(exc))
+            if task.payload.get("action", "book") == "book":
+                self.publish("appointment_booked")
+            return Result(ok=True, data=data)
         return Result(ok=False, error="Unknown task for HealthAgent")
\ No newline at end of file
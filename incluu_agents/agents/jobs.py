@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Iterable
 
-from ..orchestrator import Agent, Task, Result, fake_jobs
+from ..orchestrator import Agent, Task, Result
 
 
 class JobsAgent(Agent):
@@ -12,8 +12,12 @@ class JobsAgent(Agent):
 
     name: str = "jobs_agent"
     tasks: Iterable[str] = ("job_search",)
+    read_only_tasks: Iterable[str] = ("job_search",)
 
     def handle(self, task: Task) -> Result:
+        from .. import datagen
+
         count = int(task.payload.get("count", 3))
-        jobs = fake_jobs(count)
+        # Rows are built as they are consumed, so large searches can be streamed.
+        jobs = datagen.jobs_table(count).iter_rows()
         return Result(ok=True, data={"jobs": jobs})
\ No newline at end of file
@@ -2,22 +2,57 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Any, Dict, Iterable, Optional
 
+from ..appointments import AppointmentCalendar, SlotConflict, run_appointment_task
 from ..orchestrator import Agent, Task, Result, fake_lawyers
+from ..providers import ProviderIndex
+from ..state import MemoryStore, StateStore
 
 
 class LegalAgent(Agent):
-    """Agent that handles legal related tasks."""
+    """Agent that handles legal related tasks.
+
+    ``legal_search`` filters the lawyer directory by ``speciality``,
+    ``location`` and ``name`` prefix through a :class:`ProviderIndex`
+    and pages through the matches with ``limit`` and ``cursor``.
+
+    ``legal_appointment`` books, cancels or reschedules appointments
+    (``action``) in 30 minute slots without double-booking, or lists
+    the next free slots across lawyers (see
+    :func:`~incluu_agents.appointments.run_appointment_task`). Booking
+    without a ``time`` takes the first free slot from ``date`` on.
+    Appointments are kept in the state store.
+    """
 
     name: str = "legal_agent"
     tasks: Iterable[str] = ("legal_search", "legal_appointment")
+    read_only_tasks: Iterable[str] = ("legal_search",)
+    mutating_tasks: Iterable[str] = ("legal_appointment",)
+
+    def __init__(self, lawyers: Optional[Iterable[Dict[str, Any]]] = None) -> None:
+        self.directory = ProviderIndex(lawyers if lawyers is not None else fake_lawyers())
+        self.bind_store(MemoryStore())
+
+    def bind_store(self, store: StateStore) -> None:
+        super().bind_store(store)
+        self.calendar = AppointmentCalendar(store, "lawyer_id")
 
     def handle(self, task: Task) -> Result:
         if task.name == "legal_search":
-            return Result(ok=True, data={"lawyers": fake_lawyers()})
+            try:
+                lawyers, cursor = self.directory.query(task.payload)
+            except ValueError as exc:
+                return Result(ok=False, error=str(exc))
+            return Result(ok=True, data={"lawyers": lawyers, "next_cursor": cursor})
         elif task.name == "legal_appointment":
-            lawyer_id = task.payload.get("lawyer_id", 1)
-            date = task.payload.get("date", "2025-09-20")
-            return Result(ok=True, data={"appointment": {"lawyer_id": lawyer_id, "date": date}})
+            try:
+                data = run_appointment_task(self.calendar, task.payload, "2025-09-20", self.directory)
+            except KeyError as exc:
+                return Result(ok=False, error=f"Appointment {exc.args[0]!r} not found")
+            except (SlotConflict, ValueError) as exc:
+                return Result(ok=False, error=str(exc))
+            if task.payload.get("action", "book") == "book":
+                self.publish("appointment_booked")
+            return Result(ok=True, data=data)
         return Result(ok=False, error="Unknown task for LegalAgent")
\ No newline at end of file
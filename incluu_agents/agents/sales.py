@@ -2,21 +2,102 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+import threading
+from typing import Any, Dict, Iterable, List, Optional
 
+from ..kpis import KpiEngine
+from ..leads import LeadIndex
 from ..orchestrator import Agent, Task, Result, fake_leads
+from ..state import LEADS, MemoryStore, StateStore
 
 
 class SalesAgent(Agent):
-    """Agent that generates sales outreach lists."""
+    """Agent that generates sales outreach lists.
+
+    Leads live in the agent's state store (collection ``"leads"``) and
+    are mirrored into a :class:`~incluu_agents.leads.LeadIndex`, so
+    ``sales_outreach`` takes the best uncontacted leads without sorting
+    the whole lead book. Its payload accepts ``count`` (default 3) and
+    optional ``industry`` and ``status`` filters. ``lead_generation``
+    adds ``count`` (default 10) new synthetic leads.
+
+    Before each task the index catches up with leads written by other
+    processes sharing the store. Leads are contacted with a
+    compare-and-set on their status, so two processes never contact the
+    same lead.
+
+    Publishes ``lead_added`` and ``lead_contacted`` KPI events with the
+    lead score as value.
+    """
 
     name: str = "sales_agent"
     tasks: Iterable[str] = ("sales_outreach", "lead_generation")
+    mutating_tasks: Iterable[str] = ("sales_outreach", "lead_generation")
+
+    def __init__(self, leads: Optional[List[Dict[str, Any]]] = None) -> None:
+        self._seed = fake_leads(10) if leads is None else leads
+        self._sync_lock = threading.Lock()
+        self.bind_store(MemoryStore())
+
+    def bind_store(self, store: StateStore) -> None:
+        super().bind_store(store)
+        # Processes sharing the store each try to seed it; the first wins.
+        store.put_many(
+            LEADS, {str(lead["id"]): {"status": "new", **lead} for lead in self._seed}, overwrite=False
+        )
+        store.allocate_ids(LEADS, 0, floor=max((lead["id"] for lead in self._seed), default=0))
+        with self._sync_lock:
+            self.index = LeadIndex()
+            self._version = 0
+        self._sync()
+
+    def bind_kpis(self, kpis: KpiEngine) -> None:
+        super().bind_kpis(kpis)
+        for lead in self.index:
+            self.publish("lead_added", lead["score"])
 
     def handle(self, task: Task) -> Result:
-        # Generate leads and mark top ones as contacted
-        leads = sorted(fake_leads(10), key=lambda x: x["score"], reverse=True)
-        to_contact = leads[:3]
-        for lead in to_contact:
-            lead["status"] = "contacted"
-        return Result(ok=True, data={"contacted": to_contact})
\ No newline at end of file
+        self._sync()
+        if task.name == "lead_generation":
+            leads = fake_leads(int(task.payload.get("count", 10)))
+            for lead, lead_id in zip(leads, self.store.allocate_ids(LEADS, len(leads))):
+                lead["id"] = lead_id
+                lead.setdefault("status", "new")
+            self.store.put_many(LEADS, {str(lead["id"]): lead for lead in leads})
+            self._sync()
+            for lead in leads:
+                self.publish("lead_added", lead["score"])
+            return Result(ok=True, data={"leads": leads})
+        status = task.payload.get("status", "new")
+        contacted = self._contact(
+            int(task.payload.get("count", 3)), status, task.payload.get("industry")
+        )
+        if status != "contacted":
+            for lead in contacted:
+                self.publish("lead_contacted", lead["score"])
+        return Result(ok=True, data={"contacted": contacted})
+
+    def _contact(self, k: int, status: str, industry: Optional[str]) -> List[Dict[str, Any]]:
+        if status == "contacted":
+            return self.index.top(k, status, industry)
+        contacted: List[Dict[str, Any]] = []
+        while len(contacted) < k:
+            candidates = self.index.top(k - len(contacted), status, industry)
+            if not candidates:
+                break
+            for lead in candidates:
+                updated = self.store.update(
+                    LEADS, str(lead["id"]), {"status": "contacted"}, expect={"status": status}
+                )
+                # None means another process changed the lead first.
+                if updated is not None:
+                    contacted.append(updated)
+            self._sync()
+        return contacted
+
+    def _sync(self) -> None:
+        """Apply lead changes made since the last sync to the index."""
+        with self._sync_lock:
+            self._version, changed = self.store.changes(LEADS, self._version)
+            for lead in changed.values():
+                self.index.add(lead)
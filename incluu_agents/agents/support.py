@@ -3,23 +3,48 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import Iterable
+from typing import Any, Dict, Iterable, List, Optional
 
+from ..kpis import KpiEngine
 from ..orchestrator import Agent, Task, Result, fake_tickets
+from ..state import TICKETS, MemoryStore, StateStore
 
 
 class SupportAgent(Agent):
-    """Agent that provides support ticket summaries and responses."""
+    """Agent that provides support ticket summaries and responses.
+
+    The agent keeps its ticket queue in the state store (collection
+    ``"tickets"``) and publishes a ``ticket_opened`` KPI event for each
+    ticket when it is registered.
+    """
 
     name: str = "support_agent"
     tasks: Iterable[str] = ("support_summary", "customer_support")
 
+    def __init__(self, tickets: Optional[List[Dict[str, Any]]] = None) -> None:
+        self._seed = fake_tickets(6) if tickets is None else tickets
+        self.bind_store(MemoryStore())
+
+    def bind_store(self, store: StateStore) -> None:
+        super().bind_store(store)
+        store.put_many(TICKETS, {str(ticket["id"]): ticket for ticket in self._seed}, overwrite=False)
+
+    @property
+    def tickets(self) -> List[Dict[str, Any]]:
+        """The current tickets, read from the state store."""
+        return list(self.store.items(TICKETS).values())
+
+    def bind_kpis(self, kpis: KpiEngine) -> None:
+        super().bind_kpis(kpis)
+        for _ in self.tickets:
+            self.publish("ticket_opened")
+
     def handle(self, task: Task) -> Result:
-        tickets = fake_tickets(6)
+        tickets = self.tickets
         # Summarise issues by first word
         summary = Counter(ticket["issue"].split()[0].lower() for ticket in tickets)
-        suggestions = [
+        suggestions = (
             {"id": ticket["id"], "response": f"We are looking into: {ticket['issue']}"}
             for ticket in tickets
-        ]
+        )
         return Result(ok=True, data={"summary": dict(summary), "suggestions": suggestions})
\ No newline at end of file
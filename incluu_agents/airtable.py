@@ -0,0 +1,472 @@
+"""Local mirror of Airtable tables.
+
+Reading Airtable on every request is slow, and the list endpoint returns
+at most 100 records per call, so a caller that ignores ``offset`` only
+ever sees the first page. :class:`AirtableMirror` copies a table into
+the :class:`~incluu_agents.state.StateStore` instead and answers queries
+from an in-memory index over that copy.
+
+* :meth:`AirtableMirror.sync` walks every page of the table (following
+  ``offset``) and writes each page to the store as one batch. After the
+  first full sync, only records modified since the previous sync are
+  fetched (``LAST_MODIFIED_TIME()``), with a small overlap for clock
+  skew. Incremental syncs cannot see deleted records; a full sync
+  (``full=True``) replaces them with tombstones.
+* :class:`AirtableClient` keeps a small pool of keep-alive HTTP
+  connections, spaces requests to stay under Airtable's limit of five
+  requests per second per base, and retries ``429`` and ``5xx``
+  responses, honouring ``Retry-After``.
+
+Queries filter on exact (case-insensitive) values of the indexed fields
+(``Stage`` and ``Persona`` for contacts) and page through results in
+record id order with an opaque cursor. Because the copy lives in the
+state store, every worker process serves the same data and only one of
+them needs to sync: the periodic sync loop (:meth:`AirtableMirror.start`)
+runs only in the process holding a lease record in the store, taken
+over by another process if it is not renewed within ``lease_ttl``.
+
+``AIRTABLE_API_KEY`` and ``AIRTABLE_BASE_ID`` configure the client;
+without them the mirror only serves what is already in the store.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from .state import StateStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = "https://api.airtable.com/v0"
+PAGE_SIZE = 100  # the most Airtable returns per request
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Collections used by the mirror.
+CONTACTS = "crm_contacts"
+SYNC_STATE = "airtable_sync"
+
+DELETED = "_deleted"
+
+
+class AirtableError(Exception):
+    """Raised when Airtable rejects a request or keeps failing."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _ConnectionPool:
+    """Keep-alive connections to one host, reused across requests and threads."""
+
+    def __init__(self, url: str, size: int, timeout: float) -> None:
+        parts = urlsplit(url)
+        self._factory = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self) -> Iterator[http.client.HTTPConnection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._factory(self._host, self._port, timeout=self._timeout)
+        try:
+            yield conn
+        except BaseException:
+            # The connection may be half way through a response; don't reuse it.
+            conn.close()
+            raise
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float, clock: Callable[[], float], sleep: Callable[[float], None]) -> None:
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            self._sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for ``seconds`` (after a 429)."""
+        with self._lock:
+            self._next = max(self._next, self._clock() + seconds)
+
+
+class AirtableClient:
+    """Minimal Airtable REST client for listing records."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_id: str,
+        url: str = DEFAULT_URL,
+        pool_size: int = 4,
+        rate: float = 5.0,
+        max_retries: int = 5,
+        timeout: float = 30.0,
+        rate_limit_wait: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.base_id = base_id
+        self._headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
+        self._prefix = urlsplit(url).path.rstrip("/")
+        self._pool = _ConnectionPool(url, pool_size, timeout)
+        self._limiter = _RateLimiter(rate, clock, sleep)
+        self._max_retries = max_retries
+        self._rate_limit_wait = rate_limit_wait
+        self._sleep = sleep
+
+    @classmethod
+    def from_env(cls) -> Optional["AirtableClient"]:
+        """Build a client from ``AIRTABLE_*`` variables, or None without credentials."""
+        api_key = os.environ.get("AIRTABLE_API_KEY")
+        base_id = os.environ.get("AIRTABLE_BASE_ID")
+        if not api_key or not base_id:
+            return None
+        return cls(
+            api_key,
+            base_id,
+            url=os.environ.get("AIRTABLE_URL", DEFAULT_URL),
+            pool_size=int(os.environ.get("AIRTABLE_POOL_SIZE", "4")),
+            rate=float(os.environ.get("AIRTABLE_RATE", "5")),
+        )
+
+    def pages(self, table: str, params: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield every page of records in ``table``, following ``offset``."""
+        params = {"pageSize": PAGE_SIZE, **(params or {})}
+        path = f"{self._prefix}/{quote(self.base_id, safe='')}/{quote(table, safe='')}"
+        while True:
+            body = self.get(path, params)
+            yield body.get("records", [])
+            offset = body.get("offset")
+            if not offset:
+                return
+            params = {**params, "offset": offset}
+
+    def get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET ``path`` and decode the JSON body, retrying transient failures."""
+        target = f"{path}?{urlencode(params)}" if params else path
+        for attempt in range(self._max_retries + 1):
+            self._limiter.wait()
+            try:
+                with self._pool.connection() as conn:
+                    conn.request("GET", target, headers=self._headers)
+                    response = conn.getresponse()
+                    status, raw = response.status, response.read()
+                    retry_after = response.getheader("Retry-After")
+            except (OSError, http.client.HTTPException) as exc:
+                # Includes a pooled connection the server has since closed.
+                error = AirtableError(f"Airtable request failed: {exc}")
+                delay = _backoff(attempt)
+            else:
+                if status == 200:
+                    return json.loads(raw)
+                error = AirtableError(f"Airtable returned {status}: {raw[:200].decode('utf-8', 'replace')}", status)
+                if status == 429:
+                    delay = float(retry_after) if retry_after else self._rate_limit_wait
+                    self._limiter.pause(delay)
+                    continue
+                if status < 500:
+                    raise error
+                delay = float(retry_after) if retry_after else _backoff(attempt)
+            if attempt < self._max_retries:
+                self._sleep(delay)
+        raise error
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+def _backoff(attempt: int) -> float:
+    return min(0.5 * 2 ** attempt, 8.0)
+
+
+class AirtableMirror:
+    """A table copied into the state store, with an index for queries.
+
+    Records are stored as Airtable's ``fields`` plus ``id``. Queries
+    filter on ``index_fields``; list values (multiple selects) match
+    any of their items.
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        client: Optional[AirtableClient] = None,
+        table: str = "Contacts",
+        collection: str = CONTACTS,
+        index_fields: Sequence[str] = ("Stage", "Persona"),
+        interval: float = 300.0,
+        overlap: float = 60.0,
+        lease_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.store = store
+        self.client = client
+        self.table = table
+        self.collection = collection
+        self.index_fields = tuple(index_fields)
+        self.interval = interval
+        self.overlap = overlap
+        # Long enough to survive one slow sync between renewals.
+        self.lease_ttl = 3 * interval if lease_ttl is None else lease_ttl
+        self._clock = clock
+        self._owner = uuid.uuid4().hex
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._ids: List[str] = []
+        self._postings: Dict[Tuple[str, str], List[str]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, store: StateStore) -> "AirtableMirror":
+        """Mirror ``$AIRTABLE_CONTACTS_TABLE`` (default ``Contacts``) into ``store``."""
+        return cls(
+            store,
+            AirtableClient.from_env(),
+            table=os.environ.get("AIRTABLE_CONTACTS_TABLE", "Contacts"),
+            interval=float(os.environ.get("AIRTABLE_SYNC_INTERVAL", "300")),
+        )
+
+    def sync(self, full: Optional[bool] = None) -> Dict[str, Any]:
+        """Copy new and changed records from Airtable into the store.
+
+        The first sync (or ``full=True``) reads the whole table and
+        tombstones local records that no longer exist. Returns counts of
+        fetched and deleted records.
+        """
+        if self.client is None:
+            raise AirtableError("Airtable is not configured")
+        with self._sync_lock:
+            state = self.store.get(SYNC_STATE, self.table) or {}
+            if full is None:
+                full = "synced_at" not in state
+            started = self._clock()
+            params: Dict[str, Any] = {}
+            if not full:
+                since = _iso(state["synced_at"] - self.overlap)
+                params["filterByFormula"] = f"IS_AFTER(LAST_MODIFIED_TIME(), '{since}')"
+            fetched = 0
+            seen = set()
+            for page in self.client.pages(self.table, params):
+                records = {record["id"]: {**record.get("fields", {}), "id": record["id"]} for record in page}
+                self.store.put_many(self.collection, records)
+                fetched += len(records)
+                seen.update(records)
+            deleted = 0
+            if full:
+                self.refresh()
+                with self._lock:
+                    gone = {key: {"id": key, DELETED: True} for key in self._records if key not in seen}
+                if gone:
+                    self.store.put_many(self.collection, gone)
+                deleted = len(gone)
+                state["full_synced_at"] = started
+            state["synced_at"] = started
+            self.store.put(SYNC_STATE, self.table, state)
+        self.refresh()
+        return {"full": full, "fetched": fetched, "deleted": deleted}
+
+    def refresh(self) -> None:
+        """Apply records written to the store since the last refresh to the index."""
+        with self._lock:
+            self._version, changed = self.store.changes(self.collection, self._version)
+            for key, record in changed.items():
+                self._unindex(key)
+                if not record.get(DELETED):
+                    self._index(key, record)
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Optional[str]]] = None,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to ``limit`` records matching ``filters`` and the next cursor.
+
+        Raises ValueError for unknown fields or a bad limit or cursor.
+        """
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be an integer between 1 and {MAX_LIMIT}")
+        if cursor is not None and not isinstance(cursor, str):
+            raise ValueError("Invalid cursor")
+        wanted = {}
+        for name, value in (filters or {}).items():
+            if name not in self.index_fields:
+                raise ValueError(f"Cannot filter on '{name}'")
+            if value is not None:
+                wanted[name] = _norm(value)
+        self.refresh()
+        with self._lock:
+            postings = [self._postings.get(key, []) for key in wanted.items()]
+            candidates = min(postings, key=len) if postings else self._ids
+            start = bisect_right(candidates, cursor) if cursor is not None else 0
+            results: List[Dict[str, Any]] = []
+            for i in range(start, len(candidates)):
+                record = self._records[candidates[i]]
+                if all(value in _values(record.get(name)) for name, value in wanted.items()):
+                    if len(results) == limit:
+                        return results, results[-1]["id"]
+                    results.append(dict(record))
+        return results, None
+
+    def status(self) -> Dict[str, Any]:
+        """Record count and the times of the last (full) sync."""
+        self.refresh()
+        state = self.sync_state()
+        return {
+            "table": self.table,
+            "configured": self.client is not None,
+            "sync_leader": self.is_leader(),
+            "records": len(self._records),
+            "synced_at": state.get("synced_at"),
+            "full_synced_at": state.get("full_synced_at"),
+        }
+
+    def sync_state(self) -> Dict[str, Any]:
+        """The stored ``synced_at``/``full_synced_at`` times, without refreshing the index."""
+        return self.store.get(SYNC_STATE, self.table) or {}
+
+    def acquire_lease(self) -> bool:
+        """Take or renew the sync lease; return whether this mirror holds it.
+
+        The lease is a record in the shared store claimed with a
+        compare-and-set, so with several worker processes only one runs
+        the periodic sync at a time.
+        """
+        key = self._lease_key()
+        self.store.put_many(SYNC_STATE, {key: {"owner": "", "expires": 0}}, overwrite=False)
+        lease = self.store.get(SYNC_STATE, key) or {}
+        now = self._clock()
+        if lease.get("owner") != self._owner and lease.get("expires", 0) > now:
+            return False
+        claimed = self.store.update(
+            SYNC_STATE,
+            key,
+            {"owner": self._owner, "expires": now + self.lease_ttl},
+            expect={"owner": lease.get("owner"), "expires": lease.get("expires")},
+        )
+        return claimed is not None
+
+    def release_lease(self) -> None:
+        """Give up the sync lease so another process can take it straight away."""
+        self.store.update(SYNC_STATE, self._lease_key(), {"expires": 0}, expect={"owner": self._owner})
+
+    def is_leader(self) -> bool:
+        lease = self.store.get(SYNC_STATE, self._lease_key()) or {}
+        return lease.get("owner") == self._owner and lease.get("expires", 0) > self._clock()
+
+    def start(self) -> None:
+        """Sync every ``interval`` seconds on the running event loop, if configured.
+
+        Only the process holding the sync lease syncs; the others keep
+        checking whether they can take it over.
+        """
+        if self.client is None or self.interval <= 0:
+            return
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.to_thread(self.release_lease)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._sync_if_leader)
+            except Exception:
+                logger.exception("Airtable sync of %s failed", self.table)
+            await asyncio.sleep(self.interval)
+
+    def _sync_if_leader(self) -> None:
+        if self.acquire_lease():
+            self.sync()
+        else:
+            self.refresh()
+
+    def _lease_key(self) -> str:
+        return f"{self.table}:lease"
+
+    def _index(self, key: str, record: Dict[str, Any]) -> None:
+        self._records[key] = record
+        insort(self._ids, key)
+        for name in self.index_fields:
+            for value in _values(record.get(name)):
+                insort(self._postings.setdefault((name, value), []), key)
+
+    def _unindex(self, key: str) -> None:
+        record = self._records.pop(key, None)
+        if record is None:
+            return
+        _discard(self._ids, key)
+        for name in self.index_fields:
+            for value in _values(record.get(name)):
+                _discard(self._postings[(name, value)], key)
+
+
+def _norm(value: Any) -> str:
+    return str(value).casefold()
+
+
+def _values(value: Any) -> set:
+    if value is None:
+        return set()
+    if isinstance(value, list):
+        return {_norm(item) for item in value}
+    return {_norm(value)}
+
+
+def _discard(keys: List[str], key: str) -> None:
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
@@ -0,0 +1,410 @@
+"""Appointment slots and conflict detection.
+
+Each provider's day is divided into fixed-length slots (09:00–17:00 in
+30 minute slots by default). :class:`SlotBook` keeps one integer bitmap
+per provider and day, with bit ``i`` set when slot ``i`` is booked, so
+a calendar costs a few bytes per busy day and a conflict check is a
+single ``&``. Booking, cancelling and rescheduling check and update the
+bitmap under a lock picked by hashing the provider into a fixed set of
+stripes. Bookings for different providers rarely share a lock and go
+ahead in parallel. Availability queries read the bitmaps without
+locking.
+
+:class:`AppointmentCalendar` puts a :class:`SlotBook` in front of the
+agent's :class:`~incluu_agents.state.StateStore`. Every booked slot is
+also claimed in the store with an insert-if-absent (or a
+compare-and-set on a released claim), so processes sharing a SQLite
+store cannot double-book either. Before each operation the calendar
+applies appointments written by other processes to its
+:class:`SlotBook`.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+from datetime import date
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .state import APPOINTMENT_SLOTS, APPOINTMENTS, StateStore
+
+BOOKED = "booked"
+CANCELLED = "cancelled"
+
+# (provider, day ordinal, first slot, number of slots)
+_Booking = Tuple[Hashable, int, int, int]
+
+
+class SlotConflict(Exception):
+    """Raised when a requested slot is already booked."""
+
+
+class SlotBook:
+    """In-memory provider calendars with per-provider lock striping.
+
+    Dates are ISO strings (``"2025-09-15"``) and times ``"HH:MM"`` on
+    a slot boundary. Appointments span ``length`` consecutive slots.
+    """
+
+    def __init__(
+        self,
+        slot_minutes: int = 30,
+        day_start: str = "09:00",
+        day_end: str = "17:00",
+        stripes: int = 64,
+    ) -> None:
+        self.slot_minutes = slot_minutes
+        self._start = _minutes(day_start)
+        self.slots_per_day = (_minutes(day_end) - self._start) // slot_minutes
+        if self.slots_per_day < 1:
+            raise ValueError("The working day must hold at least one slot")
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._days: Dict[Tuple[Hashable, int], int] = {}
+        self._bookings: Dict[Hashable, _Booking] = {}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._bookings)
+
+    def __contains__(self, appointment_id: Hashable) -> bool:
+        return appointment_id in self._bookings
+
+    def book(
+        self,
+        provider: Hashable,
+        day: str,
+        time: str,
+        length: int = 1,
+        appointment_id: Optional[Hashable] = None,
+    ) -> Dict[str, Any]:
+        """Book ``length`` slots from ``time``; raises :class:`SlotConflict` if any is taken."""
+        ordinal, slot = _ordinal(day), self._slot(time, length)
+        if appointment_id is None:
+            appointment_id = next(self._ids)
+        with self._lock(provider):
+            if appointment_id in self._bookings:
+                raise ValueError(f"Appointment {appointment_id!r} already exists")
+            self._take((provider, ordinal, slot, length))
+            self._bookings[appointment_id] = (provider, ordinal, slot, length)
+        return self._describe(appointment_id, (provider, ordinal, slot, length))
+
+    def cancel(self, appointment_id: Hashable) -> Dict[str, Any]:
+        """Free an appointment's slots; raises KeyError if it is not booked."""
+        provider = self._bookings[appointment_id][0]
+        with self._lock(provider):
+            booking = self._bookings.pop(appointment_id)
+            self._release(booking)
+        return self._describe(appointment_id, booking)
+
+    def reschedule(self, appointment_id: Hashable, day: str, time: str) -> Dict[str, Any]:
+        """Move an appointment to another slot with the same provider, atomically."""
+        provider = self._bookings[appointment_id][0]
+        ordinal = _ordinal(day)
+        with self._lock(provider):
+            old = self._bookings[appointment_id]
+            new = (provider, ordinal, self._slot(time, old[3]), old[3])
+            self._release(old)
+            try:
+                self._take(new)
+            except SlotConflict:
+                self._take(old)
+                raise
+            self._bookings[appointment_id] = new
+        return self._describe(appointment_id, new)
+
+    def get(self, appointment_id: Hashable) -> Optional[Dict[str, Any]]:
+        booking = self._bookings.get(appointment_id)
+        return self._describe(appointment_id, booking) if booking is not None else None
+
+    def is_free(self, provider: Hashable, day: str, time: str, length: int = 1) -> bool:
+        slot = self._slot(time, length)
+        return not self._days.get((provider, _ordinal(day)), 0) & _mask(slot, length)
+
+    def next_free(
+        self,
+        providers: Iterable[Hashable],
+        day: str,
+        time: Optional[str] = None,
+        count: int = 5,
+        length: int = 1,
+        days: int = 14,
+    ) -> List[Dict[str, Any]]:
+        """Return the first ``count`` free slots across ``providers``.
+
+        Slots are searched from ``day`` (and ``time``) for ``days`` days,
+        earliest first; providers with the same free slot are listed in
+        the order given.
+        """
+        providers = list(providers)
+        first = _ordinal(day)
+        start = self._slot(time, 1) if time is not None else 0
+        found: List[Dict[str, Any]] = []
+        # Bit i set: an appointment may start at slot i.
+        starts_mask = _mask(0, max(0, self.slots_per_day - length + 1))
+        for ordinal in range(first, first + days):
+            allowed = starts_mask & ~_mask(0, start) if ordinal == first else starts_mask
+            starts = []
+            pending = 0
+            for provider in providers:
+                busy = self._days.get((provider, ordinal), 0)
+                free = allowed
+                for k in range(length):
+                    # Shifted right by k, busy marks the starts whose k-th slot is taken.
+                    free &= ~(busy >> k)
+                starts.append(free)
+                pending |= free
+            while pending:
+                low = pending & -pending
+                slot = low.bit_length() - 1
+                pending ^= low
+                for provider, bits in zip(providers, starts):
+                    if bits & low:
+                        found.append({"provider_id": provider, "date": _iso(ordinal), "time": self._time(slot)})
+                        if len(found) == count:
+                            return found
+        return found
+
+    # Internals; callers hold the provider's lock.
+
+    def _lock(self, provider: Hashable) -> threading.Lock:
+        return self._stripes[hash(provider) % len(self._stripes)]
+
+    def _take(self, booking: _Booking) -> None:
+        provider, ordinal, slot, length = booking
+        key = (provider, ordinal)
+        bitmap = self._days.get(key, 0)
+        mask = _mask(slot, length)
+        if bitmap & mask:
+            raise SlotConflict(
+                f"Provider {provider!r} is already booked at {self._time(slot)} on {_iso(ordinal)}"
+            )
+        self._days[key] = bitmap | mask
+
+    def _release(self, booking: _Booking) -> None:
+        provider, ordinal, slot, length = booking
+        key = (provider, ordinal)
+        bitmap = self._days[key] & ~_mask(slot, length)
+        if bitmap:
+            self._days[key] = bitmap
+        else:
+            del self._days[key]
+
+    def _slot(self, time: str, length: int) -> int:
+        offset = _minutes(time) - self._start
+        slot, rest = divmod(offset, self.slot_minutes)
+        if rest or slot < 0 or length < 1 or slot + length > self.slots_per_day:
+            raise ValueError(f"Time '{time}' is not a bookable slot")
+        return slot
+
+    def _time(self, slot: int) -> str:
+        return "%02d:%02d" % divmod(self._start + slot * self.slot_minutes, 60)
+
+    def _describe(self, appointment_id: Hashable, booking: _Booking) -> Dict[str, Any]:
+        provider, ordinal, slot, length = booking
+        return {
+            "id": appointment_id,
+            "provider_id": provider,
+            "date": _iso(ordinal),
+            "time": self._time(slot),
+            "length": length,
+        }
+
+
+class AppointmentCalendar:
+    """Appointments for one kind of provider, kept in a state store.
+
+    Appointment records carry the provider under ``provider_field``
+    (``"doctor_id"``, ``"lawyer_id"``, ...), so several agents can share
+    the store's appointment collection.
+    """
+
+    def __init__(self, store: StateStore, provider_field: str, slots: Optional[SlotBook] = None) -> None:
+        self.store = store
+        self.provider_field = provider_field
+        self.slots = slots or SlotBook()
+        self._version = 0
+        # Records that clashed with a booking still in flight here; retried
+        # on the next sync.
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._sync_lock = threading.Lock()
+        self.sync()
+
+    def book(self, provider: Hashable, day: str, time: Optional[str] = None) -> Dict[str, Any]:
+        """Book ``provider`` at ``time``, or at the first free slot from ``day`` on."""
+        self.sync()
+        if time is None:
+            free = self.slots.next_free([provider], day, count=1, days=366)
+            if not free:
+                raise SlotConflict(f"Provider {provider!r} has no free slot within a year of {day}")
+            day, time = free[0]["date"], free[0]["time"]
+        (appointment_id,) = self.store.allocate_ids(APPOINTMENTS, 1)
+        self.slots.book(provider, day, time, appointment_id=appointment_id)
+        if not self._claim(provider, day, time, appointment_id):
+            self.slots.cancel(appointment_id)
+            self.sync()
+            raise SlotConflict(f"Provider {provider!r} is already booked at {time} on {day}")
+        record = {"id": appointment_id, self.provider_field: provider, "date": day, "time": time, "status": BOOKED}
+        self.store.put(APPOINTMENTS, str(appointment_id), record)
+        return record
+
+    def cancel(self, appointment_id: int) -> Dict[str, Any]:
+        """Cancel a booked appointment; raises KeyError if there is none."""
+        self.sync()
+        record = self._booked(appointment_id)
+        cancelled = self.store.update(
+            APPOINTMENTS, str(appointment_id), {"status": CANCELLED}, expect={"status": BOOKED}
+        )
+        if cancelled is None:
+            raise KeyError(appointment_id)
+        self._unclaim(record, appointment_id)
+        self._drop(appointment_id)
+        return cancelled
+
+    def reschedule(self, appointment_id: int, day: str, time: str) -> Dict[str, Any]:
+        """Move a booked appointment; raises :class:`SlotConflict` if the new slot is taken."""
+        self.sync()
+        record = self._booked(appointment_id)
+        provider = record[self.provider_field]
+        self.slots.reschedule(appointment_id, day, time)
+        if not self._claim(provider, day, time, appointment_id):
+            self.slots.reschedule(appointment_id, record["date"], record["time"])
+            raise SlotConflict(f"Provider {provider!r} is already booked at {time} on {day}")
+        moved = self.store.update(
+            APPOINTMENTS,
+            str(appointment_id),
+            {"date": day, "time": time},
+            expect={"status": BOOKED, "date": record["date"], "time": record["time"]},
+        )
+        if moved is None:
+            # Cancelled or moved by another process meanwhile.
+            self._unclaim({**record, "date": day, "time": time}, appointment_id)
+            self.sync()
+            raise KeyError(appointment_id)
+        self._unclaim(record, appointment_id)
+        return moved
+
+    def next_free(self, providers: Iterable[Hashable], day: str, count: int = 5) -> List[Dict[str, Any]]:
+        self.sync()
+        return [
+            {self.provider_field: slot.pop("provider_id"), **slot}
+            for slot in self.slots.next_free(providers, day, count=count)
+        ]
+
+    def sync(self) -> None:
+        """Apply appointments written since the last sync to the slot book."""
+        with self._sync_lock:
+            self._version, changed = self.store.changes(APPOINTMENTS, self._version)
+            records, self._pending = self._pending, {}
+            for record in changed.values():
+                if self.provider_field in record and "time" in record:
+                    records[record["id"]] = record
+            for appointment_id, record in records.items():
+                try:
+                    self._apply(record)
+                except SlotConflict:
+                    self._pending[appointment_id] = record
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        appointment_id = record["id"]
+        current = self.slots.get(appointment_id)
+        if record.get("status") != BOOKED:
+            if current is not None:
+                self._drop(appointment_id)
+        elif current is None:
+            self.slots.book(record[self.provider_field], record["date"], record["time"], appointment_id=appointment_id)
+        elif (current["date"], current["time"]) != (record["date"], record["time"]):
+            self.slots.reschedule(appointment_id, record["date"], record["time"])
+
+    def _drop(self, appointment_id: int) -> None:
+        try:
+            self.slots.cancel(appointment_id)
+        except KeyError:
+            pass  # already dropped by a concurrent sync
+
+    def _booked(self, appointment_id: int) -> Dict[str, Any]:
+        record = self.store.get(APPOINTMENTS, str(appointment_id))
+        if record is None or record.get("status") != BOOKED or self.provider_field not in record:
+            raise KeyError(appointment_id)
+        return record
+
+    def _slot_key(self, provider: Hashable, day: str, time: str) -> str:
+        return f"{self.provider_field}:{provider}:{day}:{time}"
+
+    def _claim(self, provider: Hashable, day: str, time: str, appointment_id: int) -> bool:
+        key = self._slot_key(provider, day, time)
+        claim = {"appointment": appointment_id}
+        if self.store.put_many(APPOINTMENT_SLOTS, {key: claim}, overwrite=False):
+            return True
+        return self.store.update(APPOINTMENT_SLOTS, key, claim, expect={"appointment": None}) is not None
+
+    def _unclaim(self, record: Dict[str, Any], appointment_id: int) -> None:
+        key = self._slot_key(record[self.provider_field], record["date"], record["time"])
+        self.store.update(APPOINTMENT_SLOTS, key, {"appointment": None}, expect={"appointment": appointment_id})
+
+
+def _mask(slot: int, length: int) -> int:
+    return ((1 << length) - 1) << slot
+
+
+def _minutes(time: str) -> int:
+    try:
+        hours, minutes = time.split(":")
+        value = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time '{time}', expected HH:MM") from None
+    return value
+
+
+def _ordinal(day: str) -> int:
+    try:
+        return date.fromisoformat(day).toordinal()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date '{day}', expected YYYY-MM-DD") from None
+
+
+def _iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def run_appointment_task(
+    calendar: AppointmentCalendar,
+    payload: Dict[str, Any],
+    default_date: str,
+    directory: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Carry out a ``*_appointment`` task payload and return the result data.
+
+    ``action`` is ``"book"`` (the default), ``"cancel"``,
+    ``"reschedule"`` or ``"availability"``. Providers are given by
+    ``calendar.provider_field`` (e.g. ``doctor_id``); availability takes
+    a list under the plural field (``doctor_ids``) or, failing that,
+    every provider in ``directory`` matching the payload's search
+    filters. Raises ValueError, KeyError or :class:`SlotConflict`.
+    """
+    field = calendar.provider_field
+    action = payload.get("action", "book")
+    day = payload.get("date", default_date)
+    if action == "book":
+        return {"appointment": calendar.book(payload.get(field, 1), day, payload.get("time"))}
+    if action == "cancel":
+        return {"appointment": calendar.cancel(payload.get("appointment_id"))}
+    if action == "reschedule":
+        if "date" not in payload or "time" not in payload:
+            raise ValueError("Fields 'date' and 'time' are required to reschedule")
+        return {"appointment": calendar.reschedule(payload.get("appointment_id"), day, payload["time"])}
+    if action == "availability":
+        providers = payload.get(f"{field}s")
+        if providers is None:
+            if directory is None:
+                providers = [payload.get(field, 1)]
+            else:
+                filters = {key: payload[key] for key in ("speciality", "location", "name") if key in payload}
+                matches, _ = directory.query({**filters, "limit": 500})
+                providers = [provider["id"] for provider in matches]
+        if not isinstance(providers, list):
+            raise ValueError(f"Field '{field}s' must be a list")
+        count = payload.get("count", 5)
+        if not isinstance(count, int) or not 1 <= count <= 100:
+            raise ValueError("Field 'count' must be an integer between 1 and 100")
+        return {"slots": calendar.next_free(providers, day, count=count)}
+    raise ValueError(f"Unknown appointment action '{action}'")
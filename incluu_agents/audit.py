@@ -0,0 +1,262 @@
+"""Buffered audit log writer.
+
+The orchestrator records two audit entries per task. Writing them
+synchronously puts file I/O and JSON encoding on every request, so
+:class:`AuditLog` only appends entries to an in-memory buffer. A
+background thread serialises and writes them in batches and rotates
+the file by size or age.
+
+When the disk falls behind and the buffer fills up, ``policy`` decides
+what happens to new entries:
+
+* ``"block"`` – wait until the writer makes room (nothing is lost).
+  Waiting on an event loop thread would stall every request on the
+  loop, so there, and inside :meth:`AuditLog.nonblocking` (used for
+  work done on behalf of a coroutine), the entry is dropped instead.
+* ``"drop"`` – discard the entry.
+* ``"sample"`` – once the buffer is half full keep one entry in
+  ``sample_rate``; discard everything while it is completely full.
+
+Call :meth:`AuditLog.flush` to wait for buffered entries to reach the
+file and :meth:`AuditLog.close` to stop the writer. Both are safe to
+call repeatedly, and a closed log restarts its writer on the next
+:meth:`AuditLog.record`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("block", "drop", "sample")
+
+
+class AuditLog:
+    """Append-only audit log with an off-thread, batching writer."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        capacity: int = 10_000,
+        policy: str = "block",
+        sample_rate: int = 10,
+        batch_size: int = 512,
+        flush_interval: float = 0.2,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_age: Optional[float] = None,
+        backup_count: int = 5,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audit policy '{policy}', expected one of {POLICIES}")
+        self.path = path
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_rate = max(1, sample_rate)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+
+        self._buffer: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._flush_requested = False
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._sample_counter = 0
+        self._file: Optional[TextIO] = None
+        self._opened_at = 0.0
+        self._atexit_registered = False
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls, path: Optional[str] = None) -> "AuditLog":
+        """Build a log configured from ``AGENT_AUDIT_*`` environment variables."""
+        return cls(
+            path or os.environ.get("AGENT_AUDIT_LOG", "agent_audit.log"),
+            capacity=int(os.environ.get("AGENT_AUDIT_CAPACITY", "10000")),
+            policy=os.environ.get("AGENT_AUDIT_POLICY", "block"),
+        )
+
+    def record(self, entry: Dict[str, Any]) -> bool:
+        """Queue ``entry`` for writing.
+
+        Returns False if the entry was discarded by the buffer policy.
+        """
+        now = time.time()
+        with self._cond:
+            if self._thread is None:
+                self._start()
+            size = len(self._buffer)
+            if size >= self.capacity:
+                if self.policy != "block" or getattr(self._local, "nonblocking", False) or _on_event_loop():
+                    self._dropped += 1
+                    return False
+                while len(self._buffer) >= self.capacity:
+                    self._cond.wait()
+            elif self.policy == "sample" and size >= self.capacity // 2:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_rate:
+                    self._dropped += 1
+                    return False
+            self._buffer.append((now, entry))
+            self._enqueued += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    @contextmanager
+    def nonblocking(self) -> Iterator[None]:
+        """Never wait for room in the buffer on this thread while inside the block."""
+        previous = getattr(self._local, "nonblocking", False)
+        self._local.nonblocking = True
+        try:
+            yield
+        finally:
+            self._local.nonblocking = previous
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every entry queued so far is written.
+
+        Returns False if ``timeout`` expired first.
+        """
+        with self._cond:
+            target = self._enqueued
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush outstanding entries and stop the writer thread."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Return buffer counters for monitoring."""
+        with self._cond:
+            return {
+                "buffered": len(self._buffer),
+                "written": self._written,
+                "dropped": self._dropped,
+            }
+
+    # Writer thread
+
+    def _start(self) -> None:
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="incluu-audit", daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: (
+                            self._closing
+                            or self._flush_requested
+                            or len(self._buffer) >= self.batch_size
+                        ),
+                        self.flush_interval,
+                    )
+                    self._flush_requested = False
+                    batch = list(self._buffer)
+                    self._buffer.clear()
+                    closing = self._closing
+                    self._cond.notify_all()
+                if not batch:
+                    if closing:
+                        break
+                    continue
+                self._write(batch)
+                with self._cond:
+                    self._written += len(batch)
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                # Entries queued while the loop was exiting are written here.
+                if self._buffer:
+                    self._write(list(self._buffer))
+                    self._buffer.clear()
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._written = self._enqueued
+                self._thread = None
+                self._cond.notify_all()
+
+    def _write(self, batch: List[Tuple[float, Dict[str, Any]]]) -> None:
+        lines = []
+        for created, entry in batch:
+            try:
+                message = json.dumps(entry, default=str)
+            except (TypeError, ValueError, RuntimeError):
+                message = repr(entry)
+            lines.append(f"{_format_time(created)} - {message}\n")
+        try:
+            handle = self._open()
+            handle.write("".join(lines))
+            handle.flush()
+            if self._should_rotate(handle):
+                self._rotate()
+        except OSError:
+            logger.exception("Failed to write %d audit entries", len(lines))
+
+    def _open(self) -> TextIO:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._opened_at = time.time()
+        return self._file
+
+    def _should_rotate(self, handle: TextIO) -> bool:
+        if self.max_bytes and handle.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_age and time.time() - self._opened_at >= self.max_age)
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _format_time(created: float) -> str:
+    """Format a timestamp the way ``logging`` formats ``%(asctime)s``."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created)) + f",{int(created % 1 * 1000):03d}"
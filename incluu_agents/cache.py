@@ -0,0 +1,150 @@
+"""Result cache for read-only agent tasks.
+
+Agents list the tasks whose results depend only on their payload in
+``read_only_tasks``. The orchestrator caches successful results of
+those tasks in a :class:`ResultCache`, keyed on the task name and a
+canonical JSON encoding of the payload. Entries expire after a TTL and
+the least recently used entry is evicted once ``max_entries`` is
+reached.
+
+Entries are tagged with the agent that produced them. When an agent
+runs one of its ``mutating_tasks`` the orchestrator calls
+:meth:`ResultCache.invalidate` for that tag. Each tag also carries a
+generation number so a read that started before an invalidation
+cannot store its (now stale) result afterwards.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+CacheKey = Tuple[str, str]
+
+# Payloads carrying bulk data are not worth encoding into a key.
+MAX_KEY_ITEM_SIZE = 1024
+
+
+def canonical_key(name: str, payload: Dict[str, Any]) -> Optional[CacheKey]:
+    """Return a cache key for ``payload``, or None if it should not be cached."""
+    for value in payload.values():
+        if isinstance(value, (list, str, bytes)) and len(value) > MAX_KEY_ITEM_SIZE:
+            return None
+    try:
+        return name, json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultCache:
+    """Thread-safe TTL + LRU cache with per-tag invalidation."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        default_ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, tag, value), oldest first
+        self._entries: "OrderedDict[Hashable, Tuple[float, str, Any]]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key`` or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self._clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, tag: str) -> int:
+        """Return the current invalidation generation of ``tag``."""
+        return self._generations.get(tag, 0)
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        tag: str = "",
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> bool:
+        """Store ``value`` under ``key``.
+
+        If ``generation`` is given and ``tag`` has been invalidated since
+        it was read, the value is stale and is not stored.
+        """
+        if self.max_entries <= 0:
+            return False
+        expires_at = self._clock() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(tag, 0):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[key] = (expires_at, tag, value)
+            self._tags.setdefault(tag, set()).add(key)
+        return True
+
+    def invalidate(self, tag: str) -> int:
+        """Drop every entry tagged ``tag`` and return how many were removed."""
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries. Counters are kept."""
+        with self._lock:
+            for tag in self._tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, tag, _ = self._entries.pop(key)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
@@ -0,0 +1,195 @@
+"""Vectorised synthetic data generation.
+
+The ``fake_*`` helpers in :mod:`incluu_agents.orchestrator` used to
+build records one dict at a time. The functions here generate whole
+columns at once with NumPy from an optional seed and return a
+:class:`ColumnTable`. Row dicts are only built when a caller iterates
+the table, a chunk at a time, so multi-million row fixtures stay cheap
+until they are consumed.
+
+String fields with few distinct values are stored as :class:`Categorical`
+codes, and per-row strings such as ``Company17`` as :class:`Formatted`
+columns that are rendered on access.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+FIRST_NAMES = ["Ava", "Kai", "Maya", "Liam", "Zoe", "Noah", "Ivy", "Leo", "Mia", "Eli"]
+LAST_NAMES = ["Stone", "Rivera", "Chen", "Walker", "Singh", "Lopez", "Kim", "Ali", "King", "Patel"]
+JOB_TITLES = ["Software Engineer", "Product Manager", "Data Analyst", "Sales Manager"]
+JOB_LOCATIONS = ["Remote", "New York", "San Francisco", "Austin"]
+TICKET_ISSUES = ["Cannot login", "Payment failed", "Bug in latest update", "Feature request", "Account locked"]
+DOCTOR_SPECIALITIES = ["Family Medicine", "Cardiologist", "Dermatologist", "Pediatrician", "Neurologist", "Psychiatrist"]
+LAWYER_SPECIALITIES = ["Corporate Law", "Immigration Law", "Real Estate Law", "Family Law", "Employment Law", "Criminal Defense"]
+PROVIDER_LOCATIONS = ["New York", "San Francisco", "Austin", "Chicago", "Seattle", "Boston", "Denver", "Miami"]
+
+CHUNK_SIZE = 65_536
+
+
+class Categorical:
+    """A column of small integer ``codes`` indexing into ``categories``."""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: np.ndarray, categories: Sequence[Any]) -> None:
+        self.codes = codes
+        self.categories = np.asarray(categories, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def values(self, start: int, stop: int) -> List[Any]:
+        return self.categories[self.codes[start:stop]].tolist()
+
+
+class Formatted:
+    """A column rendered on access as ``template.format(value)``."""
+
+    __slots__ = ("template", "source")
+
+    def __init__(self, template: str, source: np.ndarray) -> None:
+        self.template = template
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def values(self, start: int, stop: int) -> List[str]:
+        return [self.template.format(v) for v in self.source[start:stop].tolist()]
+
+
+Column = Union[np.ndarray, Categorical, Formatted]
+
+
+def column_values(column: Column, start: int, stop: int) -> List[Any]:
+    """Return rows ``start:stop`` of ``column`` as Python values."""
+    if isinstance(column, np.ndarray):
+        if column.dtype.kind == "S":
+            return [v.decode("ascii") for v in column[start:stop].tolist()]
+        return column[start:stop].tolist()
+    return column.values(start, stop)
+
+
+class ColumnTable:
+    """A set of equal-length columns that converts to row dicts lazily."""
+
+    def __init__(self, columns: Dict[str, Column]) -> None:
+        lengths = {len(col) for col in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self.columns = columns
+        self._length = lengths.pop() if lengths else 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows()
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Return row ``index`` as a dict."""
+        if not -self._length <= index < self._length:
+            raise IndexError(index)
+        index %= self._length
+        return {name: column_values(col, index, index + 1)[0] for name, col in self.columns.items()}
+
+    def iter_rows(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield row dicts, converting ``chunk_size`` rows at a time."""
+        names = list(self.columns)
+        for start in range(0, self._length, chunk_size):
+            stop = min(start + chunk_size, self._length)
+            chunk = [column_values(self.columns[name], start, stop) for name in names]
+            for values in zip(*chunk):
+                yield dict(zip(names, values))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialise every row as a dict."""
+        return list(self.iter_rows())
+
+
+def make_rng(seed: Optional[int] = None) -> np.random.Generator:
+    """Return a NumPy generator; ``None`` seeds from the OS."""
+    return np.random.default_rng(seed)
+
+
+def choice(rng: np.random.Generator, categories: Sequence[Any], n: int) -> Categorical:
+    """Draw ``n`` values uniformly from ``categories``."""
+    return Categorical(rng.integers(0, len(categories), n, dtype=_code_dtype(len(categories))), categories)
+
+
+def random_words(rng: np.random.Generator, n: int, *lengths: int) -> np.ndarray:
+    """Return ``n`` space-separated words of random capital letters.
+
+    ``random_words(rng, n, 5, 7)`` yields values like ``b"QWERT ASDFGHJ"``
+    as a fixed-width bytes array.
+    """
+    width = sum(lengths) + len(lengths) - 1
+    letters = rng.integers(ord("A"), ord("Z") + 1, (n, width), dtype=np.uint8)
+    offset = 0
+    for length in lengths[:-1]:
+        offset += length
+        letters[:, offset] = ord(" ")
+        offset += 1
+    return letters.view(f"S{width}").ravel()
+
+
+def leads_table(n: int = 10, seed: Optional[int] = None) -> ColumnTable:
+    """Sales leads with ``id``, ``name``, ``email``, ``score`` and ``status``."""
+    rng = make_rng(seed)
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    emails = [f"{name.lower().replace(' ', '.')}@example.com" for name in names]
+    codes = rng.integers(0, len(names), n, dtype=_code_dtype(len(names)))
+    return ColumnTable({
+        "id": np.arange(1, n + 1),
+        "name": Categorical(codes, names),
+        "email": Categorical(codes, emails),
+        "score": rng.integers(60, 100, n, dtype=np.int8),
+        "status": Categorical(np.zeros(n, dtype=np.int8), ["new"]),
+    })
+
+
+def jobs_table(n: int = 5, seed: Optional[int] = None) -> ColumnTable:
+    """Job listings with ``id``, ``title``, ``company`` and ``location``."""
+    rng = make_rng(seed)
+    ids = np.arange(1, n + 1)
+    return ColumnTable({
+        "id": ids,
+        "title": choice(rng, JOB_TITLES, n),
+        "company": Formatted("Company{}", ids),
+        "location": choice(rng, JOB_LOCATIONS, n),
+    })
+
+
+def tickets_table(n: int = 5, seed: Optional[int] = None) -> ColumnTable:
+    """Support tickets with ``id`` and ``issue``."""
+    rng = make_rng(seed)
+    return ColumnTable({
+        "id": np.arange(1, n + 1),
+        "issue": choice(rng, TICKET_ISSUES, n),
+    })
+
+
+def providers_table(
+    n: int, title: str, specialities: Sequence[str], seed: Optional[int] = None
+) -> ColumnTable:
+    """Providers with ``id``, ``name`` (``title`` plus a person's name), ``speciality`` and ``location``.
+
+    ``providers_table(n, "Dr.", DOCTOR_SPECIALITIES)`` builds a doctor
+    directory.
+    """
+    rng = make_rng(seed)
+    names = [f"{title} {first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    return ColumnTable({
+        "id": np.arange(1, n + 1),
+        "name": choice(rng, names, n),
+        "speciality": choice(rng, specialities, n),
+        "location": choice(rng, PROVIDER_LOCATIONS, n),
+    })
+
+
+def _code_dtype(size: int) -> np.dtype:
+    return np.dtype(np.int8 if size <= 127 else np.int16 if size <= 32767 else np.int32)
@@ -0,0 +1,218 @@
+"""Background jobs for long-running tasks.
+
+:class:`JobManager` accepts tasks as jobs and returns an id straight
+away. A fixed number of worker coroutines drain a bounded priority
+queue – higher ``priority`` first, first-in first-out within a
+priority, as in ``agent_platform.TaskQueue`` – and run each job through
+:meth:`Orchestrator.post_task_async
+<incluu_agents.orchestrator.Orchestrator.post_task_async>`.
+
+When the queue is full, :meth:`JobManager.submit` raises
+:class:`QueueFull` with a ``retry_after`` estimate based on the queue
+length and recent job durations, so callers can back off instead of
+piling up.
+
+Finished jobs are kept for ``result_ttl`` seconds and at most
+``max_results`` of them are stored; the oldest are evicted first.
+
+The manager lives on one event loop. Its workers are started by
+:meth:`JobManager.start`, which also re-homes them if the loop changes
+(as it does between ``TestClient`` sessions).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .orchestrator import Orchestrator
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted to a full queue."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Job queue is full, retry after {retry_after:g}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """A task submitted for background execution."""
+
+    id: str
+    name: str
+    payload: Dict[str, Any]
+    priority: int = 0
+    status: str = QUEUED
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+        }
+
+
+class JobManager:
+    """Bounded job queue drained by background workers."""
+
+    def __init__(
+        self,
+        orch: "Orchestrator",
+        workers: int = 4,
+        capacity: int = 1000,
+        result_ttl: float = 300.0,
+        max_results: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.orch = orch
+        self.workers = workers
+        self.capacity = capacity
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self._clock = clock
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._counter = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        # Finished job ids, oldest first, for eviction.
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._running = 0
+        self._rejected = 0
+        # Moving average of job run time, used for Retry-After.
+        self._avg_duration = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._available: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls, orch: "Orchestrator") -> "JobManager":
+        """Build a manager configured by ``AGENT_JOB_*`` environment variables."""
+        return cls(
+            orch,
+            workers=int(os.environ.get("AGENT_JOB_WORKERS", "4")),
+            capacity=int(os.environ.get("AGENT_JOB_QUEUE", "1000")),
+            result_ttl=float(os.environ.get("AGENT_JOB_TTL", "300")),
+            max_results=int(os.environ.get("AGENT_JOB_RESULTS", "10000")),
+        )
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._available = asyncio.Semaphore(len(self._heap))
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers. Queued jobs stay queued and running ones are queued again."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(self, name: str, payload: Dict[str, Any], priority: int = 0) -> Job:
+        """Queue a job and return it; raises :class:`QueueFull` if there is no room."""
+        self.start()
+        if len(self._heap) >= self.capacity:
+            self._rejected += 1
+            raise QueueFull(self.retry_after())
+        job = Job(
+            id=uuid.uuid4().hex, name=name, payload=payload, priority=priority,
+            submitted_at=self._clock(),
+        )
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (-priority, next(self._counter), job))
+        self._available.release()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with ``job_id``, or None if unknown or evicted."""
+        self._evict()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Like :meth:`get`, but wait up to ``timeout`` seconds for the job to finish."""
+        job = self.get(job_id)
+        if job is not None and job.status != DONE and timeout > 0:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def retry_after(self) -> int:
+        """Seconds until the queue is likely to have room again."""
+        drain = len(self._heap) * max(self._avg_duration, 0.01) / max(1, self.workers)
+        return max(1, min(60, math.ceil(drain)))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._heap),
+            "running": self._running,
+            "stored": len(self._finished),
+            "rejected": self._rejected,
+        }
+
+    async def _work(self) -> None:
+        while True:
+            await self._available.acquire()
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            job.status = RUNNING
+            job.started_at = self._clock()
+            self._running += 1
+            start = time.perf_counter()
+            try:
+                job.result = await self.orch.post_task_async(job.name, job.payload)
+            except asyncio.CancelledError:
+                # Stopped mid-run: put the job back where it was so the
+                # next worker runs it again.
+                job.status = QUEUED
+                job.started_at = None
+                heapq.heappush(self._heap, entry)
+                self._available.release()
+                raise
+            except Exception as exc:
+                job.result = {"ok": False, "data": {}, "error": str(exc)}
+            finally:
+                self._running -= 1
+            self._avg_duration += (time.perf_counter() - start - self._avg_duration) * 0.1
+            job.status = DONE
+            job.finished_at = self._clock()
+            job.done.set()
+            self._finished[job.id] = job.finished_at
+            self._evict()
+
+    def _evict(self) -> None:
+        expired = self._clock() - self.result_ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > expired and len(self._finished) <= self.max_results:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
@@ -0,0 +1,268 @@
+"""Incremental KPI engine.
+
+Agents publish events (``lead_added``, ``lead_contacted``,
+``ticket_opened``, ``ticket_closed``, ``appointment_booked`` ...) into a
+:class:`KpiEngine`, optionally with a numeric value such as a lead
+score. The engine keeps, per event name:
+
+* a running count;
+* for valued events, the running mean, variance, min and max plus a
+  :class:`QuantileSketch` for approximate quantiles;
+* counts and sums over sliding windows (last 5 minutes, hour and day
+  by default).
+
+Reports read these aggregates directly, so their cost does not depend
+on how many events have been published.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_WINDOWS = {"5m": 300.0, "1h": 3600.0, "1d": 86400.0}
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with bounded relative error.
+
+    Values are counted in buckets whose bounds grow geometrically by
+    ``(1 + accuracy) / (1 - accuracy)``, so any quantile estimate is
+    within ``accuracy`` (relative) of a value that was actually added.
+    Memory grows with the logarithm of the value range, not the number
+    of values.
+    """
+
+    def __init__(self, accuracy: float = 0.01) -> None:
+        self.accuracy = accuracy
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value > 0:
+            key = self._key(value)
+            self._positive[key] = self._positive.get(key, 0) + count
+        elif value < 0:
+            key = self._key(-value)
+            self._negative[key] = self._negative.get(key, 0) + count
+        else:
+            self._zeros += count
+        self.count += count
+
+    def add_array(self, values: np.ndarray) -> None:
+        """Add every value of a NumPy array of finite numbers in one pass."""
+        import numpy as np  # only needed for bulk adds; keeps import time low
+
+        values = np.asarray(values, dtype=np.float64)
+        for sign, bucket_map in ((1, self._positive), (-1, self._negative)):
+            selected = values[values * sign > 0] * sign
+            if not selected.size:
+                continue
+            keys, counts = np.unique(np.ceil(np.log(selected) / self._log_gamma), return_counts=True)
+            for key, n in zip(keys.astype(np.int64).tolist(), counts.tolist()):
+                bucket_map[key] = bucket_map.get(key, 0) + n
+        self._zeros += int(np.count_nonzero(values == 0))
+        self.count += int(values.size)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add the contents of ``other`` (built with the same accuracy)."""
+        for key, n in other._positive.items():
+            self._positive[key] = self._positive.get(key, 0) + n
+        for key, n in other._negative.items():
+            self._negative[key] = self._negative.get(key, 0) + n
+        self._zeros += other._zeros
+        self.count += other.count
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Return ``(representative_value, count)`` pairs in ascending order."""
+        pairs = [(-self._value(k), n) for k, n in sorted(self._negative.items(), reverse=True)]
+        if self._zeros:
+            pairs.append((0.0, self._zeros))
+        pairs.extend((self._value(k), n) for k, n in sorted(self._positive.items()))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return an estimate of the ``q`` quantile, or None if empty."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """Return estimates for several quantiles in one pass per quantile."""
+        if not self.count:
+            return [None] * len(qs)
+        buckets = self.buckets()
+        out: List[Optional[float]] = []
+        for q in qs:
+            rank = q * (self.count - 1)
+            seen = 0
+            for value, n in buckets:
+                seen += n
+                if seen > rank:
+                    break
+            out.append(value)
+        return out
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+
+class RunningStats:
+    """Count, mean, variance, min, max and quantiles of a value stream."""
+
+    def __init__(self, accuracy: float = 0.01) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = QuantileSketch(accuracy)
+
+    def add(self, value: float) -> None:
+        # Welford's online update
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+        self.sketch.add(value)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else 0.0
+
+    def snapshot(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        estimates = self.sketch.quantiles(quantiles)
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "std": math.sqrt(self.variance),
+            "min": self.min,
+            "max": self.max,
+            "quantiles": {f"p{q * 100:g}": v for q, v in zip(quantiles, estimates)},
+        }
+
+
+class SlidingWindow:
+    """Count and sum of events over the last ``span`` seconds.
+
+    Events are grouped into ``resolution``-second buckets; buckets that
+    fall out of the window are subtracted from the running totals, so
+    updates and reads are amortised O(1).
+    """
+
+    def __init__(self, span: float, resolution: Optional[float] = None) -> None:
+        self.span = span
+        self.resolution = resolution or span / 60
+        self._buckets: Deque[List[float]] = deque()  # [start, count, sum]
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, now: float, value: float) -> None:
+        self.expire(now)
+        start = now - now % self.resolution
+        if self._buckets and self._buckets[-1][0] == start:
+            bucket = self._buckets[-1]
+            bucket[1] += 1
+            bucket[2] += value
+        else:
+            self._buckets.append([start, 1, value])
+        self.count += 1
+        self.total += value
+
+    def expire(self, now: float) -> None:
+        horizon = now - self.span
+        while self._buckets and self._buckets[0][0] + self.resolution <= horizon:
+            _, n, total = self._buckets.popleft()
+            self.count -= int(n)
+            self.total -= total
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        self.expire(now)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "rate_per_s": self.count / self.span,
+        }
+
+
+class KpiEngine:
+    """Thread-safe store of running aggregates keyed by event name."""
+
+    def __init__(
+        self,
+        windows: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.windows = dict(DEFAULT_WINDOWS if windows is None else windows)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._stats: Dict[str, RunningStats] = {}
+        self._windows: Dict[str, Dict[str, SlidingWindow]] = {}
+
+    def publish(self, event: str, value: Optional[float] = None, timestamp: Optional[float] = None) -> None:
+        """Record one occurrence of ``event``, optionally with a value."""
+        now = self._clock() if timestamp is None else timestamp
+        with self._lock:
+            self._counts[event] = self._counts.get(event, 0) + 1
+            if value is not None:
+                stats = self._stats.get(event)
+                if stats is None:
+                    stats = self._stats[event] = RunningStats()
+                stats.add(value)
+            windows = self._windows.get(event)
+            if windows is None:
+                windows = self._windows[event] = {
+                    label: SlidingWindow(span) for label, span in self.windows.items()
+                }
+            for window in windows.values():
+                window.add(now, 0.0 if value is None else value)
+
+    def count(self, event: str) -> int:
+        """Return how many times ``event`` has been published."""
+        return self._counts.get(event, 0)
+
+    def stats(self, event: str) -> Dict[str, Any]:
+        """Return running statistics of the values published with ``event``."""
+        with self._lock:
+            stats = self._stats.get(event) or RunningStats()
+            return stats.snapshot()
+
+    def window(self, event: str, label: str) -> Dict[str, Any]:
+        """Return the ``label`` (e.g. ``"5m"``) window aggregate for ``event``."""
+        with self._lock:
+            windows = self._windows.get(event)
+            if windows is None:
+                return SlidingWindow(self.windows[label]).snapshot(self._clock())
+            return windows[label].snapshot(self._clock())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counts, value statistics and windows for every event."""
+        now = self._clock()
+        with self._lock:
+            return {
+                event: {
+                    "count": count,
+                    **({"stats": self._stats[event].snapshot()} if event in self._stats else {}),
+                    "windows": {
+                        label: window.snapshot(now)
+                        for label, window in self._windows[event].items()
+                    },
+                }
+                for event, count in self._counts.items()
+            }
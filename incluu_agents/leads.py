@@ -0,0 +1,157 @@
+"""Incremental score-ordered lead index.
+
+Sales outreach picks the highest scoring leads that have not been
+contacted yet. Sorting the whole lead book on every request is
+O(n log n); :class:`LeadIndex` instead keeps a max-heap of leads per
+``status`` and per ``(status, industry)`` pair and updates it as leads
+are added, rescored or contacted, so taking the top ``k`` costs
+O(k log n).
+
+Heaps use lazy deletion: changing a lead bumps its version and pushes a
+fresh entry, and stale entries are skipped (and eventually compacted
+away) when they reach the top.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# (-score, insertion order, lead id, version)
+_Entry = Tuple[float, int, Hashable, int]
+_Bucket = Tuple[str, Optional[str]]
+
+
+class LeadIndex:
+    """Thread-safe index of lead dicts ordered by ``score``.
+
+    The index keeps references to the lead dicts it is given and updates
+    their ``status`` and ``score`` in place; methods return copies.
+    Leads without a ``status`` are treated as ``"new"``.
+    """
+
+    def __init__(self, leads: Iterable[Dict[str, Any]] = ()) -> None:
+        self._leads: Dict[Hashable, Dict[str, Any]] = {}
+        self._versions: Dict[Hashable, int] = {}
+        self._heaps: Dict[_Bucket, List[_Entry]] = {}
+        self._live: Dict[_Bucket, int] = {}
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+        for lead in leads:
+            self.add(lead)
+
+    def __len__(self) -> int:
+        return len(self._leads)
+
+    def __contains__(self, lead_id: Hashable) -> bool:
+        return lead_id in self._leads
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over copies of all indexed leads."""
+        with self._lock:
+            leads = [dict(lead) for lead in self._leads.values()]
+        return iter(leads)
+
+    def get(self, lead_id: Hashable) -> Dict[str, Any]:
+        """Return a copy of the lead with ``lead_id``."""
+        with self._lock:
+            return dict(self._leads[lead_id])
+
+    def count(self, status: str = "new", industry: Optional[str] = None) -> int:
+        """Return the number of leads with ``status`` (and ``industry``)."""
+        return self._live.get((status, industry), 0)
+
+    def add(self, lead: Dict[str, Any]) -> None:
+        """Index ``lead``, replacing any lead with the same ``id``."""
+        with self._lock:
+            if lead["id"] in self._leads:
+                self._unlink(lead["id"])
+            lead.setdefault("status", "new")
+            self._leads[lead["id"]] = lead
+            self._versions[lead["id"]] = self._versions.get(lead["id"], 0) + 1
+            self._link(lead)
+
+    def rescore(self, lead_id: Hashable, score: float) -> None:
+        """Change the score of an indexed lead."""
+        self._update(lead_id, score=score)
+
+    def set_status(self, lead_id: Hashable, status: str) -> None:
+        """Change the status of an indexed lead."""
+        self._update(lead_id, status=status)
+
+    def top(self, k: int, status: str = "new", industry: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return copies of the ``k`` best scoring matching leads."""
+        with self._lock:
+            bucket = (status, industry)
+            entries = self._pop_valid(bucket, k)
+            heap = self._heaps.get(bucket)
+            for entry in entries:
+                heapq.heappush(heap, entry)
+            return [dict(self._leads[entry[2]]) for entry in entries]
+
+    def contact_top(
+        self, k: int, status: str = "new", industry: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Mark the ``k`` best scoring matching leads as contacted.
+
+        Returns copies of the contacted leads, best first.
+        """
+        with self._lock:
+            ids = [entry[2] for entry in self._pop_valid((status, industry), k)]
+            for lead_id in ids:
+                self._update(lead_id, status="contacted")
+            return [dict(self._leads[lead_id]) for lead_id in ids]
+
+    # Internals; callers hold the lock.
+
+    def _update(self, lead_id: Hashable, **changes: Any) -> None:
+        with self._lock:
+            lead = self._leads[lead_id]
+            self._unlink(lead_id)
+            lead.update(changes)
+            self._versions[lead_id] += 1
+            self._link(lead)
+
+    def _buckets(self, lead: Dict[str, Any]) -> Tuple[_Bucket, ...]:
+        status = lead["status"]
+        industry = lead.get("industry")
+        if industry is None:
+            return ((status, None),)
+        return (status, None), (status, industry)
+
+    def _link(self, lead: Dict[str, Any]) -> None:
+        entry = (-lead["score"], next(self._order), lead["id"], self._versions[lead["id"]])
+        for bucket in self._buckets(lead):
+            heapq.heappush(self._heaps.setdefault(bucket, []), entry)
+            self._live[bucket] = self._live.get(bucket, 0) + 1
+
+    def _unlink(self, lead_id: Hashable) -> None:
+        # The heap entries become stale once the version is bumped; only the
+        # live counts need adjusting here.
+        for bucket in self._buckets(self._leads[lead_id]):
+            self._live[bucket] -= 1
+            heap = self._heaps[bucket]
+            if len(heap) > 2 * self._live[bucket] + 64:
+                self._compact(bucket, exclude=lead_id)
+
+    def _compact(self, bucket: _Bucket, exclude: Hashable) -> None:
+        heap = [
+            entry for entry in self._heaps[bucket]
+            if entry[2] != exclude and self._is_valid(entry)
+        ]
+        heapq.heapify(heap)
+        self._heaps[bucket] = heap
+
+    def _is_valid(self, entry: _Entry) -> bool:
+        return self._versions.get(entry[2]) == entry[3]
+
+    def _pop_valid(self, bucket: _Bucket, k: int) -> List[_Entry]:
+        heap = self._heaps.get(bucket)
+        found: List[_Entry] = []
+        while heap and len(found) < k:
+            entry = heapq.heappop(heap)
+            if self._is_valid(entry):
+                found.append(entry)
+        return found
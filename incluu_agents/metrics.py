@@ -0,0 +1,281 @@
+"""Dispatch instrumentation for the orchestrator.
+
+:class:`Metrics` counts calls, errors and cache hits per task name and
+agent, keeps a fixed-bucket latency histogram for each, and tracks
+gauges such as the number of tasks running per agent and the depth of
+the worker pool queue.
+
+Recording is on the hot path of every task, so it takes no lock: each
+thread writes to its own shard, and :meth:`Metrics.snapshot` merges the
+shards when metrics are scraped. A scrape may therefore see a call
+counted a moment before its latency, but never loses an update.
+Gauges are stored as per-thread deltas, so a gauge raised on one thread
+and lowered on another still sums correctly. Shards of threads that have
+exited are folded into a single retired shard, so pool churn does not
+make the list of shards grow.
+
+:func:`render_prometheus` turns a snapshot into the Prometheus text
+exposition format.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+IN_FLIGHT = "in_flight"
+QUEUE_DEPTH = "queue_depth"
+UNROUTED = "unrouted"
+COALESCED = "coalesced"
+
+# Offsets into a series row: calls, errors, cache hits, latency sum,
+# then one counter per bucket plus the overflow bucket.
+_CALLS, _ERRORS, _HITS, _SUM, _BUCKETS = range(5)
+
+
+class _Shard:
+    """Accumulators written by a single thread."""
+
+    __slots__ = ("series", "values", "owner")
+
+    def __init__(self, owner: Optional[threading.Thread] = None) -> None:
+        self.series: Dict[Tuple[str, str], List[float]] = {}
+        self.values: Dict[Tuple[str, str], float] = {}
+        self.owner = owner
+
+    def merge(self, other: "_Shard") -> None:
+        # dict.copy() and list() are atomic under the GIL, so this is
+        # safe while the owner of ``other`` keeps recording.
+        for key, row in other.series.copy().items():
+            merged = self.series.get(key)
+            row = list(row)
+            self.series[key] = row if merged is None else [a + b for a, b in zip(merged, row)]
+        for key, value in other.values.copy().items():
+            self.values[key] = self.values.get(key, 0) + value
+
+
+class Metrics:
+    """Per-task and per-agent dispatch metrics."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[_Shard] = []
+        # Totals of threads that have exited.
+        self._retired = _Shard()
+
+    def observe(
+        self, task: str, agent: str, seconds: float, ok: bool = True, cached: bool = False
+    ) -> None:
+        """Record one dispatch of ``task`` by ``agent`` that took ``seconds``."""
+        series = self._shard().series
+        row = series.get((task, agent))
+        if row is None:
+            row = series[(task, agent)] = [0] * (_BUCKETS + len(self.buckets) + 1)
+        row[_CALLS] += 1
+        if not ok:
+            row[_ERRORS] += 1
+        if cached:
+            row[_HITS] += 1
+        row[_SUM] += seconds
+        row[_BUCKETS + bisect_left(self.buckets, seconds)] += 1
+
+    def add(self, name: str, label: str = "", delta: float = 1) -> None:
+        """Add ``delta`` to the gauge or counter ``name`` for ``label``."""
+        values = self._shard().values
+        key = (name, label)
+        values[key] = values.get(key, 0) + delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Merge all shards into a JSON-serialisable summary."""
+        total = _Shard()
+        # Under the lock so that a shard cannot be retired mid-merge and
+        # counted twice.
+        with self._lock:
+            self._retire()
+            total.merge(self._retired)
+            for shard in self._shards:
+                total.merge(shard)
+        series, values = total.series, total.values
+
+        tasks = []
+        agents: Dict[str, Dict[str, Any]] = {}
+        for (task, agent), row in sorted(series.items()):
+            counts = row[_BUCKETS:]
+            tasks.append({
+                "task": task,
+                "agent": agent,
+                "calls": row[_CALLS],
+                "errors": row[_ERRORS],
+                "cache_hits": row[_HITS],
+                "latency": {
+                    "sum": row[_SUM],
+                    "counts": counts,
+                    "p50": histogram_quantile(self.buckets, counts, 0.50),
+                    "p95": histogram_quantile(self.buckets, counts, 0.95),
+                    "p99": histogram_quantile(self.buckets, counts, 0.99),
+                },
+            })
+            totals = agents.setdefault(agent, _agent_totals())
+            totals["calls"] += row[_CALLS]
+            totals["errors"] += row[_ERRORS]
+            totals["cache_hits"] += row[_HITS]
+            totals["latency_sum"] += row[_SUM]
+        coalesced: Dict[str, float] = {}
+        for (name, label), value in values.items():
+            if name == IN_FLIGHT:
+                agents.setdefault(label, _agent_totals())[IN_FLIGHT] = value
+            elif name == COALESCED:
+                coalesced[label] = value
+        return {
+            "buckets": list(self.buckets),
+            "tasks": tasks,
+            "agents": agents,
+            QUEUE_DEPTH: values.get((QUEUE_DEPTH, ""), 0),
+            UNROUTED: values.get((UNROUTED, ""), 0),
+            COALESCED: coalesced,
+        }
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._retire()
+                self._shards.append(shard)
+            return shard
+
+    def _retire(self) -> None:
+        # Called with the lock held. A thread that has exited no longer
+        # writes to its shard, so its totals can move to the retired one.
+        live = []
+        for shard in self._shards:
+            if shard.owner is None or shard.owner.is_alive():
+                live.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = live
+
+
+def _agent_totals() -> Dict[str, Any]:
+    return {"calls": 0, "errors": 0, "cache_hits": 0, "latency_sum": 0.0, IN_FLIGHT: 0}
+
+
+def histogram_quantile(bounds: Sequence[float], counts: Sequence[float], q: float) -> Optional[float]:
+    """Estimate quantile ``q`` from per-bucket (not cumulative) counts.
+
+    Values are interpolated linearly within the bucket holding the
+    target rank. Ranks in the overflow bucket report the largest bound.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0.0
+    for i, count in enumerate(counts):
+        if seen + count >= rank and count:
+            if i >= len(bounds):
+                return bounds[-1]
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / count
+        seen += count
+    return bounds[-1]
+
+
+def render_prometheus(snapshot: Dict[str, Any], prefix: str = "incluu") -> str:
+    """Render a snapshot from :meth:`Metrics.snapshot` as Prometheus text.
+
+    ``cache``, ``audit`` and ``admission`` sections, if present, are
+    exported as well.
+    """
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, Dict[str, str], Any]]) -> None:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{prefix}_{name}{suffix}{_labels(labels)} {_number(value)}")
+
+    tasks = snapshot["tasks"]
+    agents = snapshot["agents"]
+    for field, help_text in (
+        ("calls", "Tasks dispatched to an agent."),
+        ("errors", "Tasks that failed or returned ok=false."),
+        ("cache_hits", "Tasks answered from the result cache."),
+    ):
+        family(f"task_{field}_total", "counter", help_text, (
+            ("", {"task": t["task"], "agent": t["agent"]}, t[field]) for t in tasks
+        ))
+        family(f"agent_{field}_total", "counter", help_text, (
+            ("", {"agent": agent}, totals[field]) for agent, totals in agents.items()
+        ))
+
+    def histogram_samples() -> Iterable[Tuple[str, Dict[str, str], Any]]:
+        bounds = [_number(b) for b in snapshot["buckets"]] + ["+Inf"]
+        for t in tasks:
+            labels = {"task": t["task"], "agent": t["agent"]}
+            cumulative = 0
+            for bound, count in zip(bounds, t["latency"]["counts"]):
+                cumulative += count
+                yield "_bucket", {**labels, "le": bound}, cumulative
+            yield "_sum", labels, t["latency"]["sum"]
+            yield "_count", labels, t["calls"]
+
+    family("task_duration_seconds", "histogram", "Time to produce a task result.", histogram_samples())
+    family("agent_in_flight", "gauge", "Tasks currently running per agent.", (
+        ("", {"agent": agent}, totals[IN_FLIGHT]) for agent, totals in agents.items()
+    ))
+    family("executor_queue_depth", "gauge", "Tasks waiting for a worker thread.", [
+        ("", {}, snapshot[QUEUE_DEPTH]),
+    ])
+    family("unrouted_tasks_total", "counter", "Tasks with no registered agent.", [
+        ("", {}, snapshot[UNROUTED]),
+    ])
+    family("task_coalesced_total", "counter", "Calls that shared the result of an identical running task.", (
+        ("", {"task": task}, count) for task, count in sorted(snapshot.get(COALESCED, {}).items())
+    ))
+    cache = snapshot.get("cache")
+    if cache is not None:
+        family("cache_entries", "gauge", "Entries in the result cache.", [("", {}, cache["size"])])
+        for field in ("hits", "misses", "evictions", "invalidations"):
+            family(f"cache_{field}_total", "counter", f"Result cache {field}.", [("", {}, cache[field])])
+    audit = snapshot.get("audit")
+    if audit is not None:
+        family("audit_buffered", "gauge", "Audit entries waiting to be written.", [("", {}, audit["buffered"])])
+        for field in ("written", "dropped"):
+            family(f"audit_{field}_total", "counter", f"Audit entries {field}.", [("", {}, audit[field])])
+    admission = snapshot.get("admission")
+    if admission is not None:
+        family("admission_running", "gauge", "Admitted tasks still running.", [("", {}, admission["running"])])
+        family("admission_waiting", "gauge", "Requests waiting for a slot.", [("", {}, admission["waiting"])])
+        family("admission_admitted_total", "counter", "Requests admitted per task.", (
+            ("", {"task": task}, count) for task, count in sorted(admission["admitted"].items())
+        ))
+        family("admission_rejected_total", "counter", "Requests rejected per task and reason.", (
+            ("", {"task": r["task"], "reason": r["reason"]}, r["count"]) for r in admission["rejected"]
+        ))
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: Any) -> str:
+    if isinstance(value, float):
+        return repr(value) if not value.is_integer() else f"{value:.1f}"
+    return str(value)
@@ -2,33 +2,86 @@
 
 This module defines a simple orchestrator class that routes tasks
 between registered agents. Each agent advertises the task names it
-supports. The orchestrator logs tasks to a file and returns
-structured results from agents.
+supports. The orchestrator records tasks in an audit log (see
+:mod:`incluu_agents.audit`) and returns structured results from agents.
+
+Tasks can be dispatched synchronously with :meth:`Orchestrator.post_task`
+or from an event loop with :meth:`Orchestrator.post_task_async`. The
+async path awaits agents that implement ``handle_async`` natively and
+offloads everything else to a bounded thread pool, so agent code never
+runs on the event loop.
+
+Agents choose where they run through their ``execution`` class:
+``"thread"`` (the default) as above, ``"inline"`` on the caller's thread
+or event loop for trivial handlers, and ``"process"`` in a pool of worker
+processes for CPU-bound work (see :mod:`incluu_agents.workers`).
+
+Agents can be registered as instances or, with
+:meth:`Orchestrator.register_spec`, as a lazy
+:class:`~incluu_agents.registry.AgentSpec` that is imported and built
+when one of its tasks is first posted.
+
+Every dispatch is timed and counted in :attr:`Orchestrator.metrics`
+(see :mod:`incluu_agents.metrics`).
+
+A ``Result.data`` field may hold a generator (or, from ``handle_async``,
+an async iterator) of records instead of a list. The dispatch methods
+above buffer it into a list. :meth:`Orchestrator.post_task_stream`
+instead hands the records out in chunks as the agent produces them, so
+large outputs can be streamed without being held in memory.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import concurrent.futures
+import copy
 import logging
 import os
-import random
+import threading
+import time
+from collections.abc import AsyncIterator as AsyncIteratorABC, Iterator as IteratorABC
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncContextManager, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .audit import AuditLog
+from .cache import CacheKey, ResultCache, canonical_key
+from .kpis import KpiEngine
+from .metrics import COALESCED, IN_FLIGHT, QUEUE_DEPTH, UNROUTED, Metrics, render_prometheus
+from .state import MemoryStore, StateStore
+from .workers import ProcessAgentPool
+
+if TYPE_CHECKING:
+    from .registry import AgentSpec
+
+logger = logging.getLogger(__name__)
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+EXECUTION_CLASSES = (INLINE, THREAD, PROCESS)
 
-logging.basicConfig(
-    filename=os.environ.get("AGENT_AUDIT_LOG", "agent_audit.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(message)s",
-)
+# Records per chunk handed out by Orchestrator.post_task_stream.
+STREAM_CHUNK_SIZE = 256
 
-@dataclass
+
+# Task and Result are built on every call; slots keep them small and
+# quick to create.
+@dataclass(slots=True)
 class Task:
-    """Represents a unit of work to be handled by an agent."""
+    """Represents a unit of work to be handled by an agent.
+
+    ``debug`` marks a task the caller asked to have profiled (see
+    :class:`DispatchHook`).
+    """
     name: str
     payload: Dict[str, Any] = field(default_factory=dict)
+    debug: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class Result:
     """Represents the result of a task."""
     ok: bool
@@ -36,113 +89,878 @@ class Result:
     error: Optional[str] = None
 
 
+class DispatchHook:
+    """Callbacks run around every agent execution.
+
+    :meth:`before` runs just before the agent handles ``task`` and
+    returns any state the hook needs; :meth:`after` gets that state back
+    with the response once the agent has finished. Both run on the
+    thread (or event loop) that runs the agent, so a hook can profile
+    it. :meth:`after` also runs if the execution is cancelled, with
+    ``{"ok": False, "data": {}, "error": "cancelled"}`` as the response.
+    Cache hits and coalesced calls do not run the agent and skip
+    the hooks; for ``process`` agents only the wait for the worker
+    process is seen. Exceptions raised by hooks are logged and ignored.
+    """
+
+    def before(self, agent: "Agent", task: Task) -> Any:
+        return None
+
+    def after(self, agent: "Agent", task: Task, response: Dict[str, Any], state: Any, seconds: float) -> None:
+        pass
+
+
+@dataclass(slots=True)
+class _Flight:
+    """One running execution of a read-only task, shared by identical calls."""
+    future: Future = field(default_factory=Future)
+    # Callers still waiting for the result; the execution of an async
+    # flight is cancelled when the last of them gives up.
+    waiters: int = 1
+    task: Optional[asyncio.Task] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    # Set on landing if more than one caller reads the result; each of
+    # them then gets its own copy.
+    shared: bool = False
+
+
+@dataclass(slots=True)
+class ResultStream:
+    """A task response whose records are delivered incrementally.
+
+    ``response`` is the usual ``ok``/``data``/``error`` dict without the
+    streamed field; ``field`` names that field (None if there is
+    nothing to stream) and ``chunks`` yields its records as lists.
+    Call :meth:`aclose` once done with it, even if ``chunks`` was never
+    iterated, so the agent's generator is closed.
+    """
+    response: Dict[str, Any]
+    field: Optional[str]
+    chunks: AsyncIterator[List[Any]]
+    source: Any = None
+
+    async def aclose(self) -> None:
+        """Close ``chunks`` and the records they are read from."""
+        try:
+            await self.chunks.aclose()  # type: ignore[attr-defined]
+        finally:
+            if isinstance(self.source, AsyncIteratorABC):
+                aclose = getattr(self.source, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            elif isinstance(self.source, IteratorABC):
+                _close(self.source)
+
+
 class Agent:
     """Base class for all agents.
 
     Subclasses should define a unique ``name`` and a list of
     ``tasks`` they can handle. They must implement ``handle`` to
-    process a :class:`Task` and return a :class:`Result`.
+    process a :class:`Task` and return a :class:`Result`. Agents that
+    do I/O can additionally override ``handle_async``; the orchestrator
+    awaits it directly instead of running ``handle`` in a worker thread.
+
+    Results of tasks listed in ``read_only_tasks`` are cached by the
+    orchestrator for ``cache_ttl`` seconds, and identical calls made
+    while one is running share its result. Running any task listed in
+    ``mutating_tasks`` drops the agent's cached results.
+
+    On registration the orchestrator passes its shared
+    :class:`~incluu_agents.kpis.KpiEngine` to :meth:`bind_kpis`; agents
+    report business events through :meth:`publish`. Agents that keep
+    data between calls store it in the :class:`~incluu_agents.state.StateStore`
+    passed to :meth:`bind_store` so it is shared across API workers.
+
+    ``execution`` picks where ``handle`` runs: ``"thread"`` (a worker
+    thread), ``"inline"`` (the caller's thread, including the event
+    loop, so only for handlers that never block) or ``"process"`` (a
+    worker process with its own instance of the agent class, built with
+    no arguments).
     """
     name: str = "agent"
     tasks: Iterable[str] = ()
+    read_only_tasks: Iterable[str] = ()
+    mutating_tasks: Iterable[str] = ()
+    cache_ttl: float = 60.0
+    execution: str = THREAD
+    kpis: Optional[KpiEngine] = None
+    store: Optional[StateStore] = None
 
     def handle(self, task: Task) -> Result:
         raise NotImplementedError
 
+    async def handle_async(self, task: Task) -> Result:
+        raise NotImplementedError
+
+    def bind_store(self, store: StateStore) -> None:
+        """Attach the state store agent data should be kept in."""
+        self.store = store
+
+    def bind_kpis(self, kpis: KpiEngine) -> None:
+        """Attach the KPI engine events should be published to."""
+        self.kpis = kpis
+
+    def publish(self, event: str, value: Optional[float] = None) -> None:
+        """Publish a KPI event; a no-op until :meth:`bind_kpis` is called."""
+        if self.kpis is not None:
+            self.kpis.publish(event, value)
+
+
+def _has_native_async(agent: Agent) -> bool:
+    """Return True if ``agent`` overrides :meth:`Agent.handle_async`."""
+    return type(agent).handle_async is not Agent.handle_async
+
 
 class Orchestrator:
-    """Registers agents and routes tasks to them."""
+    """Registers agents and routes tasks to them.
+
+    Audit entries go to ``audit`` if given, otherwise to a buffered
+    :class:`~incluu_agents.audit.AuditLog` writing ``log_file`` (default:
+    ``$AGENT_AUDIT_LOG`` or ``agent_audit.log``). ``max_workers`` bounds
+    the thread pool used by :meth:`post_task_async` to run synchronous
+    agents. The pool is created on first use; :meth:`shutdown` releases
+    it and flushes the audit log. Results of read-only tasks are kept in
+    ``cache`` (see :mod:`incluu_agents.cache`), and agents publish
+    business events into ``kpis`` (see :mod:`incluu_agents.kpis`).
+    Dispatch counters, latencies and gauges accumulate in ``metrics``.
+    Agent data lives in ``store`` (see :mod:`incluu_agents.state`);
+    pass a shared store to scale out across processes.
+    Agents with ``execution = "process"`` run in a pool of
+    ``process_workers`` processes; call :meth:`warm_up` to start it,
+    and to load lazily registered agents, before the first task arrives.
+    With ``coalesce`` (the default), concurrent calls of a read-only
+    task with the same canonical payload share one execution, whether
+    they come through :meth:`post_task` or :meth:`post_task_async`.
+    :class:`DispatchHook` instances in ``hooks`` (see :meth:`add_hook`)
+    run around each agent execution; with none registered they cost
+    nothing.
+    """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        log_file: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        audit: Optional[AuditLog] = None,
+        cache: Optional[ResultCache] = None,
+        kpis: Optional[KpiEngine] = None,
+        metrics: Optional[Metrics] = None,
+        process_workers: Optional[int] = None,
+        store: Optional[StateStore] = None,
+        coalesce: bool = True,
+    ) -> None:
+        self.coalesce = coalesce
+        self.hooks: List[DispatchHook] = []
+        self.audit = audit or AuditLog.from_env(log_file)
+        self.store = store or MemoryStore()
+        self.cache = cache if cache is not None else ResultCache()
+        self.kpis = kpis or KpiEngine()
+        self.metrics = metrics or Metrics()
         self._agents: Dict[str, Agent] = {}
         self._routes: Dict[str, str] = {}
+        self._cached_tasks: Set[str] = set()
+        self._mutating_tasks: Set[str] = set()
+        self._max_workers = max_workers or int(
+            os.environ.get("AGENT_MAX_WORKERS", min(32, (os.cpu_count() or 1) + 4))
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._processes = ProcessAgentPool(max_workers=process_workers)
+        self._has_process_agents = False
+        self._specs: Dict[str, "AgentSpec"] = {}
+        self._load_lock = threading.Lock()
+        self._flights: Dict[Tuple[CacheKey, int], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        # Seconds spent importing and constructing each lazily loaded agent.
+        self.load_times: Dict[str, float] = {}
 
     def register_agent(self, agent: Agent) -> None:
         """Register an agent and map its tasks."""
         if agent.name in self._agents:
             raise ValueError(f"Agent name '{agent.name}' already registered")
+        if agent.execution not in EXECUTION_CLASSES:
+            raise ValueError(
+                f"Agent '{agent.name}' has unknown execution class '{agent.execution}', "
+                f"expected one of {EXECUTION_CLASSES}"
+            )
+        if agent.execution == PROCESS:
+            self._processes.add(agent)
+            self._has_process_agents = True
         self._agents[agent.name] = agent
         for task_name in agent.tasks:
             self._routes[task_name] = agent.name
+            self._specs.pop(task_name, None)
+        self._cached_tasks.update(agent.read_only_tasks)
+        self._mutating_tasks.update(agent.mutating_tasks)
+        agent.bind_store(self.store)
+        agent.bind_kpis(self.kpis)
+
+    def register_spec(self, spec: AgentSpec) -> None:
+        """Register an agent to import and construct on first use of its tasks."""
+        for task_name in spec.tasks:
+            if task_name not in self._routes:
+                self._specs[task_name] = spec
+
+    def register_specs(self, specs: Iterable[AgentSpec]) -> None:
+        for spec in specs:
+            self.register_spec(spec)
 
     def registered_agents(self) -> List[Agent]:
-        """Return a list of registered agents."""
+        """Return a list of registered (loaded) agents."""
         return list(self._agents.values())
 
-    def post_task(self, name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Route a task to the appropriate agent and return its result."""
-        logging.info(json.dumps({"task": name, "payload": payload}))
+    def catalog(self) -> List[Dict[str, Any]]:
+        """Describe every agent, including those not loaded yet."""
+        entries = {
+            agent.name: {"name": agent.name, "tasks": list(agent.tasks), "loaded": True}
+            for agent in self._agents.values()
+        }
+        for spec in self._specs.values():
+            entries.setdefault(spec.name, {"name": spec.name, "tasks": list(spec.tasks), "loaded": False})
+        return list(entries.values())
+
+    def add_hook(self, hook: DispatchHook) -> None:
+        """Run ``hook`` around every agent execution from now on."""
+        self.hooks = [*self.hooks, hook]
+
+    def remove_hook(self, hook: DispatchHook) -> None:
+        self.hooks = [h for h in self.hooks if h is not hook]
+
+    def post_task(self, name: str, payload: Dict[str, Any], debug: bool = False) -> Dict[str, Any]:
+        """Route a task to the appropriate agent and return its result.
+
+        With ``debug`` the agent always runs (bypassing the result cache
+        and coalescing) and hooks see ``task.debug`` set, which asks
+        the profilers in :mod:`incluu_agents.profiling` to sample it.
+        """
+        self.audit.record({"task": name, "payload": dict(payload)})
+        try:
+            agent = self._route(name)
+        except Exception as exc:
+            return self._load_failed(name, exc)
+        if agent is None:
+            self.metrics.add(UNROUTED)
+            return _no_agent(name)
+        key, generation, cached = self._cache_lookup(agent, name, payload) if not debug else (None, 0, None)
+        if cached is not None:
+            return cached
+        task = Task(name=name, payload=payload, debug=debug)
+        if key is None or not self.coalesce:
+            response = self._run_sync(agent, task)
+            self._cache_update(agent, name, key, generation, response)
+            return response
+        flight, leader = self._join((key, generation))
+        if not leader:
+            return self._coalesced(agent, name, flight.future.result())
+        try:
+            response = self._run_sync(agent, task)
+            self._cache_update(agent, name, key, generation, response)
+        except BaseException as exc:
+            self._land((key, generation), flight, exc=exc)
+            raise
+        self._land((key, generation), flight, response, kept=True)
+        return response
+
+    async def post_task_async(self, name: str, payload: Dict[str, Any], debug: bool = False) -> Dict[str, Any]:
+        """Async counterpart of :meth:`post_task`.
+
+        Agents with a native ``handle_async`` are awaited on the running
+        loop. Synchronous agents are run in the orchestrator's thread
+        pool; cached results are returned without leaving the loop.
+        """
+        self.audit.record({"task": name, "payload": dict(payload)})
+        try:
+            agent = await self._route_async(name)
+        except Exception as exc:
+            return self._load_failed(name, exc)
+        if agent is None:
+            self.metrics.add(UNROUTED)
+            return _no_agent(name)
+        key, generation, cached = self._cache_lookup(agent, name, payload) if not debug else (None, 0, None)
+        if cached is not None:
+            return cached
+        task = Task(name=name, payload=payload, debug=debug)
+        if key is None or not self.coalesce:
+            response = await self._dispatch_async(agent, task)
+            self._cache_update(agent, name, key, generation, response)
+            return response
+        flight_key = (key, generation)
+        flight, leader = self._join(flight_key)
+        if leader:
+            # The execution runs as its own task so that it survives the
+            # leader being cancelled while others still wait for it.
+            flight.loop = asyncio.get_running_loop()
+            flight.task = flight.loop.create_task(self._lead(agent, task, flight_key, flight))
+        try:
+            response = await asyncio.shield(asyncio.wrap_future(flight.future))
+        except asyncio.CancelledError:
+            self._leave(flight_key, flight)
+            raise
+        if not leader:
+            return self._coalesced(agent, name, response)
+        return _fresh(response) if flight.shared else response
+
+    async def post_task_stream(
+        self, name: str, payload: Dict[str, Any], chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> ResultStream:
+        """Run a task and stream its records instead of buffering them.
+
+        The streamed field is the first generator or async iterator in
+        the result's ``data``, or else its first list. Generators are
+        advanced ``chunk_size`` records at a time in the thread pool
+        (on the loop for inline agents), and only when the consumer asks
+        for the next chunk, so a slow client slows the producer down
+        rather than letting records pile up. Results with nothing lazy
+        in them are cached as usual.
+        """
+        self.audit.record({"task": name, "payload": dict(payload)})
+        try:
+            agent = await self._route_async(name)
+        except Exception as exc:
+            return ResultStream(self._load_failed(name, exc), None, _no_chunks())
+        if agent is None:
+            self.metrics.add(UNROUTED)
+            return ResultStream(_no_agent(name), None, _no_chunks())
+        key, generation, response = self._cache_lookup(agent, name, payload)
+        if response is None:
+            response = await self._dispatch_async(agent, Task(name=name, payload=payload), buffered=False)
+            if not _is_lazy(response["data"]):
+                self._cache_update(agent, name, key, generation, response)
+        field, records = _stream_field(response["data"])
+        if field is None:
+            return ResultStream(response, None, _no_chunks())
+        response = {**response, "data": {k: v for k, v in response["data"].items() if k != field}}
+        inline = agent.execution == INLINE
+        return ResultStream(response, field, self._chunks(records, chunk_size, inline), records)
+
+    def post_tasks(
+        self, tasks: Iterable[Mapping[str, Any]], max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Run several ``{"name", "payload"}`` items concurrently.
+
+        At most ``max_concurrency`` items (default: the pool size) run at
+        once. Results are returned in the order the items were given.
+        """
+        limit = max(1, max_concurrency or self._max_workers)
+        futures: List[Future] = []
+        pending: Set[Future] = set()
+        for item in tasks:
+            if len(pending) >= limit:
+                _, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+            future = self._submit(self.post_task, item["name"], item.get("payload", {}))
+            futures.append(future)
+            pending.add(future)
+        return [future.result() for future in futures]
+
+    async def post_tasks_async(
+        self,
+        tasks: Iterable[Mapping[str, Any]],
+        max_concurrency: Optional[int] = None,
+        admit: Optional[Callable[[str], AsyncContextManager[Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Async counterpart of :meth:`post_tasks`."""
+        items = list(tasks)
+        results: List[Dict[str, Any]] = [{}] * len(items)
+        async for index, result in self.stream_tasks(items, max_concurrency, admit):
+            results[index] = result
+        return results
+
+    async def stream_tasks(
+        self,
+        tasks: Iterable[Mapping[str, Any]],
+        max_concurrency: Optional[int] = None,
+        admit: Optional[Callable[[str], AsyncContextManager[Any]]] = None,
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield ``(index, result)`` pairs as each item finishes.
+
+        Items still running when the consumer stops iterating are
+        cancelled. ``admit(name)``, if given, is entered around each
+        item once it is within ``max_concurrency``; if entering it
+        raises, the item fails with that error instead of running.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self._max_workers))
+
+        async def run(index: int, item: Mapping[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            async with semaphore:
+                if admit is None:
+                    return index, await self.post_task_async(item["name"], item.get("payload", {}))
+                try:
+                    async with admit(item["name"]):
+                        return index, await self.post_task_async(item["name"], item.get("payload", {}))
+                except Exception as exc:
+                    return index, {"ok": False, "data": {}, "error": str(exc)}
+
+        futures = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(tasks)]
+        try:
+            for next_done in asyncio.as_completed(futures):
+                yield await next_done
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Return dispatch metrics plus result cache and audit log counters."""
+        snapshot = self.metrics.snapshot()
+        snapshot["cache"] = self.cache.stats()
+        snapshot["audit"] = self.audit.stats()
+        return snapshot
+
+    def metrics_text(self) -> str:
+        """Return :meth:`metrics_snapshot` in Prometheus text format."""
+        return render_prometheus(self.metrics_snapshot())
+
+    def warm_up(self, names: Iterable[str] = ()) -> None:
+        """Load lazily registered agents now and start the process pool.
+
+        ``names`` lists agent or task names to load; ``"*"`` loads all.
+        """
+        names = set(names)
+        for spec in list(self._specs.values()):
+            if "*" in names or spec.name in names or names.intersection(spec.tasks):
+                self._load(spec)
+        if self._has_process_agents:
+            self._processes.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all audit entries recorded so far are on disk."""
+        return self.audit.flush(timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Release the worker pools and flush the audit log."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._processes.shutdown(wait=wait)
+        self.audit.close()
+        self.store.close()
+
+    def _join(self, key: Tuple[CacheKey, int]) -> Tuple[_Flight, bool]:
+        """Return the flight for ``key`` and whether the caller has to run it."""
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _land(
+        self,
+        key: Tuple[CacheKey, int],
+        flight: _Flight,
+        response: Optional[Dict[str, Any]] = None,
+        exc: Optional[BaseException] = None,
+        kept: bool = False,
+    ) -> None:
+        # Unlisted before the waiters wake, so later calls hit the cache
+        # (or start a new flight) instead of joining a finished one.
+        with self._flights_lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.shared = flight.waiters > 1
+        if exc is None:
+            # A leader that ``kept`` the response returns it as is, so
+            # its followers copy from a snapshot instead.
+            flight.future.set_result(_fresh(response) if kept and flight.shared else response)
+        elif isinstance(exc, asyncio.CancelledError):
+            flight.future.cancel()
+        else:
+            flight.future.set_exception(exc)
+
+    def _leave(self, key: Tuple[CacheKey, int], flight: _Flight) -> None:
+        with self._flights_lock:
+            flight.waiters -= 1
+            abandoned = flight.waiters == 0 and flight.task is not None
+            if abandoned and self._flights.get(key) is flight:
+                del self._flights[key]
+        if abandoned:
+            flight.loop.call_soon_threadsafe(flight.task.cancel)
+
+    async def _lead(self, agent: Agent, task: Task, key: Tuple[CacheKey, int], flight: _Flight) -> None:
+        try:
+            response = await self._dispatch_async(agent, task)
+            self._cache_update(agent, task.name, key[0], key[1], response)
+        except BaseException as exc:
+            self._land(key, flight, exc=exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+        self._land(key, flight, response)
+
+    def _coalesced(self, agent: Agent, name: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        self.metrics.add(COALESCED, name)
+        self.audit.record({"agent": agent.name, "ok": response["ok"], "coalesced": True})
+        return _fresh(response)
+
+    async def _route_async(self, name: str) -> Optional[Agent]:
+        if name in self._specs:
+            # Importing an agent can be slow; keep it off the event loop.
+            return await asyncio.wrap_future(self._get_executor().submit(self._route, name))
+        return self._route(name)
+
+    async def _dispatch_async(self, agent: Agent, task: Task, buffered: bool = True) -> Dict[str, Any]:
+        if agent.execution == PROCESS or _has_native_async(agent):
+            return await self._run_async(agent, task, buffered)
+        if agent.execution == INLINE:
+            return self._run_sync(agent, task, buffered)
+        return await asyncio.wrap_future(self._submit(self._run_awaited, agent, task, buffered))
+
+    async def _chunks(self, records: Any, chunk_size: int, inline: bool) -> AsyncIterator[List[Any]]:
+        if isinstance(records, AsyncIteratorABC):
+            chunk: List[Any] = []
+            async for record in records:
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        elif isinstance(records, IteratorABC):
+            try:
+                while True:
+                    if inline:
+                        chunk = _take(records, chunk_size)
+                    else:
+                        chunk = await asyncio.wrap_future(self._submit(_take, records, chunk_size))
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                _close(records)
+        else:
+            for start in range(0, len(records), chunk_size):
+                yield records[start:start + chunk_size]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="incluu-agent"
+            )
+        return self._executor
+
+    def _route(self, name: str) -> Optional[Agent]:
+        """Return the agent for task ``name``, loading it on first use."""
         agent_name = self._routes.get(name)
-        if not agent_name:
-            return {"ok": False, "data": {}, "error": f"No agent for task '{name}'"}
-        agent = self._agents[agent_name]
+        if agent_name is not None:
+            return self._agents[agent_name]
+        spec = self._specs.get(name)
+        return self._load(spec) if spec is not None else None
+
+    def _load(self, spec: AgentSpec) -> Agent:
+        for name in spec.requires:
+            required = next((s for s in list(self._specs.values()) if s.name == name), None)
+            if required is not None:
+                self._load(required)
+        with self._load_lock:
+            agent = self._agents.get(spec.name)
+            if agent is None:
+                start = time.perf_counter()
+                agent = spec.load()
+                self.register_agent(agent)
+                self.load_times[spec.name] = time.perf_counter() - start
+                logger.info("Loaded agent %s in %.1f ms", spec.name, self.load_times[spec.name] * 1e3)
+            for task_name in spec.tasks:
+                self._specs.pop(task_name, None)
+            return agent
+
+    def _load_failed(self, name: str, exc: Exception) -> Dict[str, Any]:
+        logger.error("Failed to load agent for task '%s'", name, exc_info=exc)
+        error = f"Failed to load agent for task '{name}': {exc}"
+        self.audit.record({"task": name, "ok": False, "error": error})
+        return {"ok": False, "data": {}, "error": error}
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Submit ``fn`` to the worker pool, counting it in the queue depth."""
+        self.metrics.add(QUEUE_DEPTH)
+        future = self._get_executor().submit(self._dequeued, fn, *args)
+        future.add_done_callback(self._unqueue_cancelled)
+        return future
+
+    def _dequeued(self, fn: Callable[..., Any], *args: Any) -> Any:
+        self.metrics.add(QUEUE_DEPTH, delta=-1)
+        return fn(*args)
+
+    def _unqueue_cancelled(self, future: Future) -> None:
+        if future.cancelled():
+            self.metrics.add(QUEUE_DEPTH, delta=-1)
+
+    def _run_sync(self, agent: Agent, task: Task, buffered: bool = True) -> Dict[str, Any]:
+        metrics = self.metrics
+        hooks = self.hooks
+        states = self._before(hooks, agent, task) if hooks else None
+        metrics.add(IN_FLIGHT, agent.name)
+        start = time.perf_counter()
+        response: Optional[Dict[str, Any]] = None
+        try:
+            if agent.execution == PROCESS:
+                result = self._processes.submit(agent, task).result()
+            else:
+                result = agent.handle(task)
+            response = self._respond(agent, result, buffered)
+        except Exception as exc:
+            response = self._failed(agent, exc)
+        finally:
+            metrics.add(IN_FLIGHT, agent.name, -1)
+            seconds = time.perf_counter() - start
+            if hooks:
+                self._after(hooks, states, agent, task, response or _cancelled(), seconds)
+        metrics.observe(task.name, agent.name, seconds, response["ok"])
+        return response
+
+    def _run_awaited(self, agent: Agent, task: Task, buffered: bool) -> Dict[str, Any]:
+        # A coroutine is waiting for this thread, so a full audit buffer
+        # must not hold it up.
+        with self.audit.nonblocking():
+            return self._run_sync(agent, task, buffered)
+
+    async def _run_async(self, agent: Agent, task: Task, buffered: bool = True) -> Dict[str, Any]:
+        metrics = self.metrics
+        hooks = self.hooks
+        states = self._before(hooks, agent, task) if hooks else None
+        metrics.add(IN_FLIGHT, agent.name)
+        start = time.perf_counter()
+        response: Optional[Dict[str, Any]] = None
         try:
-            result: Result = agent.handle(Task(name=name, payload=payload))
-            logging.info(json.dumps({"agent": agent_name, "ok": result.ok}))
-            return {
-                "ok": result.ok,
-                "data": result.data,
-                "error": result.error,
-            }
+            if agent.execution == PROCESS:
+                result = await asyncio.wrap_future(self._processes.submit(agent, task))
+            else:
+                result = await agent.handle_async(task)
+                if buffered:
+                    result.data = await _buffer_async(result.data)
+            response = self._respond(agent, result, buffered)
         except Exception as exc:
-            logging.exception("Agent execution error")
-            return {"ok": False, "data": {}, "error": str(exc)}
+            response = self._failed(agent, exc)
+        finally:
+            # Also reached when the awaiting request is cancelled; hooks
+            # still run so that profilers are switched off.
+            metrics.add(IN_FLIGHT, agent.name, -1)
+            seconds = time.perf_counter() - start
+            if hooks:
+                self._after(hooks, states, agent, task, response or _cancelled(), seconds)
+        metrics.observe(task.name, agent.name, seconds, response["ok"])
+        return response
+
+    def _before(self, hooks: List[DispatchHook], agent: Agent, task: Task) -> List[Any]:
+        states = []
+        for hook in hooks:
+            try:
+                states.append(hook.before(agent, task))
+            except Exception:
+                logger.exception("Dispatch hook %r failed before %s", hook, task.name)
+                states.append(None)
+        return states
+
+    def _after(
+        self,
+        hooks: List[DispatchHook],
+        states: List[Any],
+        agent: Agent,
+        task: Task,
+        response: Dict[str, Any],
+        seconds: float,
+    ) -> None:
+        # Last in, first out, so hooks nest around the agent.
+        for hook, state in zip(reversed(hooks), reversed(states)):
+            try:
+                hook.after(agent, task, response, state, seconds)
+            except Exception:
+                logger.exception("Dispatch hook %r failed after %s", hook, task.name)
+
+    def _respond(self, agent: Agent, result: Result, buffered: bool = True) -> Dict[str, Any]:
+        if buffered:
+            result.data = buffer_records(result.data)
+        self.audit.record({"agent": agent.name, "ok": result.ok})
+        return _to_response(result)
+
+    def _cache_lookup(
+        self, agent: Agent, name: str, payload: Dict[str, Any]
+    ) -> Tuple[Optional[CacheKey], int, Optional[Dict[str, Any]]]:
+        """Return ``(key, generation, cached_response)`` for a read-only task."""
+        if name not in self._cached_tasks:
+            return None, 0, None
+        start = time.perf_counter()
+        key = canonical_key(name, payload)
+        if key is None:
+            return None, 0, None
+        generation = self.cache.generation(agent.name)
+        cached = self.cache.get(key)
+        if cached is None:
+            return key, generation, None
+        self.metrics.observe(name, agent.name, time.perf_counter() - start, cached=True)
+        self.audit.record({"agent": agent.name, "ok": True, "cached": True})
+        return key, generation, _fresh(cached)
+
+    def _cache_update(
+        self,
+        agent: Agent,
+        name: str,
+        key: Optional[CacheKey],
+        generation: int,
+        response: Dict[str, Any],
+    ) -> None:
+        if name in self._mutating_tasks:
+            self.cache.invalidate(agent.name)
+        elif key is not None and response["ok"]:
+            # Cached entries and callers never share mutable objects.
+            self.cache.put(key, _fresh(response), tag=agent.name, ttl=agent.cache_ttl, generation=generation)
+
+    def _failed(self, agent: Agent, exc: Exception) -> Dict[str, Any]:
+        if isinstance(exc, BrokenProcessPool):
+            error = f"Agent worker process crashed: {exc}"
+            logger.error("Agent worker process crashed (agent=%s)", agent.name)
+        else:
+            error = str(exc)
+            logger.error("Agent execution error", exc_info=exc)
+        self.audit.record({"agent": agent.name, "ok": False, "error": error})
+        return {"ok": False, "data": {}, "error": error}
+
+
+def buffer_records(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``data`` with generator fields collected into lists."""
+    if not _is_lazy(data):
+        return data
+    buffered = {}
+    for key, value in data.items():
+        if isinstance(value, AsyncIteratorABC):
+            raise TypeError(f"Field '{key}' is an async iterator; only handle_async may return one")
+        buffered[key] = list(value) if isinstance(value, IteratorABC) else value
+    return buffered
+
+
+async def _buffer_async(data: Dict[str, Any]) -> Dict[str, Any]:
+    if not _is_lazy(data):
+        return data
+    buffered = {}
+    for key, value in data.items():
+        if isinstance(value, AsyncIteratorABC):
+            value = [record async for record in value]
+        buffered[key] = value
+    return buffer_records(buffered)
+
+
+def _is_lazy(data: Dict[str, Any]) -> bool:
+    return any(isinstance(value, (IteratorABC, AsyncIteratorABC)) for value in data.values())
+
+
+def _stream_field(data: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+    for key, value in data.items():
+        if isinstance(value, (IteratorABC, AsyncIteratorABC)):
+            return key, value
+    for key, value in data.items():
+        if isinstance(value, list):
+            return key, value
+    return None, None
+
+
+def _take(records: IteratorABC, n: int) -> List[Any]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= n:
+            break
+    return chunk
+
+
+def _close(records: IteratorABC) -> None:
+    close = getattr(records, "close", None)
+    if close is not None:
+        try:
+            close()
+        except ValueError:
+            pass  # still running in a worker thread; it is dropped when done
+
+
+async def _no_chunks() -> AsyncIterator[List[Any]]:
+    return
+    yield
+
+
+def _to_response(result: Result) -> Dict[str, Any]:
+    return {"ok": result.ok, "data": result.data, "error": result.error}
+
+
+_IMMUTABLE = (str, bytes, int, float, complex, bool, type(None))
+
+
+def _fresh(value: Any) -> Any:
+    """Copy ``value`` so that no mutable part of it is shared.
+
+    Dicts and lists (the usual shape of ``data``) are rebuilt directly,
+    which is much cheaper than :func:`copy.deepcopy`; anything else
+    mutable falls back to it.
+    """
+    cls = type(value)
+    if cls is dict:
+        return {key: _fresh(item) for key, item in value.items()}
+    if cls is list:
+        return [_fresh(item) for item in value]
+    if cls in _IMMUTABLE:
+        return value
+    if cls is tuple:
+        return tuple(_fresh(item) for item in value)
+    return copy.deepcopy(value)
+
+
+def _cancelled() -> Dict[str, Any]:
+    return {"ok": False, "data": {}, "error": "cancelled"}
+
+
+def _no_agent(name: str) -> Dict[str, Any]:
+    return {"ok": False, "data": {}, "error": f"No agent for task '{name}'"}
 
 
 # Synthetic data helpers
+#
+# Leads, jobs and tickets are generated column-wise by
+# :mod:`incluu_agents.datagen`; these wrappers return row dicts as before.
+# datagen is imported on first use because it pulls in NumPy.
 
-_FIRST_NAMES = ["Ava", "Kai", "Maya", "Liam", "Zoe", "Noah", "Ivy", "Leo", "Mia", "Eli"]
-_LAST_NAMES = ["Stone", "Rivera", "Chen", "Walker", "Singh", "Lopez", "Kim", "Ali", "King", "Patel"]
-_JOB_TITLES = ["Software Engineer", "Product Manager", "Data Analyst", "Sales Manager"]
-_DOCTORS = ["Dr. Kim - Family", "Dr. Chen - Cardiology", "Dr. Patel - Dermatology"]
-_LAWYERS = ["Atty. Rivera - Corporate", "Atty. Singh - Immigration", "Atty. Lopez - Real Estate"]
+_DOCTORS = [
+    ("Dr. Kim - Family", "Family Medicine"),
+    ("Dr. Chen - Cardiology", "Cardiologist"),
+    ("Dr. Patel - Dermatology", "Dermatologist"),
+]
+_LAWYERS = [
+    ("Atty. Rivera - Corporate", "Corporate Law"),
+    ("Atty. Singh - Immigration", "Immigration Law"),
+    ("Atty. Lopez - Real Estate", "Real Estate Law"),
+    ("Atty. Walker - Family", "Family Law"),
+]
 
 
-def fake_leads(n: int = 10) -> List[Dict[str, Any]]:
+def fake_leads(n: int = 10, seed: Optional[int] = None) -> List[Dict[str, Any]]:
     """Generate synthetic sales leads."""
-    leads = []
-    for i in range(n):
-        name = f"{random.choice(_FIRST_NAMES)} {random.choice(_LAST_NAMES)}"
-        leads.append({
-            "id": i + 1,
-            "name": name,
-            "email": f"{name.lower().replace(' ', '.')}@example.com",
-            "score": random.randint(60, 99),
-            "status": "new",
-        })
-    return leads
-
-
-def fake_jobs(n: int = 5) -> List[Dict[str, Any]]:
+    from . import datagen
+
+    return datagen.leads_table(n, seed).to_dicts()
+
+
+def fake_jobs(n: int = 5, seed: Optional[int] = None) -> List[Dict[str, Any]]:
     """Generate synthetic job listings."""
-    jobs = []
-    for i in range(n):
-        jobs.append({
-            "id": i + 1,
-            "title": random.choice(_JOB_TITLES),
-            "company": f"Company{i + 1}",
-            "location": random.choice(["Remote", "New York", "San Francisco", "Austin"]),
-        })
-    return jobs
+    from . import datagen
+
+    return datagen.jobs_table(n, seed).to_dicts()
 
 
 def fake_doctors() -> List[Dict[str, Any]]:
     """Return a list of synthetic doctors."""
     return [
-        {"id": i + 1, "name": doc, "location": "City Clinic"}
-        for i, doc in enumerate(_DOCTORS)
+        {"id": i + 1, "name": doc, "speciality": speciality, "location": "City Clinic"}
+        for i, (doc, speciality) in enumerate(_DOCTORS)
     ]
 
 
 def fake_lawyers() -> List[Dict[str, Any]]:
     """Return a list of synthetic lawyers."""
     return [
-        {"id": i + 1, "name": lawyer, "location": "Downtown Office"}
-        for i, lawyer in enumerate(_LAWYERS)
+        {"id": i + 1, "name": lawyer, "speciality": speciality, "location": "Downtown Office"}
+        for i, (lawyer, speciality) in enumerate(_LAWYERS)
     ]
 
 
-def fake_tickets(n: int = 5) -> List[Dict[str, Any]]:
+def fake_tickets(n: int = 5, seed: Optional[int] = None) -> List[Dict[str, Any]]:
     """Generate synthetic support tickets."""
-    issues = ["Cannot login", "Payment failed", "Bug in latest update", "Feature request", "Account locked"]
-    return [{"id": i + 1, "issue": random.choice(issues)} for i in range(n)]
\ No newline at end of file
+    from . import datagen
+
+    return datagen.tickets_table(n, seed).to_dicts()
@@ -0,0 +1,159 @@
+"""Sampling profilers that plug into the orchestrator as dispatch hooks.
+
+Profiling every task would slow all of them down, so the hooks here
+only profile a task when it is sampled: every ``every``-th call of each
+task name (0 turns sampling off), or any call made with ``debug=True``
+(``X-Debug-Profile: 1`` on ``POST /tasks``). Unsampled calls cost a
+counter increment; with no hooks registered they cost nothing.
+
+* :class:`CProfileHook` runs ``cProfile`` around the agent and merges
+  every sample of a task into ``<directory>/cprofile/<task>-<pid>.prof``,
+  readable with ``python -m pstats`` or snakeviz.
+* :class:`TracemallocHook` traces allocations while the agent runs and
+  appends the lines that grew the most to
+  ``<directory>/tracemalloc/<task>-<pid>.txt``.
+
+Hooks run in the API process: for ``process`` agents they see only the
+wait for the worker, and for async agents the profile includes whatever
+else the event loop ran in the meantime. Only one sample of each kind
+runs per thread (cProfile) or per process (tracemalloc) at a time;
+calls sampled while one is running are skipped.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import itertools
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from .orchestrator import Agent, DispatchHook, Task
+
+logger = logging.getLogger(__name__)
+
+
+class _SamplingHook(DispatchHook):
+    """Decide which calls to profile and where their output goes."""
+
+    kind = ""
+
+    def __init__(self, directory: str, every: int = 0) -> None:
+        self.directory = os.path.join(directory, self.kind)
+        self.every = every
+        self._counters: Dict[str, Iterator[int]] = {}
+        self._lock = threading.Lock()
+
+    def sampled(self, task: Task) -> bool:
+        if task.debug:
+            return True
+        if self.every <= 0:
+            return False
+        counter = self._counters.get(task.name)
+        if counter is None:
+            counter = self._counters.setdefault(task.name, itertools.count(1))
+        return next(counter) % self.every == 0
+
+    def path(self, task: Task, suffix: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", task.name)
+        return os.path.join(self.directory, f"{name}-{os.getpid()}{suffix}")
+
+
+class CProfileHook(_SamplingHook):
+    """Profile sampled calls with ``cProfile``, merging samples per task."""
+
+    kind = "cprofile"
+
+    def __init__(self, directory: str, every: int = 0) -> None:
+        super().__init__(directory, every)
+        self._active = threading.local()
+
+    def before(self, agent: Agent, task: Task) -> Any:
+        # A thread can only run one profiler; nested or interleaved
+        # samples on the same thread are skipped.
+        if getattr(self._active, "profile", None) is not None or not self.sampled(task):
+            return None
+        profile = cProfile.Profile()
+        self._active.profile = profile
+        profile.enable()
+        return profile
+
+    def after(self, agent: Agent, task: Task, response: Dict[str, Any], state: Any, seconds: float) -> None:
+        if state is None:
+            return
+        state.disable()
+        self._active.profile = None
+        stats = pstats.Stats(state)
+        with self._lock:
+            path = self.path(task, ".prof")
+            if os.path.exists(path):
+                stats.add(path)
+            stats.dump_stats(path)
+
+
+class TracemallocHook(_SamplingHook):
+    """Record where sampled calls allocate memory with ``tracemalloc``."""
+
+    kind = "tracemalloc"
+
+    def __init__(self, directory: str, every: int = 0, top: int = 25, frames: int = 1) -> None:
+        super().__init__(directory, every)
+        self.top = top
+        self.frames = frames
+        self._tracing = threading.Lock()
+
+    def before(self, agent: Agent, task: Task) -> Any:
+        # Tracing is process wide, so one sample at a time.
+        if not self.sampled(task) or not self._tracing.acquire(blocking=False):
+            return None
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        return started, tracemalloc.take_snapshot()
+
+    def after(self, agent: Agent, task: Task, response: Dict[str, Any], state: Any, seconds: float) -> None:
+        if state is None:
+            return
+        started, before = state
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+        finally:
+            self._tracing.release()
+        diff = snapshot.compare_to(before, "lineno")
+        lines = [
+            f"# {time.strftime('%Y-%m-%dT%H:%M:%S')} task={task.name} pid={os.getpid()} "
+            f"seconds={seconds:.6f} ok={response.get('ok')} peak={peak} current={current}",
+            *(str(stat) for stat in diff[: self.top]),
+            "",
+        ]
+        with self._lock:
+            with open(self.path(task, ".txt"), "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+
+
+def hooks_from_env() -> List[DispatchHook]:
+    """Build profiling hooks from ``AGENT_PROFILE_*`` environment variables.
+
+    ``AGENT_PROFILE_DIR`` turns profiling on and says where output goes;
+    ``AGENT_PROFILE_EVERY`` samples every Nth call of each task (default
+    0: only calls that ask for it) and ``AGENT_PROFILE_MEMORY=1`` adds
+    allocation tracing. Returns no hooks when profiling is off.
+    """
+    directory: Optional[str] = os.environ.get("AGENT_PROFILE_DIR")
+    if not directory:
+        return []
+    every = int(os.environ.get("AGENT_PROFILE_EVERY", "0"))
+    hooks: List[DispatchHook] = [CProfileHook(directory, every)]
+    if os.environ.get("AGENT_PROFILE_MEMORY", "").lower() in ("1", "true", "yes"):
+        hooks.append(TracemallocHook(directory, every))
+    return hooks
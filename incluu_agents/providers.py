@@ -0,0 +1,245 @@
+"""Search index for provider directories (doctors, lawyers, ...).
+
+A linear scan of the directory per query does not scale to hundreds of
+thousands of providers. :class:`ProviderIndex` is built incrementally
+as providers are added and keeps:
+
+* inverted indexes from each word of ``speciality`` and ``location`` to
+  the providers that have it;
+* a trie of the words in provider names, with an inverted index from
+  each word, for prefix search.
+
+Every provider gets an increasing sequence number when it is added, and
+posting lists are kept in that order. A query walks the shortest
+matching posting list from the cursor onwards and checks the other
+filters against each candidate, so it stops as soon as a page is full
+instead of materialising every match. Cursors are opaque strings;
+passing the ``next_cursor`` of one page returns the next one, and pages
+stay stable while providers are added.
+
+Matching is case-insensitive and word-based: ``speciality="family"``
+matches ``"Family Law"``, and ``name="dr ki"`` matches ``"Dr. Kim"``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+FIELDS = ("speciality", "location")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 500
+
+_WORD = re.compile(r"\w+")
+_END = ""  # trie key marking the end of a word
+
+
+def _words(text: Any) -> List[str]:
+    return _WORD.findall(str(text).casefold()) if text else []
+
+
+@lru_cache(maxsize=65_536)
+def _word_set(text: str) -> FrozenSet[str]:
+    # Specialities and locations repeat across providers; tokenise each once.
+    return frozenset(_words(text))
+
+
+class ProviderIndex:
+    """Thread-safe, incrementally built index over provider dicts.
+
+    Providers need an ``id``; ``name``, ``speciality`` and ``location``
+    are indexed when present. Searches return copies.
+    """
+
+    def __init__(self, providers: Iterable[Dict[str, Any]] = ()) -> None:
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._seq_by_id: Dict[Hashable, int] = {}
+        # Every sequence number handed out, ascending.
+        self._seqs: List[int] = []
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+        self._names: Dict[str, List[int]] = {}
+        self._trie: Dict[str, Any] = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        for provider in providers:
+            self.add(provider)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, provider: Dict[str, Any]) -> None:
+        """Index ``provider``, replacing any provider with the same ``id``."""
+        with self._lock:
+            self._unlink(provider["id"])
+            seq = self._next_seq
+            self._next_seq += 1
+            record = dict(provider)
+            self._records[seq] = record
+            self._seq_by_id[record["id"]] = seq
+            self._seqs.append(seq)
+            for field in FIELDS:
+                for word in set(_words(record.get(field))):
+                    self._postings.setdefault((field, word), []).append(seq)
+            for word in set(_words(record.get("name"))):
+                postings = self._names.get(word)
+                if postings is None:
+                    postings = self._names[word] = []
+                    self._trie_insert(word)
+                postings.append(seq)
+            self._maybe_compact()
+
+    def remove(self, provider_id: Hashable) -> None:
+        """Drop the provider with ``provider_id``, if indexed."""
+        with self._lock:
+            self._unlink(provider_id)
+            self._maybe_compact()
+
+    def search(
+        self,
+        speciality: Optional[str] = None,
+        location: Optional[str] = None,
+        name: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to ``limit`` matching providers and the cursor of the next page.
+
+        The cursor is None on the last page.
+        """
+        after = _decode_cursor(cursor)
+        wanted = {field: _words(value) for field, value in zip(FIELDS, (speciality, location))}
+        prefixes = _words(name)
+        postings = []
+        for field, words in wanted.items():
+            for word in words:
+                found = self._postings.get((field, word))
+                if found is None:
+                    return [], None
+                postings.append(found)
+        # Walk whichever filter matches the fewest providers.
+        shortest = min(postings, key=len) if postings else self._seqs
+        name_words: List[str] = []
+        if prefixes:
+            name_words = min((self._prefixed(prefix) for prefix in prefixes), key=self._count)
+            if not name_words:
+                return [], None
+        if name_words and self._count(name_words) < len(shortest):
+            candidates = self._name_candidates(name_words, after)
+        else:
+            candidates = _from(shortest, after)
+
+        results: List[Dict[str, Any]] = []
+        last = after
+        for seq in candidates:
+            record = self._records.get(seq)
+            if record is None or not _matches(record, wanted, prefixes):
+                continue
+            if len(results) == limit:
+                return results, _encode_cursor(last)
+            results.append(dict(record))
+            last = seq
+        return results, None
+
+    def query(self, payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Run :meth:`search` with the filters in a task payload.
+
+        Raises ValueError for malformed filters, limits or cursors.
+        """
+        filters = {}
+        for key in (*FIELDS, "name"):
+            value = payload.get(key)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"Field '{key}' must be a string")
+            filters[key] = value
+        limit = payload.get("limit", DEFAULT_LIMIT)
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"Field 'limit' must be an integer between 1 and {MAX_LIMIT}")
+        return self.search(limit=limit, cursor=payload.get("cursor"), **filters)
+
+    # Internals
+
+    def _unlink(self, provider_id: Hashable) -> None:
+        # Posting list entries of the old record go stale and are skipped
+        # by searches until the next compaction.
+        seq = self._seq_by_id.pop(provider_id, None)
+        if seq is not None:
+            del self._records[seq]
+
+    def _maybe_compact(self) -> None:
+        if len(self._seqs) > 2 * len(self._records) + 1024:
+            # New lists, so searches already walking the old ones are unaffected.
+            self._seqs = [seq for seq in self._seqs if seq in self._records]
+            for index in (self._postings, self._names):
+                for key, postings in list(index.items()):
+                    index[key] = [seq for seq in postings if seq in self._records]
+
+    def _trie_insert(self, word: str) -> None:
+        node = self._trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_END] = word
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        with self._lock:
+            node = self._trie
+            for char in prefix:
+                node = node.get(char)
+                if node is None:
+                    return []
+            words = []
+            stack = [node]
+            while stack:
+                for key, child in stack.pop().items():
+                    if key == _END:
+                        words.append(child)
+                    else:
+                        stack.append(child)
+            return words
+
+    def _count(self, name_words: List[str]) -> int:
+        return sum(len(self._names[word]) for word in name_words)
+
+    def _name_candidates(self, name_words: List[str], after: int) -> Iterator[int]:
+        streams = [_from(self._names[word], after) for word in name_words]
+        previous = None
+        # A name can have several words with the prefix; yield it once.
+        for seq in heapq.merge(*streams):
+            if seq != previous:
+                yield seq
+                previous = seq
+
+
+def _from(postings: Sequence[int], after: int) -> Iterator[int]:
+    """Iterate ``postings`` from the first entry after ``after``."""
+    start = bisect_right(postings, after)
+    return (postings[i] for i in range(start, len(postings)))
+
+
+def _matches(record: Dict[str, Any], wanted: Dict[str, List[str]], prefixes: List[str]) -> bool:
+    for field, words in wanted.items():
+        if words and not _word_set(str(record.get(field) or "")).issuperset(words):
+            return False
+    if prefixes:
+        names = _words(record.get("name"))
+        return all(any(word.startswith(prefix) for word in names) for prefix in prefixes)
+    return True
+
+
+def _encode_cursor(seq: int) -> str:
+    return format(seq, "x")
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return -1
+    try:
+        seq = int(cursor, 16)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if seq < 0:
+        raise ValueError("Invalid cursor")
+    return seq
@@ -0,0 +1,294 @@
+"""Columnar record store.
+
+A list of dicts costs hundreds of bytes per record before any data is
+stored: the dict itself, a string object per text value and an int
+object per number. :class:`RecordStore` keeps each field in one NumPy
+array instead:
+
+* numeric fields as arrays of their own dtype, widened if a larger
+  value is written;
+* categorical fields (``industry``, ``category``, ``status``, ...) as
+  small-int codes into a table of interned labels; code ``0`` is
+  ``None``;
+* text fields as fixed-width UTF-8 bytes, widened for longer values.
+
+Rows are only turned into dicts when asked for. :meth:`RecordStore.view`
+returns a write-through mapping for code that updates records in place
+(such as :class:`~incluu_agents.leads.LeadIndex`). Filters and group-by
+counts run over the arrays without building rows.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional
+
+import numpy as np
+
+from .datagen import CHUNK_SIZE, Categorical, ColumnTable, Formatted, _code_dtype
+
+CATEGORY = "category"
+TEXT = "text"
+
+
+class _Column:
+    __slots__ = ("kind", "data", "labels", "codes")
+
+    def __init__(self, kind: str, data: np.ndarray, labels: Optional[List[Any]] = None) -> None:
+        self.kind = kind
+        self.data = data
+        # Categorical columns only: label by code and code by label.
+        self.labels = labels
+        self.codes = {label: code for code, label in enumerate(labels)} if labels is not None else None
+
+    def encode(self, value: Any) -> Any:
+        if self.kind == CATEGORY:
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.labels)
+                self.labels.append(value)
+                if code > np.iinfo(self.data.dtype).max:
+                    self.data = self.data.astype(_code_dtype(code))
+            return code
+        if self.kind == TEXT:
+            if not isinstance(value, str):
+                raise TypeError(f"Expected a string, got {value!r}")
+            raw = value.encode("utf-8")
+            if len(raw) > self.data.dtype.itemsize:
+                self.data = self.data.astype(f"S{max(len(raw), 2 * self.data.dtype.itemsize)}")
+            return raw
+        scalar = np.min_scalar_type(value) if isinstance(value, int) else np.asarray(value).dtype
+        if scalar.kind not in "biuf":
+            raise TypeError(f"Expected a number, got {value!r}")
+        dtype = np.promote_types(self.data.dtype, scalar)
+        if dtype != self.data.dtype:
+            self.data = self.data.astype(dtype)
+        return value
+
+    def lookup(self, value: Any) -> Any:
+        """Return the stored form of ``value`` without adding it, or None if absent."""
+        if self.kind == CATEGORY:
+            return self.codes.get(value)
+        if self.kind == TEXT:
+            return value.encode("utf-8") if isinstance(value, str) else None
+        return value
+
+    def decode(self, data: np.ndarray) -> List[Any]:
+        """Turn stored values (a slice or selection of ``data``) into Python values."""
+        if self.kind == CATEGORY:
+            labels = self.labels
+            return [labels[code] for code in data.tolist()]
+        if self.kind == TEXT:
+            return [raw.decode("utf-8") for raw in data.tolist()]
+        return data.tolist()
+
+    def nbytes(self, rows: int) -> int:
+        size = self.data.itemsize * rows
+        if self.labels is not None:
+            size += sys.getsizeof(self.labels) + sum(sys.getsizeof(label) for label in self.labels[1:])
+        return size
+
+
+class RecordStore:
+    """Growable table of records with a fixed set of fields.
+
+    ``schema`` maps each field to ``"category"``, ``"text"`` or a NumPy
+    dtype such as ``"int64"``. Writes are serialised by a lock; reads
+    are not, so readers may see a row while it is being updated.
+    """
+
+    def __init__(self, schema: Mapping[str, str], capacity: int = 16) -> None:
+        self._columns: Dict[str, _Column] = {}
+        for name, kind in schema.items():
+            if kind == CATEGORY:
+                self._columns[name] = _Column(CATEGORY, np.zeros(capacity, np.int8), [None])
+            elif kind == TEXT:
+                self._columns[name] = _Column(TEXT, np.zeros(capacity, "S8"))
+            else:
+                self._columns[name] = _Column(kind, np.zeros(capacity, np.dtype(kind)))
+        self._length = 0
+        self._capacity = capacity
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_table(cls, table: ColumnTable) -> "RecordStore":
+        """Build a store from a :class:`~incluu_agents.datagen.ColumnTable` without making rows."""
+        store = cls({})
+        n = len(table)
+        for name, column in table.columns.items():
+            if isinstance(column, Categorical):
+                labels = [None, *column.categories.tolist()]
+                codes = column.codes.astype(_code_dtype(len(labels))) + 1
+                store._columns[name] = _Column(CATEGORY, codes, labels)
+            elif isinstance(column, Formatted) or column.dtype.kind in "UO":
+                values = column.values(0, n) if isinstance(column, Formatted) else column.tolist()
+                raw = [str(value).encode("utf-8") for value in values]
+                store._columns[name] = _Column(TEXT, np.array(raw, dtype=f"S{max(map(len, raw), default=1)}"))
+            elif column.dtype.kind == "S":
+                store._columns[name] = _Column(TEXT, column.copy())
+            else:
+                store._columns[name] = _Column(column.dtype.str, column.copy())
+        store._length = store._capacity = n
+        return store
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_rows()
+
+    def append(self, record: Mapping[str, Any]) -> int:
+        """Add a record and return its row number; missing fields are zero/None."""
+        with self._lock:
+            unknown = set(record) - set(self._columns)
+            if unknown:
+                raise KeyError(f"Unknown fields: {sorted(unknown)}")
+            index = self._length
+            if index == self._capacity:
+                self._grow(max(16, 2 * index))
+            for name, value in record.items():
+                column = self._columns[name]
+                stored = column.encode(value)
+                column.data[index] = stored
+            self._length += 1
+            return index
+
+    def extend(self, records: Iterable[Mapping[str, Any]]) -> None:
+        for record in records:
+            self.append(record)
+
+    def get(self, index: int, field: str) -> Any:
+        self._check(index)
+        return self._columns[field].decode(self._columns[field].data[index:index + 1])[0]
+
+    def set(self, index: int, field: str, value: Any) -> None:
+        self._check(index)
+        with self._lock:
+            column = self._columns[field]
+            stored = column.encode(value)
+            column.data[index] = stored
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Return row ``index`` as a new dict."""
+        self._check(index)
+        return {name: column.decode(column.data[index:index + 1])[0] for name, column in self._columns.items()}
+
+    def view(self, index: int) -> "RowView":
+        """Return a mapping that reads and writes row ``index`` in place."""
+        self._check(index)
+        return RowView(self, index)
+
+    def views(self) -> Iterator["RowView"]:
+        return (RowView(self, index) for index in range(self._length))
+
+    def iter_rows(self, indices: Optional[np.ndarray] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield rows (or just those at ``indices``) as dicts, a chunk at a time."""
+        names = list(self._columns)
+        total = self._length if indices is None else len(indices)
+        for start in range(0, total, chunk_size):
+            if indices is None:
+                rows = slice(start, min(start + chunk_size, total))
+            else:
+                rows = indices[start:start + chunk_size]
+            chunk = [self._columns[name].decode(self._columns[name].data[rows]) for name in names]
+            for values in zip(*chunk):
+                yield dict(zip(names, values))
+
+    def column(self, field: str) -> List[Any]:
+        """Return every value of ``field`` as a list."""
+        column = self._columns[field]
+        return column.decode(column.data[:self._length])
+
+    def mask(self, **equals: Any) -> np.ndarray:
+        """Boolean array of the rows whose fields equal the given values."""
+        selected = np.ones(self._length, dtype=bool)
+        for name, value in equals.items():
+            column = self._columns[name]
+            stored = column.lookup(value)
+            if stored is None:
+                return np.zeros(self._length, dtype=bool)
+            selected &= column.data[:self._length] == stored
+        return selected
+
+    def where(self, **equals: Any) -> np.ndarray:
+        """Row numbers of the records matching ``equals``, in row order."""
+        return np.flatnonzero(self.mask(**equals))
+
+    def select(self, **equals: Any) -> List[Dict[str, Any]]:
+        """Rows matching ``equals`` as dicts."""
+        return list(self.iter_rows(self.where(**equals)))
+
+    def count_by(self, field: str, **equals: Any) -> Dict[Any, int]:
+        """Count matching rows per value of ``field``."""
+        column = self._columns[field]
+        data = column.data[:self._length]
+        if equals:
+            data = data[self.mask(**equals)]
+        if column.kind == CATEGORY:
+            counts = np.bincount(data, minlength=len(column.labels))
+            return {column.labels[code]: count for code, count in enumerate(counts.tolist()) if count}
+        values, counts = np.unique(data, return_counts=True)
+        keys = [v.decode("utf-8") for v in values.tolist()] if column.kind == TEXT else values.tolist()
+        return dict(zip(keys, counts.tolist()))
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Bytes used by each field's values (and labels), and in total."""
+        columns = {name: column.nbytes(self._length) for name, column in self._columns.items()}
+        total = sum(columns.values())
+        return {
+            "rows": self._length,
+            "bytes": total,
+            "bytes_per_row": total / self._length if self._length else 0.0,
+            "columns": columns,
+        }
+
+    def _check(self, index: int) -> None:
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+
+    def _grow(self, capacity: int) -> None:
+        for column in self._columns.values():
+            data = np.zeros(capacity, dtype=column.data.dtype)
+            data[:self._length] = column.data[:self._length]
+            column.data = data
+        self._capacity = capacity
+
+
+class RowView(MutableMapping):
+    """Live view of one row of a :class:`RecordStore`."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: RecordStore, index: int) -> None:
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._store._columns:
+            raise KeyError(key)
+        return self._store.get(self._index, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._store._columns:
+            raise KeyError(key)
+        self._store.set(self._index, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Record fields cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store._columns)
+
+    def __len__(self) -> int:
+        return len(self._store._columns)
+
+    def copy(self) -> Dict[str, Any]:
+        return self._store.row(self._index)
+
+    def __repr__(self) -> str:
+        return f"RowView({self.copy()!r})"
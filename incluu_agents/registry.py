@@ -0,0 +1,195 @@
+"""Lazy agent registry.
+
+Importing every agent up front makes cold starts pay for dependencies
+(NumPy, models, ...) that a worker may never use. Instead, agents are
+described by an :class:`AgentSpec` – the agent name, the
+``module:Class`` import path and the task names it serves – and the
+orchestrator imports and constructs an agent only when one of its tasks
+is first posted (see :meth:`Orchestrator.register_spec
+<incluu_agents.orchestrator.Orchestrator.register_spec>`).
+
+Specs come from three places, merged by :func:`discover`:
+
+* :data:`BUILTIN_AGENTS`, the manifest of agents shipped in this package;
+* the ``incluu_agents.agents`` entry point group, where each entry point
+  loads an :class:`AgentSpec` (or a list of them) from a light manifest
+  module of the installed distribution;
+* a JSON manifest named by ``$AGENT_MANIFEST``: a list of
+  ``{"name", "path", "tasks"}`` objects, with an optional
+  ``"requires"`` list.
+
+Later sources override earlier ones by agent name.
+
+``python -m incluu_agents.registry`` prints an import-time report:
+how long each agent takes to import and construct in a fresh
+interpreter, which is what a cold container or test run pays for it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .orchestrator import Agent
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "incluu_agents.agents"
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Where to find an agent and which tasks it serves.
+
+    ``requires`` names agents to load before this one, e.g. those whose
+    KPI events it reports on.
+    """
+
+    name: str
+    path: str
+    tasks: Tuple[str, ...]
+    requires: Tuple[str, ...] = ()
+
+    def load(self) -> "Agent":
+        """Import the agent class and construct it with no arguments."""
+        return load_class(self.path)()
+
+
+BUILTIN_AGENTS: Tuple[AgentSpec, ...] = (
+    AgentSpec("sales_agent", "incluu_agents.agents.sales:SalesAgent", ("sales_outreach", "lead_generation")),
+    AgentSpec("support_agent", "incluu_agents.agents.support:SupportAgent", ("support_summary", "customer_support")),
+    # Sales and support publish their seeded leads and tickets as KPI
+    # events when they load, so reports need them loaded first.
+    AgentSpec(
+        "analytics_agent",
+        "incluu_agents.agents.analytics:AnalyticsAgent",
+        ("generate_report",),
+        requires=("sales_agent", "support_agent"),
+    ),
+    AgentSpec("jobs_agent", "incluu_agents.agents.jobs:JobsAgent", ("job_search",)),
+    AgentSpec("health_agent", "incluu_agents.agents.health:HealthAgent", ("health_search", "health_appointment")),
+    AgentSpec("legal_agent", "incluu_agents.agents.legal:LegalAgent", ("legal_search", "legal_appointment")),
+)
+
+
+def load_class(path: str) -> Any:
+    """Import ``module:qualname`` and return the named object."""
+    module, _, qualname = path.partition(":")
+    obj: Any = import_module(module)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def discover(manifest: Optional[str] = None, entry_points: bool = True) -> List[AgentSpec]:
+    """Return the built-in, entry point and manifest specs, merged by name.
+
+    ``manifest`` defaults to ``$AGENT_MANIFEST``.
+    """
+    specs: Dict[str, AgentSpec] = {spec.name: spec for spec in BUILTIN_AGENTS}
+    if entry_points:
+        for spec in _entry_point_specs():
+            specs[spec.name] = spec
+    manifest = manifest or os.environ.get("AGENT_MANIFEST")
+    if manifest:
+        for spec in load_manifest(manifest):
+            specs[spec.name] = spec
+    return list(specs.values())
+
+
+def load_manifest(path: str) -> List[AgentSpec]:
+    """Read specs from a JSON manifest file."""
+    with open(path, encoding="utf-8") as fh:
+        entries = json.load(fh)
+    return [
+        AgentSpec(entry["name"], entry["path"], tuple(entry["tasks"]), tuple(entry.get("requires", ())))
+        for entry in entries
+    ]
+
+
+def _entry_point_specs() -> Iterable[AgentSpec]:
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            loaded = entry_point.load()
+        except Exception:
+            logger.exception("Failed to load agent entry point '%s'", entry_point.name)
+            continue
+        yield from (loaded if isinstance(loaded, (list, tuple)) else [loaded])
+
+
+# Import-time report
+
+_MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+from incluu_agents.registry import load_class
+base = time.perf_counter()
+cls = load_class(sys.argv[1])
+imported = time.perf_counter()
+cls()
+constructed = time.perf_counter()
+print(json.dumps({"package_s": base - start, "import_s": imported - base, "construct_s": constructed - imported}))
+"""
+
+
+def import_report(specs: Optional[Iterable[AgentSpec]] = None) -> List[Dict[str, Any]]:
+    """Measure each agent's cold import and construction time.
+
+    Every agent is measured in a fresh interpreter so modules shared
+    with other agents are counted for each of them, as they would be
+    on a cold start that only uses that agent.
+    """
+    import subprocess
+    import time
+
+    rows = []
+    for spec in specs if specs is not None else discover():
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", _MEASURE, spec.path], capture_output=True, text=True
+        )
+        row: Dict[str, Any] = {"name": spec.name, "path": spec.path}
+        if proc.returncode == 0:
+            row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+        else:
+            row["error"] = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+        row["process_s"] = time.perf_counter() - start
+        rows.append(row)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m incluu_agents.registry", description="Report agent import times."
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    rows = import_report()
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{'agent':<20} {'package':>10} {'import':>10} {'construct':>10} {'process':>10}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['name']:<20} error: {row['error']}")
+            continue
+        print(
+            f"{row['name']:<20} {row['package_s'] * 1e3:>7.1f} ms {row['import_s'] * 1e3:>7.1f} ms"
+            f" {row['construct_s'] * 1e3:>7.1f} ms"
+            f" {row['process_s'] * 1e3:>7.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""JSON encoding for responses.
+
+Task responses are plain ``{"ok", "data", "error"}`` dicts of JSON
+types, so the service encodes them directly instead of walking them
+through FastAPI's generic ``jsonable_encoder`` first. :func:`dumps` uses
+`orjson <https://github.com/ijl/orjson>`_ when it is installed and the
+standard library otherwise; both produce the same JSON for the values
+agents return, including NumPy scalars and arrays, datetimes and
+non-string dict keys.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        # NumPy scalars and arrays.
+        return obj.tolist()
+    return str(obj)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode ``obj`` with the standard library, as :func:`dumps` does without orjson."""
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        """Encode ``obj`` as compact UTF-8 JSON."""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+else:  # pragma: no cover - depends on the environment
+    dumps = json_dumps
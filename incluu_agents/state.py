@@ -0,0 +1,346 @@
+"""Shared state for agent data.
+
+Agents keep their leads, tickets and appointments in a
+:class:`StateStore` instead of plain Python lists, so several API worker
+processes can serve the same data. The store holds named collections of
+JSON records, keyed by string.
+
+Two backends are provided:
+
+* :class:`MemoryStore` – a dict guarded by a lock, for development,
+  tests and single-process deployments;
+* :class:`SQLiteStore` – a SQLite database in WAL mode shared by every
+  process on the host. Readers never block the writer, each
+  :meth:`~StateStore.put_many` is written as one transaction, and
+  :meth:`~StateStore.items` keeps a per-process copy of each collection
+  that is brought up to date from the change log instead of being
+  re-read.
+
+Every write bumps the collection's version and stamps the written
+records with it, so :meth:`StateStore.changes` can return just the
+records changed since a version the caller has already seen. Agents use
+it to keep in-memory indexes (such as
+:class:`~incluu_agents.leads.LeadIndex`) in step with writes made by
+other processes. :meth:`StateStore.update` is a compare-and-set, which
+lets two processes race for the same lead without both contacting it.
+
+:meth:`StateStore.from_env` picks the SQLite backend when
+``$AGENT_STATE_DB`` names a database file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Mapping, Optional, Set, Tuple
+
+Record = Dict[str, Any]
+
+# Collections used by the bundled agents.
+LEADS = "leads"
+TICKETS = "tickets"
+APPOINTMENTS = "appointments"
+APPOINTMENT_SLOTS = "appointment_slots"
+
+
+class StateStore:
+    """Interface shared by the state backends."""
+
+    @classmethod
+    def from_env(cls) -> "StateStore":
+        """Return a :class:`SQLiteStore` for ``$AGENT_STATE_DB``, else a :class:`MemoryStore`."""
+        path = os.environ.get("AGENT_STATE_DB")
+        return SQLiteStore(path) if path else MemoryStore()
+
+    def get(self, collection: str, key: str) -> Optional[Record]:
+        """Return a copy of one record, or None."""
+        raise NotImplementedError
+
+    def items(self, collection: str) -> Dict[str, Record]:
+        """Return copies of all records in ``collection`` by key."""
+        raise NotImplementedError
+
+    def put(self, collection: str, key: str, value: Record) -> None:
+        """Store one record."""
+        self.put_many(collection, {key: value})
+
+    def put_many(self, collection: str, records: Mapping[str, Record], overwrite: bool = True) -> int:
+        """Store several records in one write and return how many were written.
+
+        With ``overwrite=False`` existing keys are left alone, which
+        lets several processes seed a collection without clobbering
+        each other.
+        """
+        raise NotImplementedError
+
+    def update(
+        self,
+        collection: str,
+        key: str,
+        changes: Mapping[str, Any],
+        expect: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[Record]:
+        """Merge ``changes`` into a record and return the new value.
+
+        If ``expect`` is given, the update only happens when each of its
+        fields matches the stored record; otherwise (or if the record
+        does not exist) None is returned.
+        """
+        raise NotImplementedError
+
+    def changes(self, collection: str, since: int = 0) -> Tuple[int, Dict[str, Record]]:
+        """Return the current version and the records written after ``since``."""
+        raise NotImplementedError
+
+    def allocate_ids(self, collection: str, n: int, floor: int = 0) -> range:
+        """Reserve ``n`` integer ids unique across processes.
+
+        Ids are greater than ``floor`` and than every id reserved before.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+
+class MemoryStore(StateStore):
+    """In-process store; state is not shared with other processes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # collection -> key -> (version, record), least recently written first
+        self._data: Dict[str, "OrderedDict[str, Tuple[int, Record]]"] = {}
+        self._versions: Dict[str, int] = {}
+        self._next_ids: Dict[str, int] = {}
+
+    def get(self, collection: str, key: str) -> Optional[Record]:
+        with self._lock:
+            entry = self._data.get(collection, {}).get(key)
+            return dict(entry[1]) if entry is not None else None
+
+    def items(self, collection: str) -> Dict[str, Record]:
+        with self._lock:
+            return {key: dict(value) for key, (_, value) in self._data.get(collection, {}).items()}
+
+    def put_many(self, collection: str, records: Mapping[str, Record], overwrite: bool = True) -> int:
+        with self._lock:
+            data = self._data.setdefault(collection, OrderedDict())
+            version = self._bump(collection)
+            written = 0
+            for key, value in records.items():
+                if overwrite or key not in data:
+                    data[key] = (version, dict(value))
+                    data.move_to_end(key)
+                    written += 1
+            return written
+
+    def update(
+        self,
+        collection: str,
+        key: str,
+        changes: Mapping[str, Any],
+        expect: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[Record]:
+        with self._lock:
+            data = self._data.get(collection)
+            entry = data.get(key) if data is not None else None
+            if entry is None or not _matches(entry[1], expect):
+                return None
+            value = {**entry[1], **changes}
+            data[key] = (self._bump(collection), value)
+            data.move_to_end(key)
+            return dict(value)
+
+    def changes(self, collection: str, since: int = 0) -> Tuple[int, Dict[str, Record]]:
+        with self._lock:
+            newest_first = []
+            # Records are kept in write order, so stop at the first old one.
+            for key, (version, value) in reversed(self._data.get(collection, {}).items()):
+                if version <= since:
+                    break
+                newest_first.append((key, dict(value)))
+            return self._versions.get(collection, 0), dict(reversed(newest_first))
+
+    def allocate_ids(self, collection: str, n: int, floor: int = 0) -> range:
+        with self._lock:
+            start = max(self._next_ids.get(collection, 0), floor)
+            self._next_ids[collection] = start + n
+            return range(start + 1, start + n + 1)
+
+    def _bump(self, collection: str) -> int:
+        version = self._versions[collection] = self._versions.get(collection, 0) + 1
+        return version
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (collection, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS records_by_version ON records (collection, version);
+CREATE TABLE IF NOT EXISTS collections (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    next_id INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class SQLiteStore(StateStore):
+    """Store backed by a SQLite database in WAL mode.
+
+    Safe to open from several threads and processes at once; each
+    thread gets its own connection. Writes take the database write lock
+    for the duration of one short transaction, waiting up to
+    ``busy_timeout`` seconds for other writers.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        # Every thread's connection, so close() can reach them all.
+        self._connections: Set[sqlite3.Connection] = set()
+        self._connections_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        # collection -> (version, records); the per-process read cache
+        self._cache: Dict[str, Tuple[int, Dict[str, Record]]] = {}
+        self._conn().executescript(_SCHEMA)
+
+    def get(self, collection: str, key: str) -> Optional[Record]:
+        row = self._conn().execute(
+            "SELECT value FROM records WHERE collection = ? AND key = ?", (collection, key)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def items(self, collection: str) -> Dict[str, Record]:
+        with self._cache_lock:
+            since, cached = self._cache.get(collection, (0, {}))
+            version, changed = self.changes(collection, since)
+            if version != since:
+                cached.update(changed)
+                self._cache[collection] = (version, cached)
+            return {key: dict(value) for key, value in cached.items()}
+
+    def put_many(self, collection: str, records: Mapping[str, Record], overwrite: bool = True) -> int:
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        with self._write() as conn:
+            version = self._bump(conn, collection)
+            before = conn.total_changes
+            conn.executemany(
+                f"{verb} INTO records (collection, key, version, value) VALUES (?, ?, ?, ?)",
+                [(collection, key, version, _dumps(value)) for key, value in records.items()],
+            )
+            return conn.total_changes - before
+
+    def update(
+        self,
+        collection: str,
+        key: str,
+        changes: Mapping[str, Any],
+        expect: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[Record]:
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT value FROM records WHERE collection = ? AND key = ?", (collection, key)
+            ).fetchone()
+            if row is None:
+                return None
+            value = json.loads(row[0])
+            if not _matches(value, expect):
+                return None
+            value.update(changes)
+            conn.execute(
+                "UPDATE records SET version = ?, value = ? WHERE collection = ? AND key = ?",
+                (self._bump(conn, collection), _dumps(value), collection, key),
+            )
+            return value
+
+    def changes(self, collection: str, since: int = 0) -> Tuple[int, Dict[str, Record]]:
+        conn = self._conn()
+        # Read the version and the rows in one snapshot.
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT version FROM collections WHERE name = ?", (collection,)).fetchone()
+            version = row[0] if row is not None else 0
+            if version == since:
+                return version, {}
+            rows = conn.execute(
+                "SELECT key, value FROM records WHERE collection = ? AND version > ? ORDER BY version",
+                (collection, since),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return version, {key: json.loads(value) for key, value in rows}
+
+    def allocate_ids(self, collection: str, n: int, floor: int = 0) -> range:
+        with self._write() as conn:
+            self._ensure_collection(conn, collection)
+            (start,) = conn.execute(
+                "SELECT max(next_id, ?) FROM collections WHERE name = ?", (floor, collection)
+            ).fetchone()
+            conn.execute("UPDATE collections SET next_id = ? WHERE name = ?", (start + n, collection))
+        return range(start + 1, start + n + 1)
+
+    def close(self) -> None:
+        """Close the connections of every thread that used this store."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+            # Threads that use the store again open a fresh connection.
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only this thread uses the connection, but close() may run
+            # on another one.
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                self._connections.add(conn)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so read-modify-write
+        # transactions cannot interleave across processes.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _ensure_collection(self, conn: sqlite3.Connection, collection: str) -> None:
+        conn.execute("INSERT OR IGNORE INTO collections (name) VALUES (?)", (collection,))
+
+    def _bump(self, conn: sqlite3.Connection, collection: str) -> int:
+        self._ensure_collection(conn, collection)
+        (version,) = conn.execute(
+            "UPDATE collections SET version = version + 1 WHERE name = ? RETURNING version",
+            (collection,),
+        ).fetchall()[0]
+        return version
+
+
+def _matches(value: Record, expect: Optional[Mapping[str, Any]]) -> bool:
+    return expect is None or all(value.get(field) == want for field, want in expect.items())
+
+
+def _dumps(value: Record) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
@@ -0,0 +1,186 @@
+"""Vectorised numeric summaries for ``generate_report`` payloads.
+
+:func:`summarize` computes count, mean, standard deviation, min, max,
+percentiles and a histogram of a numeric array with NumPy. Arrays up to
+``exact_limit`` values are summarised exactly. Larger arrays, and
+iterables of chunks from :func:`summarize_chunks`, are folded through a
+:class:`StreamingSummary` one chunk at a time so temporaries stay
+bounded: moments, min and max remain exact, while percentiles and the
+histogram come from a :class:`~incluu_agents.kpis.QuantileSketch` with
+bounded relative error.
+
+:func:`decode_array` turns the compact ``data_b64`` payload option (raw
+little-endian values, base64 encoded) into an array without going
+through a JSON list.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from .kpis import QuantileSketch
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95, 99)
+DEFAULT_BINS = 10
+# Histograms are returned in full, so their size is bounded.
+MAX_BINS = 1000
+CHUNK_SIZE = 1 << 20
+EXACT_LIMIT = 10_000_000
+DTYPES = ("float64", "float32", "int64", "int32", "int16", "uint8")
+
+
+def decode_array(data: str, dtype: str = "float64") -> np.ndarray:
+    """Decode base64 encoded little-endian ``dtype`` values."""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}', expected one of {DTYPES}")
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError(f"Invalid base64 data: {exc}") from exc
+    item = np.dtype(dtype).newbyteorder("<")
+    if len(raw) % item.itemsize:
+        raise ValueError(f"Data length {len(raw)} is not a multiple of the {dtype} item size")
+    return np.frombuffer(raw, dtype=item)
+
+
+class StreamingSummary:
+    """Accumulates a summary over chunks without keeping them in memory."""
+
+    def __init__(self, accuracy: float = 0.001) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(accuracy)
+
+    def update(self, chunk: Any) -> None:
+        """Fold one chunk of values into the summary."""
+        values = _finite(chunk)
+        n = values.size
+        if not n:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(np.square(values - chunk_mean).sum())
+        # Chan et al. pairwise combination of means and squared deviations
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.sketch.add_array(values)
+
+    def result(
+        self, percentiles: Sequence[float] = DEFAULT_PERCENTILES, bins: int = DEFAULT_BINS
+    ) -> Dict[str, Any]:
+        check_bins(bins)
+        if not self.count:
+            return _empty(percentiles)
+        estimates = self.sketch.quantiles([p / 100 for p in percentiles])
+        # Clamp sketch estimates into the exact observed range.
+        estimates = [min(max(v, self.min), self.max) for v in estimates]
+        buckets = self.sketch.buckets()
+        counts, edges = np.histogram(
+            np.clip([value for value, _ in buckets], self.min, self.max),
+            bins=bins,
+            range=(self.min, self.max),
+            weights=[n for _, n in buckets],
+        )
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": float(np.sqrt(self._m2 / self.count)),
+            "min": self.min,
+            "max": self.max,
+            "percentiles": _label(percentiles, estimates),
+            "histogram": {"edges": edges.tolist(), "counts": counts.astype(np.int64).tolist()},
+            "exact": False,
+        }
+
+
+def summarize(
+    data: Any,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    bins: int = DEFAULT_BINS,
+    exact_limit: int = EXACT_LIMIT,
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Summarise a list or array of numbers. Non-finite values are ignored.
+
+    ``data`` may also be a :class:`StreamingSummary` that has already
+    been fed the values.
+    """
+    if isinstance(data, StreamingSummary):
+        return data.result(percentiles, bins)
+    check_bins(bins)
+    values = np.asarray(data)
+    if values.dtype == object or values.dtype.kind not in "biuf":
+        raise ValueError("Data must be an array of numbers")
+    values = values.ravel()
+    if values.size > exact_limit:
+        return summarize_chunks(
+            (values[i:i + chunk_size] for i in range(0, values.size, chunk_size)),
+            percentiles,
+            bins,
+        )
+    values = _finite(values)
+    if not values.size:
+        return _empty(percentiles)
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": _label(percentiles, np.percentile(values, percentiles).tolist()),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+        "exact": True,
+    }
+
+
+def summarize_chunks(
+    chunks: Iterable[Any],
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    bins: int = DEFAULT_BINS,
+) -> Dict[str, Any]:
+    """Summarise values arriving as an iterable of arrays."""
+    summary = StreamingSummary()
+    for chunk in chunks:
+        summary.update(chunk)
+    return summary.result(percentiles, bins)
+
+
+def check_bins(bins: int) -> None:
+    """Raise ValueError unless ``bins`` is between 1 and :data:`MAX_BINS`."""
+    if not 1 <= bins <= MAX_BINS:
+        raise ValueError(f"bins must be between 1 and {MAX_BINS}")
+
+
+def _finite(values: Any) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64).ravel()
+    mask = np.isfinite(values)
+    return values if mask.all() else values[mask]
+
+
+def _label(percentiles: Sequence[float], values: Sequence[Optional[float]]) -> Dict[str, Optional[float]]:
+    return {f"p{p:g}": v for p, v in zip(percentiles, values)}
+
+
+def _empty(percentiles: Sequence[float]) -> Dict[str, Any]:
+    return {
+        "count": 0,
+        "mean": None,
+        "std": None,
+        "min": None,
+        "max": None,
+        "percentiles": _label(percentiles, [None] * len(percentiles)),
+        "histogram": {"edges": [], "counts": []},
+        "exact": True,
+    }
@@ -0,0 +1,136 @@
+"""Process pool for agents with ``execution = "process"``.
+
+CPU-bound agents hold the GIL and slow down every other request in the
+same interpreter. The orchestrator runs such agents in a
+:class:`ProcessAgentPool` instead. Each worker process builds its own
+instance of the agent class (with no arguments) and keeps it for the
+life of the worker, so process agents must not depend on state held
+by the parent process. KPI events they publish stay in the worker.
+
+Only the agent's import path, the task name and the payload cross the
+process boundary, and only the :class:`~incluu_agents.orchestrator.Result`
+comes back. NumPy arrays in payloads are pickled as raw buffers rather
+than element by element.
+
+If a worker dies the pool is marked broken; the affected calls fail
+with :class:`~concurrent.futures.process.BrokenProcessPool` and the next
+call starts a fresh pool.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    from .orchestrator import Agent, Result, Task
+
+
+def agent_path(agent: "Agent") -> str:
+    """Return the ``module:qualname`` a worker imports ``agent``'s class from."""
+    cls = type(agent)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+class ProcessAgentPool:
+    """Lazily started pool of warm worker processes.
+
+    ``max_workers`` defaults to ``$AGENT_PROCESS_WORKERS`` or the CPU
+    count and ``start_method`` to ``$AGENT_PROCESS_START_METHOD`` or
+    ``spawn``, which does not copy the parent's threads or locks.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, start_method: Optional[str] = None) -> None:
+        self.max_workers = max_workers or int(
+            os.environ.get("AGENT_PROCESS_WORKERS", os.cpu_count() or 1)
+        )
+        self.start_method = start_method or os.environ.get("AGENT_PROCESS_START_METHOD", "spawn")
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._paths: Set[str] = set()
+
+    def add(self, agent: "Agent") -> None:
+        """Have new workers import and build ``agent``'s class on start-up."""
+        self._paths.add(agent_path(agent))
+
+    def start(self) -> None:
+        """Start every worker now rather than on the first task."""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_ping)
+
+    def submit(self, agent: "Agent", task: "Task") -> Future:
+        """Run ``agent.handle(task)`` in a worker; the future holds the Result."""
+        path = agent_path(agent)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_handle, path, task.name, task.payload)
+        except BrokenProcessPool:
+            self._discard(executor)
+            executor = self._get_executor()
+            future = executor.submit(_handle, path, task.name, task.payload)
+        future.add_done_callback(lambda f: self._check(f, executor))
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(sorted(self._paths),),
+                )
+            return self._executor
+
+    def _check(self, future: Future, executor: ProcessPoolExecutor) -> None:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard(executor)
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        # A broken pool has already torn down its workers; just forget it.
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+
+# Worker side
+
+_worker_agents: Dict[str, "Agent"] = {}
+
+
+def _init_worker(paths: Any) -> None:
+    for path in paths:
+        _load(path)
+
+
+def _load(path: str) -> "Agent":
+    agent = _worker_agents.get(path)
+    if agent is None:
+        from .registry import load_class
+
+        agent = _worker_agents[path] = load_class(path)()
+    return agent
+
+
+def _handle(path: str, name: str, payload: Dict[str, Any]) -> "Result":
+    from .orchestrator import Task, buffer_records
+
+    result = _load(path).handle(Task(name=name, payload=payload))
+    # Generators cannot be pickled back to the API process.
+    result.data = buffer_records(result.data)
+    return result
+
+
+def _ping() -> int:
+    return os.getpid()
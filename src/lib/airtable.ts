@@ -1,11 +1,15 @@
 /**
  * Airtable helper functions
  *
- * This module provides a simple wrapper around the Airtable REST API. It
- * reads configuration from environment variables (`AIRTABLE_API_KEY`,
- * `AIRTABLE_BASE_ID`, and optional table names) and exposes functions for
- * fetching data. When integrating with other tables (e.g. Leads, Metrics),
- * follow the pattern used in `fetchContacts`.
+ * Contacts are not read from the Airtable REST API directly. The agent
+ * service keeps a local copy of the table (synced in pages, and
+ * incrementally by last-modified time) and serves it from
+ * `/crm/contacts`, so a page render costs one local request and large
+ * tables are not truncated at Airtable's 100-record page size. Point
+ * `AGENT_API_URL` (or `NEXT_PUBLIC_AGENT_API_URL`) at the service and,
+ * if it has one, set `AGENT_API_KEY`. The Airtable credentials
+ * (`AIRTABLE_API_KEY`, `AIRTABLE_BASE_ID`, `AIRTABLE_CONTACTS_TABLE`)
+ * are configured on the agent service.
  */
 
 export interface ContactRecord {
@@ -17,29 +21,46 @@ export interface ContactRecord {
   [key: string]: any;
 }
 
-/** Fetch all records from the contacts table. */
-export async function fetchContacts(): Promise<ContactRecord[]> {
-  const apiKey = process.env.AIRTABLE_API_KEY;
-  const baseId = process.env.AIRTABLE_BASE_ID;
-  const tableName = process.env.AIRTABLE_CONTACTS_TABLE || 'Contacts';
-  if (!apiKey || !baseId) {
-    console.warn('Airtable credentials are missing');
-    return [];
+export interface ContactQuery {
+  stage?: string;
+  persona?: string;
+  limit?: number;
+  cursor?: string;
+}
+
+export interface ContactPage {
+  contacts: ContactRecord[];
+  nextCursor: string | null;
+}
+
+const AGENT_API_URL =
+  process.env.AGENT_API_URL || process.env.NEXT_PUBLIC_AGENT_API_URL || 'http://localhost:8000';
+
+/** Fetch one page of contacts matching `query` from the agent service. */
+export async function fetchContacts(query: ContactQuery = {}): Promise<ContactPage> {
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(query)) {
+    if (value !== undefined && value !== '') {
+      params.set(key, String(value));
+    }
+  }
+  const headers: Record<string, string> = {};
+  if (process.env.AGENT_API_KEY) {
+    headers['X-API-Key'] = process.env.AGENT_API_KEY;
   }
-  const url = `https://api.airtable.com/v0/${baseId}/${encodeURIComponent(
-    tableName
-  )}`;
-  const response = await fetch(url, {
-    headers: {
-      Authorization: `Bearer ${apiKey}`,
-    },
-  });
-  if (!response.ok) {
-    console.error('Failed to fetch contacts from Airtable:', response.status);
-    return [];
+  try {
+    const response = await fetch(`${AGENT_API_URL}/crm/contacts?${params}`, { headers });
+    if (!response.ok) {
+      console.error('Failed to fetch contacts:', response.status);
+      return { contacts: [], nextCursor: null };
+    }
+    const data = (await response.json()) as {
+      contacts: ContactRecord[];
+      next_cursor: string | null;
+    };
+    return { contacts: data.contacts, nextCursor: data.next_cursor };
+  } catch (error) {
+    console.error('Agent service is unreachable:', error);
+    return { contacts: [], nextCursor: null };
   }
-  const data = (await response.json()) as {
-    records: { id: string; fields: Record<string, any> }[];
-  };
-  return data.records.map((record) => ({ id: record.id, ...record.fields }));
-}
\ No newline at end of file
+}
@@ -12,9 +12,15 @@ import { GetServerSideProps } from 'next';
 
 interface CRMProps {
   contacts: ContactRecord[];
+  nextCursor: string | null;
+  stage: string;
+  persona: string;
 }
 
-export default function CRM({ contacts }: CRMProps) {
+export default function CRM({ contacts, nextCursor, stage, persona }: CRMProps) {
+  const nextPage = nextCursor
+    ? `?${new URLSearchParams({ stage, persona, cursor: nextCursor })}`
+    : null;
   return (
     <>
       <Head>
@@ -58,12 +64,25 @@ export default function CRM({ contacts }: CRMProps) {
             ))}
           </tbody>
         </table>
+        {nextPage && (
+          <p style={{ marginTop: '1rem' }}>
+            <a href={nextPage}>Next page →</a>
+          </p>
+        )}
       </main>
     </>
   );
 }
 
-export const getServerSideProps: GetServerSideProps<CRMProps> = async () => {
-  const contacts = await fetchContacts();
-  return { props: { contacts } };
+export const getServerSideProps: GetServerSideProps<CRMProps> = async ({ query }) => {
+  const param = (value: string | string[] | undefined) => (typeof value === 'string' ? value : '');
+  const stage = param(query.stage);
+  const persona = param(query.persona);
+  const { contacts, nextCursor } = await fetchContacts({
+    stage,
+    persona,
+    limit: 100,
+    cursor: param(query.cursor) || undefined,
+  });
+  return { props: { contacts, nextCursor, stage, persona } };
 };
\ No newline at end of file
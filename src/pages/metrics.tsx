@@ -1,4 +1,5 @@
 import Head from 'next/head';
+import { useEffect, useState } from 'react';
 
 /**
  * Metrics page
@@ -7,8 +8,57 @@ import Head from 'next/head';
  * metrics about your business. In a real implementation, these values
  * would be pulled from your database or analytics service. Here we
  * simply render static cards styled with your brand palette.
+ *
+ * Below the cards, an agent performance table is loaded from the agent
+ * service's `GET /metrics?format=json` endpoint (set
+ * `NEXT_PUBLIC_AGENT_API_URL` to point at it) and refreshed every few
+ * seconds.
  */
+const AGENT_API_URL = process.env.NEXT_PUBLIC_AGENT_API_URL || 'http://localhost:8000';
+const REFRESH_MS = 5000;
+
+interface TaskMetrics {
+  task: string;
+  agent: string;
+  calls: number;
+  errors: number;
+  cache_hits: number;
+  latency: { sum: number; p50: number | null; p95: number | null; p99: number | null };
+}
+
+interface AgentMetrics {
+  tasks: TaskMetrics[];
+  agents: Record<string, { in_flight: number }>;
+  queue_depth: number;
+}
+
+function formatMs(seconds: number | null): string {
+  return seconds === null ? '—' : `${(seconds * 1000).toFixed(1)} ms`;
+}
+
 export default function Metrics() {
+  const [agentMetrics, setAgentMetrics] = useState<AgentMetrics | null>(null);
+
+  useEffect(() => {
+    let active = true;
+    const load = async () => {
+      try {
+        const res = await fetch(`${AGENT_API_URL}/metrics?format=json`);
+        if (res.ok && active) {
+          setAgentMetrics(await res.json());
+        }
+      } catch (err) {
+        console.error('Failed to load agent metrics', err);
+      }
+    };
+    load();
+    const timer = setInterval(load, REFRESH_MS);
+    return () => {
+      active = false;
+      clearInterval(timer);
+    };
+  }, []);
+
   return (
     <>
       <Head>
@@ -83,6 +133,54 @@ export default function Metrics() {
             <small style={{ opacity: 0.8 }}>Goal: 10K</small>
           </div>
         </div>
+        <h2 style={{ marginTop: '2rem' }}>Agent Performance</h2>
+        <p>
+          Queue depth: {agentMetrics ? agentMetrics.queue_depth : '—'}
+        </p>
+        <table style={{ width: '100%', borderCollapse: 'collapse', marginTop: '1rem' }}>
+          <thead>
+            <tr style={{ backgroundColor: 'var(--colour-grey-blue)', color: 'white' }}>
+              <th style={{ padding: '0.5rem', textAlign: 'left' }}>Task</th>
+              <th style={{ padding: '0.5rem', textAlign: 'left' }}>Agent</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>Calls</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>Errors</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>Cache hits</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>In flight</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>p50</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>p95</th>
+              <th style={{ padding: '0.5rem', textAlign: 'right' }}>p99</th>
+            </tr>
+          </thead>
+          <tbody>
+            {(!agentMetrics || agentMetrics.tasks.length === 0) && (
+              <tr>
+                <td colSpan={9} style={{ padding: '0.5rem', textAlign: 'center' }}>
+                  {agentMetrics
+                    ? 'No tasks have been dispatched yet.'
+                    : 'Agent service metrics are unavailable.'}
+                </td>
+              </tr>
+            )}
+            {agentMetrics?.tasks.map((row, index) => (
+              <tr
+                key={`${row.task}-${row.agent}`}
+                style={{ backgroundColor: index % 2 === 0 ? '#f5f5fa' : '#ffffff' }}
+              >
+                <td style={{ padding: '0.5rem' }}>{row.task}</td>
+                <td style={{ padding: '0.5rem' }}>{row.agent}</td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>{row.calls}</td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>{row.errors}</td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>{row.cache_hits}</td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>
+                  {agentMetrics.agents[row.agent]?.in_flight ?? 0}
+                </td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>{formatMs(row.latency.p50)}</td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>{formatMs(row.latency.p95)}</td>
+                <td style={{ padding: '0.5rem', textAlign: 'right' }}>{formatMs(row.latency.p99)}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
       </main>
     </>
   );
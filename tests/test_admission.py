@@ -0,0 +1,157 @@
+"""Tests for admission control on the task endpoints."""
+
+import asyncio
+import inspect
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from incluu_agents import Orchestrator
+from incluu_agents.admission import QUEUE_FULL, TIMED_OUT, AdmissionController, Rejected, TaskLimits
+from incluu_agents.orchestrator import Agent, Result, Task
+
+
+def test_token_buckets_per_key_and_task():
+    now = [0.0]
+    control = AdmissionController(
+        {"*": TaskLimits(rate=1, burst=2), "generate_report": TaskLimits(rate=0.5, burst=1)},
+        clock=lambda: now[0],
+    )
+    control.check_rate("a", "job_search")
+    control.check_rate("a", "job_search")
+    with pytest.raises(Rejected) as exc:
+        control.check_rate("a", "job_search")
+    assert (exc.value.status, exc.value.retry_after) == (429, 1)
+    control.check_rate("b", "job_search")  # other keys have their own bucket
+    control.check_rate("a", "generate_report")
+    with pytest.raises(Rejected) as exc:
+        control.check_rate("a", "generate_report")
+    assert exc.value.retry_after == 2
+    now[0] = 1.0
+    control.check_rate("a", "job_search")
+
+
+def test_concurrency_limit_queues_then_sheds():
+    async def run():
+        control = AdmissionController(max_concurrency=1, queue_size=1, max_wait=0.05)
+        await control.acquire("t")
+        waiter = asyncio.ensure_future(control.acquire("t"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as exc:
+            await control.acquire("t")
+        assert (exc.value.status, exc.value.reason) == (503, QUEUE_FULL)
+        control.release("t", 0.01)
+        await waiter  # handed the freed slot
+        with pytest.raises(Rejected) as exc:
+            await control.acquire("t")
+        assert exc.value.reason == TIMED_OUT
+        control.release("t")
+        await control.acquire("t")  # the timed-out waiter left the queue
+        return control.stats()
+
+    stats = asyncio.run(run())
+    assert stats["running"] == 1 and stats["waiting"] == 0
+    assert stats["admitted"] == {"t": 3}
+    assert {r["reason"]: r["count"] for r in stats["rejected"]} == {QUEUE_FULL: 1, TIMED_OUT: 1}
+
+
+def test_task_limit_does_not_block_other_tasks():
+    async def run():
+        control = AdmissionController({"report": TaskLimits(concurrency=1)}, max_concurrency=4, max_wait=1)
+        await control.acquire("report")
+        blocked = asyncio.ensure_future(control.acquire("report"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(control.acquire("search"), 0.1)
+        assert not blocked.done()
+        control.release("report")
+        await blocked
+
+    asyncio.run(run())
+
+
+def test_tasks_endpoint_rejects_with_retry_after(monkeypatch):
+    monkeypatch.setattr(main, "admission", AdmissionController({"job_search": TaskLimits(rate=0.1, burst=1)}))
+    client = TestClient(main.app)
+    body = {"name": "job_search", "payload": {"count": 1}}
+    assert client.post("/tasks", json=body).status_code == 200
+    resp = client.post("/tasks", json=body)
+    assert resp.status_code == 429 and resp.headers["retry-after"] == "10"
+    assert client.post("/tasks", json=body, headers={"X-API-Key": "other"}).status_code == 200
+    admission = client.get("/metrics", params={"format": "json"}).json()["admission"]
+    assert admission["admitted"] == {"job_search": 2} and admission["running"] == 0
+    assert 'incluu_admission_rejected_total{task="job_search",reason="rate_limited"} 1' in client.get("/metrics").text
+
+
+class RecordsAgent(Agent):
+    name = "records_agent"
+    tasks = ("records",)
+
+    def handle(self, task: Task) -> Result:
+        self.records = (i for i in range(1000))
+        return Result(ok=True, data={"records": self.records})
+
+
+def test_stream_disconnect_before_first_chunk_frees_the_slot(tmp_path, monkeypatch):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    agent = RecordsAgent()
+    orch.register_agent(agent)
+    monkeypatch.setattr(main, "orch", orch)
+    monkeypatch.setattr(main, "admission", AdmissionController(max_concurrency=1))
+    body = json.dumps({"name": "records", "payload": {}}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/tasks/stream", "raw_path": b"/tasks/stream", "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def run():
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            # The client is gone while the headers are being written.
+            if message["type"] == "http.response.start":
+                await asyncio.sleep(1)
+            assert message["type"] != "http.response.body"
+
+        await asyncio.wait_for(main.app(scope, receive, send), 0.5)
+
+    asyncio.run(run())
+    assert main.admission.stats()["running"] == 0
+    assert inspect.getgeneratorstate(agent.records) == inspect.GEN_CLOSED
+
+
+def test_batches_are_rated_all_or_nothing_and_take_slots(monkeypatch):
+    control = AdmissionController(
+        {"job_search": TaskLimits(rate=0.1, burst=2, concurrency=1), "generate_report": TaskLimits(rate=0.1, burst=1)}
+    )
+    monkeypatch.setattr(main, "admission", control)
+    client = TestClient(main.app)
+    search = {"name": "job_search", "payload": {"count": 1}}
+    report = {"name": "generate_report", "payload": {}}
+    assert client.post("/tasks", json=report).status_code == 200
+    resp = client.post("/tasks/batch", json={"tasks": [search, report]})
+    assert resp.status_code == 429
+    # The job_search tokens were not spent on the rejected batch.
+    resp = client.post("/tasks/batch", json={"tasks": [search, search], "max_concurrency": 2})
+    assert resp.status_code == 200 and all(r["ok"] for r in resp.json()["results"])
+    stats = control.stats()
+    assert stats["admitted"] == {"generate_report": 1, "job_search": 2} and stats["running"] == 0
+
+
+def test_batch_larger_than_the_burst_is_rejected_outright(monkeypatch):
+    control = AdmissionController({"job_search": TaskLimits(rate=1, burst=5)})
+    monkeypatch.setattr(main, "admission", control)
+    client = TestClient(main.app)
+    search = {"name": "job_search", "payload": {"count": 1}}
+    resp = client.post("/tasks/batch", json={"tasks": [search] * 10})
+    assert resp.status_code == 413 and "retry-after" not in resp.headers
+    assert "burst" in resp.json()["detail"]
+    assert client.post("/tasks/batch", json={"tasks": [search] * 5}).status_code == 200
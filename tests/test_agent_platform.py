@@ -0,0 +1,59 @@
+"""Tests for the agent_platform prototype orchestrator."""
+
+from agent_platform import Agent, Orchestrator, Result, SalesAgent, SupportAgent, AnalyticsAgent
+
+
+class RecordingAgent(Agent):
+    name = "RecordingAgent"
+    task_types = ("record",)
+
+    def __init__(self):
+        self.seen = []
+
+    def execute(self, task):
+        self.seen.append(task.payload["n"])
+        return Result(task_type=task.type, data=None)
+
+
+def test_priority_then_fifo_order():
+    orch = Orchestrator(verbose=False)
+    agent = RecordingAgent()
+    orch.register_agent(agent)
+    orch.post_task({"type": "record", "n": 1})
+    orch.post_task({"type": "record", "n": 2}, priority=5)
+    orch.post_task({"type": "record", "n": 3})
+    orch.post_task({"type": "record", "n": 4}, priority=5)
+    assert orch.run_once() == 4
+    assert agent.seen == [2, 4, 1, 3]
+
+
+def test_routes_and_unrouted_fallback():
+    class Legacy(Agent):
+        name = "Legacy"
+
+        def execute(self, task):
+            return Result(task_type=task.type, data="legacy") if task.type == "old" else None
+
+    orch = Orchestrator(verbose=False)
+    sales = SalesAgent()
+    orch.register_agent(sales)
+    orch.register_agent(Legacy())
+    assert orch.routes == {"sales_outreach": sales}
+    orch.post_task({"type": "old"})
+    orch.post_task({"type": "unknown"})
+    assert orch.run_once() == 2
+
+
+def test_parallel_run_drains_queue():
+    orch = Orchestrator(verbose=False)
+    sales, support = SalesAgent(), SupportAgent()
+    for agent in (sales, support, AnalyticsAgent(sales, support)):
+        orch.register_agent(agent)
+    recorder = RecordingAgent()
+    orch.register_agent(recorder)
+    for i in range(2000):
+        orch.post_task({"type": "record", "n": i})
+        orch.post_task({"type": ("sales_outreach", "support_summary", "analytics_report")[i % 3]})
+    assert orch.run(workers=4) == 4000
+    assert len(orch.task_queue) == 0
+    assert sorted(recorder.seen) == list(range(2000))
@@ -0,0 +1,169 @@
+"""Tests for the Airtable mirror, run against a local stand-in server."""
+
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from incluu_agents.airtable import AirtableClient, AirtableError, AirtableMirror
+from incluu_agents.state import MemoryStore
+
+STAGES = ["Lead", "Prospect", "Client"]
+
+
+class FakeAirtable:
+    """Serves one table the way Airtable's list endpoint does."""
+
+    def __init__(self, n):
+        self.records = {}
+        self.modified = {}
+        self.now = 1_700_000_000.0
+        for i in range(n):
+            self.put(f"rec{i:05d}", {"Name": f"Contact {i}", "Stage": STAGES[i % 3], "Persona": ["Founder", "Traveller"][i % 2]})
+        self.now += 3600
+        self.requests = []
+        self.clients = set()
+        self.throttle = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake.clients.add(self.client_address)
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                fake.requests.append(params)
+                if self.headers["Authorization"] != "Bearer key":
+                    return self._send(401, {"error": "AUTHENTICATION_REQUIRED"})
+                if url.path != "/v0/app1/Contacts":
+                    return self._send(404, {"error": "NOT_FOUND"})
+                if fake.throttle:
+                    fake.throttle -= 1
+                    return self._send(429, {"errors": "RATE_LIMIT"}, {"Retry-After": "0"})
+                self._send(200, fake.page(params))
+
+            def _send(self, status, body, headers=()):
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for name, value in dict(headers).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v0"
+
+    def put(self, record_id, fields):
+        self.records[record_id] = fields
+        self.modified[record_id] = self.now
+
+    def page(self, params):
+        ids = sorted(self.records)
+        match = re.search(r"IS_AFTER\(LAST_MODIFIED_TIME\(\), '([^']+)'\)", params.get("filterByFormula", ""))
+        if match:
+            since = datetime.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S.000Z").replace(tzinfo=timezone.utc).timestamp()
+            ids = [i for i in ids if self.modified[i] > since]
+        start = int(params.get("offset", 0))
+        size = int(params.get("pageSize", 100))
+        body = {"records": [{"id": i, "createdTime": "", "fields": self.records[i]} for i in ids[start:start + size]]}
+        if start + size < len(ids):
+            body["offset"] = str(start + size)
+        return body
+
+
+@pytest.fixture
+def airtable():
+    fake = FakeAirtable(250)
+    yield fake
+    fake.server.shutdown()
+
+
+def make_mirror(fake, store=None):
+    client = AirtableClient("key", "app1", url=fake.url, rate=0, sleep=lambda s: None)
+    clock = lambda: fake.now  # noqa: E731
+    return AirtableMirror(store or MemoryStore(), client, clock=clock)
+
+
+def test_full_sync_follows_offsets_over_pooled_connections(airtable):
+    airtable.throttle = 1
+    mirror = make_mirror(airtable)
+    assert mirror.sync() == {"full": True, "fetched": 250, "deleted": 0}
+    # One retried 429, then three pages, all over the same connection.
+    assert [r.get("offset") for r in airtable.requests] == [None, None, "100", "200"]
+    assert len(airtable.clients) == 1
+    assert mirror.status()["records"] == 250
+
+
+def test_incremental_and_full_resync(airtable):
+    mirror = make_mirror(airtable)
+    mirror.sync()
+    airtable.now += 3600
+    airtable.put("rec00001", {"Name": "Renamed", "Stage": "Client"})
+    airtable.put("rec99999", {"Name": "New", "Stage": "Lead"})
+    del airtable.records["rec00000"]
+    assert mirror.sync() == {"full": False, "fetched": 2, "deleted": 0}
+    assert "filterByFormula" in airtable.requests[-1]
+    assert mirror.query({"Stage": "client"}, limit=500)[0][0]["Name"] == "Renamed"
+    assert mirror.sync(full=True)["deleted"] == 1
+    ids = [c["id"] for c in mirror.query(limit=500)[0]]
+    assert "rec00000" not in ids and "rec99999" in ids and len(ids) == 250
+
+
+def test_errors_are_not_retried(airtable):
+    client = AirtableClient("wrong", "app1", url=airtable.url, rate=0, sleep=lambda s: None)
+    with pytest.raises(AirtableError) as exc:
+        AirtableMirror(MemoryStore(), client).sync()
+    assert exc.value.status == 401 and len(airtable.requests) == 1
+
+
+def test_contacts_endpoint_filters_and_paginates(airtable, monkeypatch):
+    mirror = make_mirror(airtable)
+    mirror.sync()
+    monkeypatch.setattr(main, "crm", mirror)
+    client = TestClient(main.app)
+    seen = []
+    cursor = None
+    while True:
+        params = {"stage": "Lead", "persona": "founder", "limit": 20}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/crm/contacts", params=params).json()
+        seen += body["contacts"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len({c["id"] for c in seen}) == 42
+    assert all(c["Stage"] == "Lead" and c["Persona"] == "Founder" for c in seen)
+    assert client.get("/crm/contacts", params={"limit": 0}).status_code == 400
+    refreshes = []
+    monkeypatch.setattr(mirror, "refresh", lambda: refreshes.append(1))
+    assert client.get("/crm/contacts").json()["synced_at"] == airtable.now
+    assert refreshes == [1]
+
+
+def test_only_the_lease_holder_syncs(airtable):
+    store = MemoryStore()
+    first, second = make_mirror(airtable, store), make_mirror(airtable, store)
+    first.lease_ttl = second.lease_ttl = 60
+    assert first.acquire_lease() and not second.acquire_lease()
+    first._sync_if_leader()
+    second._sync_if_leader()
+    assert len([r for r in airtable.requests if r.get("offset") is None]) == 1
+    assert second.query(limit=500)[0] and first.status()["sync_leader"]
+    airtable.now += 61  # the leader stopped renewing
+    assert second.acquire_lease() and not first.acquire_lease()
+    second.release_lease()
+    assert first.acquire_lease()
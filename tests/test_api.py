@@ -0,0 +1,47 @@
+"""Tests for the FastAPI service."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_task_batch_returns_results_in_order():
+    client = TestClient(app)
+    resp = client.post("/tasks/batch", json={
+        "tasks": [
+            {"name": "job_search", "payload": {"count": 1}},
+            {"name": "missing_task"},
+            {"name": "job_search", "payload": {"count": 4}},
+        ],
+        "max_concurrency": 2,
+    })
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert len(results[0]["data"]["jobs"]) == 1
+    assert results[1]["ok"] is False
+    assert len(results[2]["data"]["jobs"]) == 4
+
+
+def test_task_batch_streams_ndjson():
+    client = TestClient(app)
+    tasks = [{"name": "job_search", "payload": {"count": n}} for n in range(1, 6)]
+    resp = client.post("/tasks/batch?stream=true", json={"tasks": tasks})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(5))
+    for line in lines:
+        assert len(line["data"]["jobs"]) == line["index"] + 1
+
+
+def test_task_batch_validates_items():
+    client = TestClient(app)
+    resp = client.post("/tasks/batch", json={"tasks": [{"name": "job_search", "payload": []}]})
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith("tasks[0]:")
+    search = {"name": "job_search", "payload": {"count": 1}}
+    for bad in (0, "2", True):
+        resp = client.post("/tasks/batch", json={"tasks": [search], "max_concurrency": bad})
+        assert resp.status_code == 400, bad
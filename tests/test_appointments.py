@@ -0,0 +1,132 @@
+"""Tests for the appointment slot engine."""
+
+import random
+import threading
+
+import pytest
+
+from incluu_agents import HealthAgent, Orchestrator
+from incluu_agents.appointments import SlotBook, SlotConflict
+from incluu_agents.state import SQLiteStore
+
+DAY = "2025-09-15"
+
+
+def test_book_cancel_reschedule():
+    book = SlotBook()
+    first = book.book("kim", DAY, "09:00", length=2)
+    assert first["time"] == "09:00" and book.slots_per_day == 16
+    with pytest.raises(SlotConflict):
+        book.book("kim", DAY, "09:30")
+    other = book.book("kim", DAY, "10:00")
+    with pytest.raises(SlotConflict):
+        book.reschedule(other["id"], DAY, "09:30")
+    assert book.get(other["id"])["time"] == "10:00"
+    book.reschedule(first["id"], "2025-09-16", "16:00")
+    assert book.is_free("kim", DAY, "09:00", length=2)
+    book.cancel(other["id"])
+    with pytest.raises(KeyError):
+        book.cancel(other["id"])
+    with pytest.raises(ValueError):
+        book.book("kim", DAY, "09:10")
+    with pytest.raises(ValueError):
+        book.book("kim", DAY, "16:30", length=2)
+
+
+def test_next_free_across_providers():
+    book = SlotBook(day_start="09:00", day_end="10:00")
+    book.book("a", DAY, "09:00")
+    book.book("b", DAY, "09:00")
+    book.book("b", DAY, "09:30")
+    assert book.next_free(["a", "b"], DAY, count=3) == [
+        {"provider_id": "a", "date": DAY, "time": "09:30"},
+        {"provider_id": "a", "date": "2025-09-16", "time": "09:00"},
+        {"provider_id": "b", "date": "2025-09-16", "time": "09:00"},
+    ]
+    assert book.next_free(["a"], DAY, length=2, count=1)[0]["date"] == "2025-09-16"
+    assert book.next_free(["b"], DAY, time="09:30", count=1)[0]["date"] == "2025-09-16"
+
+
+def test_contended_slots_are_booked_once():
+    book = SlotBook()
+    wins = []
+
+    def worker():
+        for slot in range(book.slots_per_day):
+            time = "%02d:%02d" % divmod(9 * 60 + 30 * slot, 60)
+            try:
+                wins.append(book.book("kim", DAY, time)["time"])
+            except SlotConflict:
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(wins) == sorted(set(wins)) and len(wins) == 16
+
+
+def test_concurrent_mixed_operations_stay_consistent():
+    book = SlotBook(stripes=8)
+    providers = list(range(40))
+    days = ["2025-09-15", "2025-09-16"]
+    times = ["%02d:%02d" % divmod(9 * 60 + 30 * slot, 60) for slot in range(book.slots_per_day)]
+
+    def worker(seed):
+        rng = random.Random(seed)
+        mine = []
+        for _ in range(3000):
+            op = rng.random()
+            try:
+                if op < 0.6 or not mine:
+                    mine.append(book.book(rng.choice(providers), rng.choice(days), rng.choice(times), length=rng.choice([1, 2]))["id"])
+                elif op < 0.8:
+                    book.cancel(mine.pop(rng.randrange(len(mine))))
+                else:
+                    book.reschedule(rng.choice(mine), rng.choice(days), rng.choice(times))
+            except (SlotConflict, ValueError):
+                pass
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Rebuild the calendars from the bookings: no overlaps, same bitmaps.
+    rebuilt = {}
+    for provider, ordinal, slot, length in book._bookings.values():
+        mask = ((1 << length) - 1) << slot
+        assert not rebuilt.get((provider, ordinal), 0) & mask
+        rebuilt[(provider, ordinal)] = rebuilt.get((provider, ordinal), 0) | mask
+    assert rebuilt == book._days
+
+
+def test_workers_sharing_sqlite_do_not_double_book(tmp_path):
+    path = str(tmp_path / "state.db")
+    orchs = []
+    for name in ("one", "two"):
+        orch = Orchestrator(log_file=str(tmp_path / f"{name}.log"), store=SQLiteStore(path))
+        orch.register_agent(HealthAgent())
+        orchs.append(orch)
+    one, two = orchs
+    booked = one.post_task("health_appointment", {"doctor_id": 2, "date": DAY, "time": "10:00"})
+    assert booked["ok"] and booked["data"]["appointment"]["status"] == "booked"
+    clash = two.post_task("health_appointment", {"doctor_id": 2, "date": DAY, "time": "10:00"})
+    assert clash["ok"] is False and "already booked" in clash["error"]
+    slots = two.post_task("health_appointment", {"action": "availability", "doctor_ids": [2], "date": DAY, "count": 3})
+    assert [slot["time"] for slot in slots["data"]["slots"]] == ["09:00", "09:30", "10:30"]
+
+    appointment_id = booked["data"]["appointment"]["id"]
+    moved = two.post_task("health_appointment", {"action": "reschedule", "appointment_id": appointment_id, "date": DAY, "time": "11:00"})
+    assert moved["data"]["appointment"]["time"] == "11:00"
+    assert two.post_task("health_appointment", {"doctor_id": 2, "date": DAY, "time": "10:00"})["ok"]
+    assert one.post_task("health_appointment", {"doctor_id": 2, "date": DAY, "time": "11:00"})["ok"] is False
+    assert one.post_task("health_appointment", {"action": "cancel", "appointment_id": appointment_id})["ok"]
+    assert two.post_task("health_appointment", {"action": "cancel", "appointment_id": appointment_id})["ok"] is False
+    assert two.post_task("health_appointment", {"doctor_id": 2, "date": DAY, "time": "11:00"})["ok"]
+
+    first_free = one.post_task("health_appointment", {"action": "availability", "speciality": "cardiologist", "date": DAY})
+    assert {slot["doctor_id"] for slot in first_free["data"]["slots"]} == {2}
+    for orch in orchs:
+        orch.shutdown()
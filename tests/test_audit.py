@@ -0,0 +1,93 @@
+"""Tests for the buffered audit log."""
+
+import asyncio
+import json
+import threading
+
+from incluu_agents import Orchestrator, JobsAgent
+from incluu_agents.audit import AuditLog
+
+
+def read_entries(path):
+    with open(path) as fh:
+        return [json.loads(line.split(" - ", 1)[1]) for line in fh]
+
+
+def test_flush_writes_everything(tmp_path):
+    log = AuditLog(str(tmp_path / "audit.log"), batch_size=7)
+    for i in range(100):
+        assert log.record({"n": i})
+    assert log.flush(timeout=5)
+    assert [e["n"] for e in read_entries(log.path)] == list(range(100))
+    log.close()
+
+
+def test_orchestrator_audits_tasks(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(JobsAgent())
+    orch.post_task(name="job_search", payload={"count": 1})
+    orch.shutdown()
+    entries = read_entries(str(tmp_path / "audit.log"))
+    assert entries == [
+        {"task": "job_search", "payload": {"count": 1}},
+        {"agent": "jobs_agent", "ok": True},
+    ]
+
+
+def test_drop_policy_discards_when_full(tmp_path):
+    log = AuditLog(str(tmp_path / "audit.log"), capacity=10, policy="drop", flush_interval=60)
+    with log._cond:  # hold the writer back so the buffer fills up
+        log._start()
+        for i in range(10):
+            log._buffer.append((0.0, {"n": i}))
+            log._enqueued += 1
+    results = [log.record({"n": i}) for i in range(10, 15)]
+    log.close()
+    assert not any(results)
+    assert log.stats()["dropped"] == 5
+    assert len(read_entries(log.path)) == 10
+
+
+def test_block_policy_loses_nothing_under_contention(tmp_path):
+    log = AuditLog(str(tmp_path / "audit.log"), capacity=8, batch_size=4)
+
+    def writer(offset):
+        for i in range(200):
+            log.record({"n": offset + i})
+
+    threads = [threading.Thread(target=writer, args=(k * 1000,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+    assert len(read_entries(log.path)) == 800
+
+
+def test_rotation_by_size(tmp_path):
+    log = AuditLog(str(tmp_path / "audit.log"), max_bytes=200, backup_count=2, batch_size=1)
+    for i in range(50):
+        log.record({"n": i})
+        log.flush()
+    log.close()
+    assert (tmp_path / "audit.log.1").exists()
+    assert (tmp_path / "audit.log.2").exists()
+    assert not (tmp_path / "audit.log.3").exists()
+
+
+def test_block_policy_does_not_stall_the_event_loop(tmp_path):
+    log = AuditLog(str(tmp_path / "audit.log"), capacity=4, batch_size=1)
+    disk = threading.Event()
+    write = log._write
+    log._write = lambda batch: (disk.wait(5), write(batch))  # a stalled disk
+    orch = Orchestrator(audit=log)
+    orch.register_agent(JobsAgent())
+
+    async def run():
+        for i in range(10):
+            assert (await orch.post_task_async("job_search", {"count": 1, "i": i}))["ok"]
+
+    asyncio.run(asyncio.wait_for(run(), 2))
+    assert log.stats()["dropped"] > 0
+    disk.set()
+    orch.shutdown()
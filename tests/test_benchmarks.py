@@ -0,0 +1,30 @@
+"""Tests for the benchmark runner."""
+
+from benchmarks.runner import Benchmark, compare, run_benchmark
+
+
+def result(p50, throughput):
+    return {"p50_ms": p50, "throughput_ops_s": throughput}
+
+
+def test_run_benchmark_reports_percentiles():
+    calls = []
+    bench = Benchmark("noop", lambda state: calls.append(state), lambda: "state", iterations=50, ops=2)
+    res = run_benchmark(bench, warmup=1)
+    assert len(calls) == 51 and calls[0] == "state"
+    assert res["iterations"] == 50
+    assert res["p50_ms"] <= res["p95_ms"] <= res["p99_ms"]
+    assert res["throughput_ops_s"] > 0
+
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"results": {"a": result(1.0, 1000), "b": result(1.0, 1000), "c": result(1.0, 1000)}}
+    current = {"results": {
+        "a": result(1.05, 980),   # within 10%
+        "b": result(1.5, 700),    # slower
+        "c": result(1.0, 800),    # lower throughput
+        "new": result(9.0, 1),    # not in baseline
+    }}
+    regressions = compare(current, baseline, threshold=0.10)
+    assert [line.split(":")[0] for line in regressions] == ["b", "c"]
+    assert compare(current, baseline, threshold=0.6) == []
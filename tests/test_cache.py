@@ -0,0 +1,77 @@
+"""Tests for the read-only task result cache."""
+
+from incluu_agents import Orchestrator, HealthAgent, JobsAgent
+from incluu_agents.cache import ResultCache, canonical_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResultCache(default_ttl=10, clock=clock)
+    cache.put("k", 1)
+    assert cache.get("k") == 1
+    clock.now = 10
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_rejects_stale_writes():
+    cache = ResultCache()
+    generation = cache.generation("agent")
+    cache.put("a", 1, tag="agent")
+    assert cache.invalidate("agent") == 1
+    assert not cache.put("b", 2, tag="agent", generation=generation)
+    assert len(cache) == 0
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key("t", {"a": 1, "b": 2}) == canonical_key("t", {"b": 2, "a": 1})
+    assert canonical_key("t", {"a": object()}) is None
+
+
+def test_orchestrator_caches_read_only_tasks(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(JobsAgent())
+    orch.register_agent(HealthAgent())
+    first = orch.post_task(name="job_search", payload={"count": 2})
+    second = orch.post_task(name="job_search", payload={"count": 2})
+    assert first == second
+    orch.post_task(name="health_search", payload={})
+    orch.post_task(name="health_search", payload={})
+    assert orch.cache.stats()["hits"] == 2
+    orch.post_task(name="health_appointment", payload={"doctor_id": 1})
+    assert orch.cache.stats()["invalidations"] == 1
+    assert orch.cache.stats()["size"] == 1  # job_search survives
+    orch.shutdown()
+
+
+def test_cached_results_are_not_shared_with_callers(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(JobsAgent())
+    first = orch.post_task(name="job_search", payload={"count": 2})
+    expected = [dict(job) for job in first["data"]["jobs"]]
+    first["data"]["jobs"][0]["title"] = "changed"
+    second = orch.post_task(name="job_search", payload={"count": 2})
+    assert second["data"]["jobs"] == expected
+    second["data"]["jobs"].clear()
+    assert orch.post_task(name="job_search", payload={"count": 2})["data"]["jobs"] == expected
+    assert orch.cache.stats()["hits"] == 2
+    orch.shutdown()
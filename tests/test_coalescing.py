@@ -0,0 +1,144 @@
+"""Tests for single-flight coalescing of identical read-only tasks."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from incluu_agents import Orchestrator
+from incluu_agents.orchestrator import INLINE, Agent, Result, Task
+
+
+class SlowAgent(Agent):
+    name = "slow_agent"
+    tasks = ("report", "write")
+    read_only_tasks = ("report",)
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = threading.Event()
+
+    def handle(self, task: Task) -> Result:
+        self.calls += 1
+        self.release.wait(5)
+        if task.payload.get("fail"):
+            raise RuntimeError("report failed")
+        return Result(ok=True, data={"n": task.payload.get("n"), "call": self.calls})
+
+
+class AsyncSlowAgent(Agent):
+    name = "async_slow_agent"
+    tasks = ("lookup",)
+    read_only_tasks = ("lookup",)
+    execution = INLINE
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cancelled = 0
+
+    async def handle_async(self, task: Task) -> Result:
+        self.calls += 1
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return Result(ok=True, data={"call": self.calls})
+
+
+def make_orch(tmp_path, **kwargs):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"), **kwargs)
+    agent = SlowAgent()
+    orch.register_agent(agent)
+    orch.register_agent(AsyncSlowAgent())
+    return orch, agent
+
+
+def test_concurrent_sync_calls_share_one_execution(tmp_path):
+    orch, agent = make_orch(tmp_path)
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(orch.post_task, "report", {"n": 1}) for _ in range(6)]
+        other = pool.submit(orch.post_task, "report", {"n": 2})
+        while sum(flight.waiters for flight in list(orch._flights.values())) < 7:
+            time.sleep(0.001)
+        agent.release.set()
+        results = [f.result() for f in futures]
+    assert agent.calls == 2
+    assert all(r == {"ok": True, "data": {"n": 1, "call": results[0]["data"]["call"]}, "error": None} for r in results)
+    assert other.result()["data"]["n"] == 2
+    assert orch.metrics_snapshot()["coalesced"] == {"report": 5}
+
+
+def test_sync_and_async_callers_share_errors(tmp_path):
+    orch, agent = make_orch(tmp_path)
+
+    async def run():
+        leader = asyncio.ensure_future(orch.post_task_async("report", {"fail": True}))
+        await asyncio.sleep(0.05)
+        follower = asyncio.get_running_loop().run_in_executor(None, orch.post_task, "report", {"fail": True})
+        await asyncio.sleep(0.05)
+        agent.release.set()
+        return await asyncio.gather(leader, follower)
+
+    results = asyncio.run(run())
+    assert agent.calls == 1
+    assert [r["error"] for r in results] == ["report failed", "report failed"]
+    # Failures are not cached, so the next call runs again.
+    orch.post_task("report", {"fail": True})
+    assert agent.calls == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers(tmp_path):
+    orch, _ = make_orch(tmp_path)
+    agent = orch._agents["async_slow_agent"]
+
+    async def run():
+        leader = asyncio.ensure_future(orch.post_task_async("lookup", {}))
+        follower = asyncio.ensure_future(orch.post_task_async("lookup", {}))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        assert leader.cancelled()
+
+        # Once every caller has gone, the execution is cancelled too.
+        lonely = asyncio.ensure_future(orch.post_task_async("lookup", {"x": 1}))
+        await asyncio.sleep(0.01)
+        lonely.cancel()
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(run())["ok"]
+    assert agent.calls == 2 and agent.cancelled == 1
+
+
+def test_coalescing_can_be_disabled(tmp_path):
+    orch, agent = make_orch(tmp_path, coalesce=False)
+    agent.release.set()
+
+    async def run():
+        return await asyncio.gather(*(orch.post_task_async("lookup", {}) for _ in range(3)))
+
+    asyncio.run(run())
+    assert orch._agents["async_slow_agent"].calls == 3
+
+
+def test_coalesced_callers_get_their_own_data(tmp_path):
+    orch, agent = make_orch(tmp_path)
+
+    async def run():
+        calls = [asyncio.ensure_future(orch.post_task_async("lookup", {"shared": 1})) for _ in range(3)]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(run())
+    assert orch._agents["async_slow_agent"].calls == 1
+    results[0]["data"]["call"] = "changed"
+    assert [r["data"] for r in results[1:]] == [{"call": 1}, {"call": 1}]
+    assert len({id(r["data"]) for r in results}) == 3
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(orch.post_task, "report", {"n": 3}) for _ in range(3)]
+        while sum(flight.waiters for flight in list(orch._flights.values())) < 3:
+            time.sleep(0.001)
+        agent.release.set()
+        results = [f.result() for f in futures]
+    assert len({id(r["data"]) for r in results}) == 3
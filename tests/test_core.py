@@ -27,4 +27,64 @@ def test_job_search():
     orch = setup_orch()
     res = orch.post_task(name='job_search', payload={'count': 2})
     assert res['ok']
-    assert 'jobs' in res['data'] and len(res['data']['jobs']) == 2
\ No newline at end of file
+    assert 'jobs' in res['data'] and len(res['data']['jobs']) == 2
+
+def test_post_task_async_offloads_sync_agents():
+    import asyncio
+    import threading
+
+    from incluu_agents import Agent, Result
+
+    class ThreadAgent(Agent):
+        name = "thread_agent"
+        tasks = ("where",)
+
+        def handle(self, task):
+            return Result(ok=True, data={"thread": threading.current_thread().name})
+
+    orch = Orchestrator(max_workers=2)
+    orch.register_agent(ThreadAgent())
+    res = asyncio.run(orch.post_task_async(name='where', payload={}))
+    orch.shutdown()
+    assert res['ok']
+    assert res['data']['thread'].startswith('incluu-agent')
+
+
+def test_post_task_async_awaits_native_agents():
+    import asyncio
+
+    from incluu_agents import Agent, Result
+
+    class AsyncAgent(Agent):
+        name = "async_agent"
+        tasks = ("echo", "fail")
+
+        async def handle_async(self, task):
+            await asyncio.sleep(0)
+            if task.name == "fail":
+                raise RuntimeError("boom")
+            return Result(ok=True, data=task.payload)
+
+    orch = Orchestrator()
+    orch.register_agent(AsyncAgent())
+
+    async def run():
+        return await asyncio.gather(
+            orch.post_task_async(name='echo', payload={'x': 1}),
+            orch.post_task_async(name='fail', payload={}),
+            orch.post_task_async(name='missing', payload={}),
+        )
+
+    echo, fail, missing = asyncio.run(run())
+    orch.shutdown()
+    assert echo == {'ok': True, 'data': {'x': 1}, 'error': None}
+    assert fail['ok'] is False and fail['error'] == 'boom'
+    assert missing['ok'] is False
+
+
+def test_post_tasks_preserves_order():
+    orch = setup_orch()
+    items = [{'name': 'job_search', 'payload': {'count': n}} for n in range(1, 6)]
+    results = orch.post_tasks(items, max_concurrency=2)
+    orch.shutdown()
+    assert [len(res['data']['jobs']) for res in results] == [1, 2, 3, 4, 5]
@@ -0,0 +1,40 @@
+"""Tests for the vectorised synthetic data generator."""
+
+import itertools
+
+import numpy as np
+
+from incluu_agents import datagen
+from incluu_agents.orchestrator import fake_jobs, fake_leads, fake_tickets
+
+
+def test_fake_helpers_keep_their_shape():
+    lead = fake_leads(3)[0]
+    assert set(lead) == {"id", "name", "email", "score", "status"}
+    assert lead["email"] == lead["name"].lower().replace(" ", ".") + "@example.com"
+    assert 60 <= lead["score"] <= 99 and lead["status"] == "new"
+    jobs = fake_jobs(3)
+    assert [job["company"] for job in jobs] == ["Company1", "Company2", "Company3"]
+    assert all(isinstance(t["issue"], str) for t in fake_tickets(4))
+
+
+def test_seed_is_reproducible():
+    assert fake_leads(50, seed=7) == fake_leads(50, seed=7)
+    assert fake_leads(50, seed=7) != fake_leads(50, seed=8)
+
+
+def test_large_tables_convert_lazily():
+    table = datagen.leads_table(1_000_000, seed=1)
+    assert len(table) == 1_000_000
+    assert isinstance(table.columns["score"], np.ndarray)
+    rows = list(itertools.islice(table.iter_rows(chunk_size=1000), 5))
+    assert [row["id"] for row in rows] == [1, 2, 3, 4, 5]
+    assert table.row(-1)["id"] == 1_000_000
+
+
+def test_random_words():
+    words = datagen.random_words(datagen.make_rng(0), 4, 5, 7)
+    table = datagen.ColumnTable({"name": words})
+    for row in table:
+        first, last = row["name"].split(" ")
+        assert len(first) == 5 and len(last) == 7 and first.isupper()
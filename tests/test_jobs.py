@@ -0,0 +1,111 @@
+"""Tests for the background job API."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from incluu_agents import JobsAgent, Orchestrator
+from incluu_agents.jobqueue import DONE, QUEUED, RUNNING, JobManager, QueueFull
+from incluu_agents.orchestrator import INLINE, Agent, Result, Task
+
+
+def test_submit_and_long_poll():
+    with TestClient(app) as client:
+        resp = client.post("/jobs", json={"name": "job_search", "payload": {"count": 2}})
+        assert resp.status_code == 202
+        job_id = resp.json()["id"]
+        assert resp.headers["location"] == f"/jobs/{job_id}"
+        job = client.get(f"/jobs/{job_id}", params={"wait": 5}).json()
+        assert job["status"] == DONE
+        assert len(job["result"]["data"]["jobs"]) == 2
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.post("/jobs", json={"name": "job_search", "payload": {}, "priority": "x"}).status_code == 400
+
+
+def test_full_queue_is_rejected_with_retry_after(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(JobsAgent())
+
+    async def run():
+        jobs = JobManager(orch, workers=0, capacity=2)
+        low = jobs.submit("job_search", {"count": 1})
+        high = jobs.submit("job_search", {"count": 1}, priority=5)
+        try:
+            jobs.submit("job_search", {})
+        except QueueFull as exc:
+            assert exc.retry_after >= 1
+        else:
+            raise AssertionError("expected QueueFull")
+        assert jobs.stats()["rejected"] == 1
+        jobs.workers = 1
+        await jobs.stop()
+        jobs.start()
+        await jobs.wait(low.id, 5)
+        assert high.finished_at <= low.started_at
+        await jobs.stop()
+
+    asyncio.run(run())
+    orch.shutdown()
+
+
+def test_results_are_evicted_by_age_and_count(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(JobsAgent())
+    now = [0.0]
+
+    async def run():
+        jobs = JobManager(orch, workers=1, result_ttl=10, max_results=2, clock=lambda: now[0])
+        ids = []
+        for _ in range(3):
+            job = jobs.submit("job_search", {"count": 1})
+            await jobs.wait(job.id, 5)
+            ids.append(job.id)
+            now[0] += 1
+        assert jobs.get(ids[0]) is None
+        assert jobs.get(ids[1]) is not None
+        now[0] += 10
+        assert jobs.get(ids[2]) is None
+        await jobs.stop()
+
+    asyncio.run(run())
+    orch.shutdown()
+
+
+class WaitingAgent(Agent):
+    name = "waiting_agent"
+    tasks = ("wait",)
+    execution = INLINE
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def handle_async(self, task: Task) -> Result:
+        self.calls += 1
+        await self.release.wait()
+        return Result(ok=True, data={"calls": self.calls})
+
+
+def test_stop_requeues_running_jobs(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    agent = WaitingAgent()
+    orch.register_agent(agent)
+
+    async def run():
+        agent.release = asyncio.Event()
+        jobs = JobManager(orch, workers=1)
+        job = jobs.submit("wait", {})
+        while job.status != RUNNING:
+            await asyncio.sleep(0.001)
+        await jobs.stop()
+        assert job.status == QUEUED and not job.done.is_set()
+        assert jobs.stats()["queued"] == 1 and jobs.stats()["running"] == 0
+        jobs.start()
+        agent.release.set()
+        await jobs.wait(job.id, 5)
+        await jobs.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == DONE and job.result["data"] == {"calls": 2}
+    orch.shutdown()
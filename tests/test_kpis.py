@@ -0,0 +1,71 @@
+"""Tests for the incremental KPI engine."""
+
+import random
+import statistics
+
+from incluu_agents import Orchestrator, SalesAgent, SupportAgent, AnalyticsAgent, HealthAgent
+from incluu_agents.kpis import KpiEngine, QuantileSketch, RunningStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sketch_quantiles_within_accuracy():
+    rng = random.Random(1)
+    values = sorted(rng.lognormvariate(3, 1) for _ in range(20000))
+    sketch = QuantileSketch(accuracy=0.01)
+    for v in values:
+        sketch.add(v)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.02 * exact
+
+
+def test_running_stats_match_statistics_module():
+    values = [3, -1, 4, 1, -5, 9, 0, 2.5]
+    stats = RunningStats()
+    for v in values:
+        stats.add(v)
+    snap = stats.snapshot()
+    assert abs(snap["mean"] - statistics.fmean(values)) < 1e-12
+    assert abs(snap["std"] - statistics.pstdev(values)) < 1e-12
+    assert snap["min"] == -5 and snap["max"] == 9
+
+
+def test_sliding_windows_expire():
+    clock = FakeClock()
+    engine = KpiEngine(clock=clock)
+    engine.publish("ticket_opened")
+    clock.now += 200
+    engine.publish("ticket_opened")
+    assert engine.window("ticket_opened", "5m")["count"] == 2
+    clock.now += 200
+    assert engine.window("ticket_opened", "5m")["count"] == 1
+    assert engine.window("ticket_opened", "1h")["count"] == 2
+    assert engine.count("ticket_opened") == 2
+    assert engine.window("never", "5m")["count"] == 0
+
+
+def test_report_reads_published_events(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    leads = [{"id": i, "score": s} for i, s in enumerate([60, 70, 80, 90])]
+    orch.register_agent(SalesAgent(leads=leads))
+    orch.register_agent(SupportAgent(tickets=[{"id": 1, "issue": "Payment failed"}]))
+    orch.register_agent(AnalyticsAgent())
+    orch.register_agent(HealthAgent())
+    orch.post_task(name="sales_outreach", payload={"count": 2})
+    orch.post_task(name="health_appointment", payload={})
+    kpis = orch.post_task(name="generate_report", payload={})["data"]["kpis"]
+    assert kpis == {
+        "total_leads": 4,
+        "avg_lead_score": 75.0,
+        "contacted_leads": 2,
+        "open_tickets": 1,
+        "appointments": 1,
+    }
+    orch.shutdown()
@@ -0,0 +1,62 @@
+"""Tests for the incremental lead index."""
+
+from incluu_agents import Orchestrator, SalesAgent
+from incluu_agents.leads import LeadIndex
+
+
+def make_leads():
+    return [
+        {"id": 1, "score": 50, "industry": "SaaS"},
+        {"id": 2, "score": 90, "industry": "Retail"},
+        {"id": 3, "score": 70, "industry": "SaaS"},
+        {"id": 4, "score": 80, "industry": "Finance"},
+    ]
+
+
+def test_top_does_not_consume():
+    index = LeadIndex(make_leads())
+    assert [lead["id"] for lead in index.top(2)] == [2, 4]
+    assert [lead["id"] for lead in index.top(2)] == [2, 4]
+    assert [lead["id"] for lead in index.top(5, industry="SaaS")] == [3, 1]
+
+
+def test_contact_removes_from_ranking():
+    leads = make_leads()
+    index = LeadIndex(leads)
+    assert [lead["id"] for lead in index.contact_top(1)] == [2]
+    assert leads[1]["status"] == "contacted"
+    assert [lead["id"] for lead in index.top(4)] == [4, 3, 1]
+    assert [lead["id"] for lead in index.top(4, status="contacted")] == [2]
+    assert index.count() == 3 and index.count("contacted", "Retail") == 1
+
+
+def test_rescore_and_add():
+    index = LeadIndex(make_leads())
+    index.rescore(1, 99)
+    index.add({"id": 5, "score": 95, "industry": "SaaS"})
+    assert [lead["id"] for lead in index.contact_top(3, industry="SaaS")] == [1, 5, 3]
+    assert index.top(1, industry="SaaS") == []
+
+
+def test_matches_full_sort_after_many_updates():
+    import random
+
+    rng = random.Random(3)
+    leads = [{"id": i, "score": rng.randint(0, 1000)} for i in range(2000)]
+    index = LeadIndex(leads)
+    for _ in range(5000):
+        index.rescore(rng.randrange(2000), rng.randint(0, 1000))
+    expected = sorted((lead for lead in leads if lead["status"] == "new"), key=lambda l: -l["score"])
+    assert [l["score"] for l in index.top(50)] == [l["score"] for l in expected[:50]]
+
+
+def test_sales_outreach_filters(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(SalesAgent(leads=make_leads()))
+    res = orch.post_task(name="sales_outreach", payload={"count": 5, "industry": "SaaS"})
+    assert [lead["id"] for lead in res["data"]["contacted"]] == [3, 1]
+    res = orch.post_task(name="sales_outreach", payload={"count": 5})
+    assert [lead["id"] for lead in res["data"]["contacted"]] == [2, 4]
+    res = orch.post_task(name="lead_generation", payload={"count": 2})
+    assert [lead["id"] for lead in res["data"]["leads"]] == [5, 6]
+    orch.shutdown()
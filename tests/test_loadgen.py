@@ -0,0 +1,98 @@
+"""Tests for the load generator."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.load import CLOSED, OPEN, HttpTarget, LatencyHistogram, LoadRun, Mix, compare_runs
+
+
+def test_histogram_percentiles_are_within_one_percent():
+    hist = LatencyHistogram()
+    for us in range(1, 100_001):
+        hist.record(us / 1e6)
+    for q in (50, 90, 99, 99.9):
+        assert abs(hist.percentile(q) - q / 100 * 0.1) <= 0.01 * q / 100 * 0.1
+    assert hist.percentile(100) == 0.1
+    other = LatencyHistogram()
+    other.record(2.0)
+    hist.merge(other)
+    assert hist.count == 100_001 and hist.summary()["max_ms"] == 2000.0
+
+
+def test_mix_parses_weights_and_payloads():
+    mix = Mix.parse(["job_search:3", 'health_search:1:{"speciality": "cardiology"}', "generate_report"], seed=1)
+    assert [(e["name"], e["weight"]) for e in mix.entries] == [("job_search", 3), ("health_search", 1), ("generate_report", 1)]
+    assert mix.entries[1]["payload"] == {"speciality": "cardiology"}
+    names = [mix.choose()[0] for _ in range(1000)]
+    assert 500 < names.count("job_search") < 700
+
+
+async def fake_target(name, payload):
+    await asyncio.sleep(0.01)
+    return name != "bad", "ok" if name != "bad" else "error"
+
+
+def test_closed_loop_counts_throughput_and_errors():
+    mix = Mix([{"name": "good", "weight": 3}, {"name": "bad", "weight": 1}], seed=2)
+    run = LoadRun(fake_target, mix, mode=CLOSED, concurrency=4, duration=0.5, interval=0.25, echo=lambda line: None)
+    result = asyncio.run(run.run())
+    summary = result["summary"]
+    assert 100 < summary["requests"] < 220
+    assert 0.1 < summary["error_rate"] < 0.4
+    assert summary["latency"]["p50_ms"] >= 10
+    assert len(result["intervals"]) == 2
+    assert json.loads(json.dumps(result))["histogram"]["unit"] == "us"
+
+
+def test_open_loop_keeps_the_arrival_rate_when_the_target_stalls():
+    async def slow(name, payload):
+        await asyncio.sleep(0.2)
+        return True, "ok"
+
+    run = LoadRun(slow, Mix([{"name": "t"}]), mode=OPEN, rate=200, duration=0.5, echo=lambda line: None)
+    summary = asyncio.run(run.run())["summary"]
+    assert 95 <= summary["requests"] <= 101
+    assert summary["latency"]["min_ms"] >= 200
+
+
+def test_http_target_reuses_connections_and_reports_statuses():
+    seen = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            seen.add(self.client_address)
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status = 429 if body["name"] == "limited" else 200
+            raw = json.dumps({"ok": True}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        target = HttpTarget(f"http://127.0.0.1:{server.server_port}")
+        mix = Mix([{"name": "job_search", "weight": 1}, {"name": "limited", "weight": 1}], seed=3)
+        run = LoadRun(target, mix, concurrency=2, duration=0.3, echo=lambda line: None)
+
+        async def go():
+            try:
+                return await run.run()
+            finally:
+                await target.close()
+
+        result = asyncio.run(go())
+    finally:
+        server.shutdown()
+    statuses = result["summary"]["statuses"]
+    assert set(statuses) == {"200", "429"} and result["summary"]["errors"] == statuses["429"]
+    assert len(seen) == 2
+    assert any(line.startswith("throughput") for line in compare_runs(result, result))
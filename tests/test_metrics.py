@@ -0,0 +1,92 @@
+"""Tests for dispatch metrics."""
+
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from incluu_agents import Orchestrator, AnalyticsAgent, JobsAgent
+from incluu_agents.metrics import Metrics, histogram_quantile, render_prometheus
+
+
+def test_shards_from_many_threads_are_merged():
+    metrics = Metrics(buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            metrics.observe("t", "a", 0.05)
+        metrics.add("in_flight", "a")
+        metrics.add("in_flight", "a", -1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.observe("t", "a", 5.0, ok=False)
+    snapshot = metrics.snapshot()
+    (task,) = snapshot["tasks"]
+    assert task["calls"] == 4001
+    assert task["errors"] == 1
+    assert task["latency"]["counts"] == [4000, 0, 1]
+    assert snapshot["agents"]["a"]["in_flight"] == 0
+
+
+def test_shards_of_exited_threads_are_retired():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    for _ in range(50):
+        thread = threading.Thread(target=lambda: (metrics.observe("t", "a", 0.5), metrics.add("g", "a")))
+        thread.start()
+        thread.join()
+    snap = metrics.snapshot()
+    assert snap["tasks"][0]["calls"] == 50
+    assert len(metrics._shards) <= 1
+    metrics.observe("t", "a", 0.5)
+    assert metrics.snapshot()["tasks"][0]["calls"] == 51
+
+
+def test_histogram_quantile_interpolates():
+    assert histogram_quantile((1.0, 2.0), [0, 10, 0], 0.5) == 1.5
+    assert histogram_quantile((1.0, 2.0), [0, 0, 3], 0.99) == 2.0
+    assert histogram_quantile((1.0, 2.0), [0, 0, 0], 0.5) is None
+
+
+def test_orchestrator_counts_calls_errors_and_cache_hits():
+    orch = Orchestrator()
+    orch.register_agent(JobsAgent())
+    orch.register_agent(AnalyticsAgent())
+    orch.post_task("job_search", {"count": 1})
+    orch.post_task("job_search", {"count": 1})
+    orch.post_task("generate_report", {"data": ["x"]})
+    orch.post_task("missing", {})
+    snapshot = orch.metrics_snapshot()
+    tasks = {t["task"]: t for t in snapshot["tasks"]}
+    assert tasks["job_search"]["calls"] == 2
+    assert tasks["job_search"]["cache_hits"] == 1
+    assert tasks["generate_report"]["errors"] == 1
+    assert snapshot["agents"]["jobs_agent"]["calls"] == 2
+    assert snapshot["unrouted"] == 1
+    assert snapshot["queue_depth"] == 0
+    assert snapshot["cache"]["hits"] == 1
+
+
+def test_prometheus_text_format():
+    metrics = Metrics(buckets=(0.5,))
+    metrics.observe('say "hi"', "a", 0.25)
+    text = render_prometheus(metrics.snapshot())
+    assert '# TYPE incluu_task_duration_seconds histogram' in text
+    assert 'incluu_task_duration_seconds_bucket{task="say \\"hi\\"",agent="a",le="0.5"} 1' in text
+    assert 'incluu_task_duration_seconds_bucket{task="say \\"hi\\"",agent="a",le="+Inf"} 1' in text
+    assert 'incluu_agent_calls_total{agent="a"} 1' in text
+
+
+def test_metrics_endpoint():
+    client = TestClient(app)
+    client.post("/tasks", json={"name": "job_search", "payload": {"count": 2}})
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'incluu_task_calls_total{task="job_search",agent="jobs_agent"}' in resp.text
+    data = client.get("/metrics?format=json").json()
+    assert any(t["task"] == "job_search" for t in data["tasks"])
+    assert client.get("/metrics?format=xml").status_code == 400
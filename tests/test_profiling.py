@@ -0,0 +1,163 @@
+"""Tests for dispatch hooks and the sampling profilers."""
+
+import asyncio
+import pstats
+import sys
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from incluu_agents import Orchestrator
+from incluu_agents.orchestrator import INLINE, Agent, DispatchHook, Result, Task
+from incluu_agents.profiling import CProfileHook, TracemallocHook, hooks_from_env
+
+
+class ReportAgent(Agent):
+    name = "report_agent"
+    tasks = ("report",)
+    read_only_tasks = ("report",)
+
+    def handle(self, task: Task) -> Result:
+        return Result(ok=True, data={"rows": [list(range(100)) for _ in range(50)]})
+
+
+class AsyncAgent(Agent):
+    name = "async_agent"
+    tasks = ("ping",)
+    execution = INLINE
+
+    async def handle_async(self, task: Task) -> Result:
+        await asyncio.sleep(0)
+        return Result(ok=True, data={"reply": "pong"})
+
+
+class HangingAgent(Agent):
+    name = "hanging_agent"
+    tasks = ("hang",)
+    execution = INLINE
+
+    async def handle_async(self, task: Task) -> Result:
+        if task.payload.get("hang"):
+            await asyncio.sleep(10)
+        return Result(ok=True, data={})
+
+
+class Recorder(DispatchHook):
+    def __init__(self, label, calls, fail=False):
+        self.label, self.calls, self.fail = label, calls, fail
+
+    def before(self, agent, task):
+        self.calls.append(("before", self.label, task.name, task.debug))
+        if self.fail:
+            raise RuntimeError("hook failed")
+        return self.label
+
+    def after(self, agent, task, response, state, seconds):
+        self.calls.append(("after", self.label, state, response["ok"]))
+
+
+def make_orch(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(ReportAgent())
+    orch.register_agent(AsyncAgent())
+    return orch
+
+
+def test_hooks_nest_around_runs_and_skip_cache_hits(tmp_path):
+    orch = make_orch(tmp_path)
+    calls = []
+    first, broken = Recorder("first", calls), Recorder("broken", calls, fail=True)
+    orch.add_hook(first)
+    orch.add_hook(broken)
+    assert orch.post_task("report", {})["ok"]
+    assert calls == [
+        ("before", "first", "report", False),
+        ("before", "broken", "report", False),
+        ("after", "broken", None, True),
+        ("after", "first", "first", True),
+    ]
+    calls.clear()
+    orch.post_task("report", {})  # cached
+    assert calls == []
+    orch.post_task("report", {}, debug=True)  # bypasses the cache
+    assert calls[0] == ("before", "first", "report", True)
+    orch.remove_hook(broken)
+    calls.clear()
+    assert asyncio.run(orch.post_task_async("ping", {}))["data"] == {"reply": "pong"}
+    assert [c[0] for c in calls] == ["before", "after"]
+
+
+def test_cprofile_samples_every_nth_call_and_debug_calls(tmp_path):
+    orch = make_orch(tmp_path)
+    orch.add_hook(CProfileHook(str(tmp_path / "profiles"), every=3))
+    for i in range(7):
+        orch.post_task("report", {"i": i})
+    path = tmp_path / "profiles" / "cprofile"
+    (prof,) = path.iterdir()
+    assert prof.name.startswith("report-") and prof.suffix == ".prof"
+
+    def handled():
+        stats = pstats.Stats(str(prof)).stats
+        return next(v[1] for (f, _, func), v in stats.items() if func == "handle" and f.endswith("test_profiling.py"))
+
+    assert handled() == 2  # calls 3 and 6
+    orch.post_task("report", {"i": 0}, debug=True)
+    assert handled() == 3
+
+
+def test_tracemalloc_appends_top_allocations(tmp_path):
+    orch = make_orch(tmp_path)
+    orch.add_hook(TracemallocHook(str(tmp_path), top=5))
+    orch.post_task("report", {})
+    orch.post_task("report", {}, debug=True)
+    orch.post_task("report", {"x": 1}, debug=True)
+    (report,) = (tmp_path / "tracemalloc").iterdir()
+    text = report.read_text()
+    assert text.count("# ") == 2 and "task=report" in text and "peak=" in text
+    assert "test_profiling.py" in text
+
+
+def test_profiling_env_and_debug_header(tmp_path, monkeypatch):
+    monkeypatch.delenv("AGENT_PROFILE_DIR", raising=False)
+    assert hooks_from_env() == []
+    monkeypatch.setenv("AGENT_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("AGENT_PROFILE_MEMORY", "1")
+    assert [type(h) for h in hooks_from_env()] == [CProfileHook, TracemallocHook]
+
+    calls = []
+    client = TestClient(main.app)
+    body = {"name": "job_search", "payload": {"count": 1}}
+    hook = Recorder("r", calls)
+    main.orch.add_hook(hook)
+    try:
+        client.post("/tasks", json=body, headers={"X-Debug-Profile": "1"})
+        client.post("/tasks", json=body)
+    finally:
+        main.orch.remove_hook(hook)
+    assert calls[0] == ("before", "r", "job_search", True)
+    assert all(not c[3] for c in calls[2:] if c[0] == "before")
+
+
+def test_cancelled_samples_are_cleaned_up(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(HangingAgent())
+    calls = []
+    profiler, tracer = CProfileHook(str(tmp_path)), TracemallocHook(str(tmp_path))
+    for hook in (Recorder("r", calls), profiler, tracer):
+        orch.add_hook(hook)
+
+    async def run():
+        hanging = asyncio.ensure_future(orch.post_task_async("hang", {"hang": True}, debug=True))
+        await asyncio.sleep(0.01)
+        hanging.cancel()
+        await asyncio.gather(hanging, return_exceptions=True)
+        assert sys.getprofile() is None and not tracemalloc.is_tracing()
+        assert profiler._active.profile is None
+        # The next sample is taken as usual.
+        assert (await orch.post_task_async("hang", {}, debug=True))["ok"]
+
+    asyncio.run(run())
+    assert calls[1] == ("after", "r", "r", False)
+    (report,) = (tmp_path / "tracemalloc").iterdir()
+    assert report.read_text().count("# ") == 2
@@ -0,0 +1,70 @@
+"""Tests for the provider search index."""
+
+import pytest
+
+from incluu_agents import HealthAgent, LegalAgent, Orchestrator
+from incluu_agents import datagen
+from incluu_agents.providers import ProviderIndex
+
+
+def make_index():
+    return ProviderIndex([
+        {"id": 1, "name": "Dr. Kim Lee", "speciality": "Cardiologist", "location": "New York"},
+        {"id": 2, "name": "Dr. Kimball Chen", "speciality": "Dermatologist", "location": "Austin"},
+        {"id": 3, "name": "Dr. Ava Kim", "speciality": "Cardiologist", "location": "Austin"},
+        {"id": 4, "name": "Dr. Noah Stone", "speciality": "Cardiologist", "location": "New York"},
+    ])
+
+
+def ids(results):
+    return [provider["id"] for provider in results]
+
+
+def test_combined_filters():
+    index = make_index()
+    assert ids(index.search(speciality="cardiologist")[0]) == [1, 3, 4]
+    assert ids(index.search(speciality="Cardiologist", location="new york")[0]) == [1, 4]
+    assert ids(index.search(name="kim")[0]) == [1, 2, 3]
+    assert ids(index.search(name="dr ki", location="Austin")[0]) == [2, 3]
+    assert index.search(speciality="Pediatrician") == ([], None)
+
+
+def test_cursor_pagination_and_updates():
+    index = make_index()
+    page, cursor = index.search(speciality="cardiologist", limit=2)
+    assert ids(page) == [1, 3] and cursor
+    index.add({"id": 5, "name": "Dr. Zoe King", "speciality": "Cardiologist", "location": "Boston"})
+    index.add({"id": 3, "name": "Dr. Ava Kim", "speciality": "Neurologist", "location": "Austin"})
+    page, cursor = index.search(speciality="cardiologist", limit=2, cursor=cursor)
+    assert ids(page) == [4, 5] and cursor is None
+    index.remove(1)
+    assert ids(index.search(name="ki")[0]) == [2, 5, 3]
+    with pytest.raises(ValueError):
+        index.search(cursor="not-a-cursor")
+
+
+def test_pages_cover_large_directory():
+    table = datagen.providers_table(5000, "Dr.", datagen.DOCTOR_SPECIALITIES, seed=1)
+    rows = table.to_dicts()
+    index = ProviderIndex(rows)
+    expected = [row["id"] for row in rows if row["speciality"] == "Cardiologist" and row["location"] == "Austin"]
+    found, cursor = [], None
+    while True:
+        page, cursor = index.search(speciality="Cardiologist", location="Austin", limit=37, cursor=cursor)
+        found += ids(page)
+        if cursor is None:
+            break
+    assert found == expected
+
+
+def test_agents_filter_by_speciality(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(HealthAgent())
+    orch.register_agent(LegalAgent())
+    doctors = orch.post_task("health_search", {"speciality": "Cardiologist"})["data"]["doctors"]
+    assert [doctor["speciality"] for doctor in doctors] == ["Cardiologist"]
+    res = orch.post_task("legal_search", {"speciality": "Family", "limit": 1})
+    assert [lawyer["speciality"] for lawyer in res["data"]["lawyers"]] == ["Family Law"]
+    assert res["data"]["next_cursor"] is None
+    assert orch.post_task("legal_search", {"limit": 0})["ok"] is False
+    orch.shutdown()
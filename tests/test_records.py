@@ -0,0 +1,79 @@
+"""Tests for the columnar record store."""
+
+import numpy as np
+import pytest
+
+from agent_platform import SalesAgent, SupportAgent, Task
+from incluu_agents import datagen
+from incluu_agents.leads import LeadIndex
+from incluu_agents.records import RecordStore
+
+
+def make_store():
+    store = RecordStore({"id": "int64", "category": "category", "note": "text", "score": "int8"})
+    store.extend([
+        {"id": 1, "category": "billing", "note": "short", "score": 5},
+        {"id": 2, "category": "technical", "note": "a much longer note than before", "score": 7},
+        {"id": 3, "category": "billing", "note": "café", "score": 9},
+    ])
+    return store
+
+
+def test_rows_round_trip_and_widen():
+    store = make_store()
+    assert store.row(1) == {"id": 2, "category": "technical", "note": "a much longer note than before", "score": 7}
+    assert list(store)[2]["note"] == "café"
+    store.set(0, "score", 1000)
+    store.set(0, "category", None)
+    assert store.row(0)["score"] == 1000 and store.row(0)["category"] is None
+    for i in range(40):
+        store.append({"id": 10 + i, "category": f"c{i}"})
+    assert len(store) == 43 and store.get(42, "note") == ""
+    with pytest.raises(KeyError):
+        store.append({"unknown": 1})
+    with pytest.raises(TypeError):
+        store.set(0, "score", "high")
+
+
+def test_filters_and_group_by():
+    store = make_store()
+    assert store.where(category="billing").tolist() == [0, 2]
+    assert [row["id"] for row in store.select(category="billing", score=9)] == [3]
+    assert store.select(category="missing") == []
+    assert store.where(note=5).tolist() == []
+    assert store.where(note="short").tolist() == [0]
+    assert store.count_by("category") == {"billing": 2, "technical": 1}
+    assert store.count_by("score", category="billing") == {5: 1, 9: 1}
+
+
+def test_views_write_through_lead_index():
+    store = RecordStore({"id": "int64", "score": "int8", "industry": "category", "status": "category"})
+    store.extend([{"id": i, "score": s, "industry": "SaaS", "status": "new"} for i, s in enumerate([3, 9, 5])])
+    index = LeadIndex(store.views())
+    assert [lead["id"] for lead in index.contact_top(2)] == [1, 2]
+    assert store.count_by("status") == {"new": 1, "contacted": 2}
+
+
+def test_columnar_memory_is_compact():
+    n = 10_000
+    rng = datagen.make_rng(0)
+    ids = np.arange(n)
+    table = datagen.ColumnTable({
+        "id": ids,
+        "industry": datagen.choice(rng, ["SaaS", "Retail"], n),
+        "email": datagen.Formatted("lead{}@example.com", ids),
+        "score": rng.integers(1, 101, n, dtype=np.int8),
+    })
+    store = RecordStore.from_table(table)
+    assert store.row(7) == table.row(7)
+    assert store.memory_usage()["bytes_per_row"] < 40
+
+
+def test_platform_agents_use_record_store():
+    sales, support = SalesAgent(), SupportAgent()
+    assert isinstance(sales.leads, RecordStore) and isinstance(support.tickets, RecordStore)
+    contacted = sales.execute(Task(type="sales_outreach", payload={"count": 2})).data["contacted_leads"]
+    assert sales.leads.count_by("status") == {"new": 8, "contacted": 2}
+    assert all(lead["status"] == "contacted" for lead in contacted)
+    data = support.execute(Task(type="support_summary")).data
+    assert sum(data["summary"].values()) == 5 and len(data["suggestions"]) == 5
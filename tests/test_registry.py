@@ -0,0 +1,78 @@
+"""Tests for lazily registered agents."""
+
+import json
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from incluu_agents import Orchestrator
+from incluu_agents.registry import AgentSpec, BUILTIN_AGENTS, discover, import_report, load_class
+
+
+def test_agents_load_on_first_use(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_specs(BUILTIN_AGENTS)
+    assert orch.registered_agents() == []
+    assert {entry["name"] for entry in orch.catalog()} == {spec.name for spec in BUILTIN_AGENTS}
+    res = orch.post_task("job_search", {"count": 2})
+    assert len(res["data"]["jobs"]) == 2
+    assert [agent.name for agent in orch.registered_agents()] == ["jobs_agent"]
+    assert set(orch.load_times) == {"jobs_agent"}
+    loaded = {entry["name"]: entry["loaded"] for entry in orch.catalog()}
+    assert loaded["jobs_agent"] and not loaded["sales_agent"]
+    orch.warm_up(["sales_outreach", "legal_agent"])
+    assert set(orch.load_times) == {"jobs_agent", "sales_agent", "legal_agent"}
+    orch.shutdown()
+
+
+def test_builtin_specs_match_their_agent_classes():
+    for spec in BUILTIN_AGENTS:
+        cls = load_class(spec.path)
+        assert (spec.name, spec.tasks) == (cls.name, tuple(cls.tasks)), spec.path
+
+
+def test_load_failure_is_a_failed_result(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_spec(AgentSpec("broken", "incluu_agents.missing:Agent", ("broken_task",)))
+    res = orch.post_task("broken_task", {})
+    assert res["ok"] is False
+    assert "Failed to load agent" in res["error"]
+    orch.shutdown()
+
+
+def test_manifest_overrides_builtins(tmp_path):
+    manifest = tmp_path / "agents.json"
+    manifest.write_text(json.dumps([
+        {"name": "jobs_agent", "path": "incluu_agents.agents.jobs:JobsAgent", "tasks": ["job_search", "jobs"]},
+    ]))
+    specs = {spec.name: spec for spec in discover(str(manifest), entry_points=False)}
+    assert specs["jobs_agent"].tasks == ("job_search", "jobs")
+    assert len(specs) == len(BUILTIN_AGENTS)
+
+
+def test_package_import_does_not_load_agents_or_numpy():
+    code = (
+        "import sys, incluu_agents; "
+        "print('numpy' in sys.modules, 'incluu_agents.agents.sales' in sys.modules); "
+        "incluu_agents.SalesAgent; print('incluu_agents.agents.sales' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False", "True"]
+
+
+def test_import_report():
+    (row,) = import_report([BUILTIN_AGENTS[3]])
+    assert row["name"] == "jobs_agent"
+    assert row["import_s"] >= 0 and row["construct_s"] >= 0
+
+
+def test_first_report_counts_seeded_leads_and_tickets(tmp_path, monkeypatch):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_specs(discover(entry_points=False))
+    monkeypatch.setattr(main, "orch", orch)
+    kpis = TestClient(main.app).post("/tasks", json={"name": "generate_report"}).json()["data"]["kpis"]
+    assert kpis["total_leads"] == 10 and kpis["open_tickets"] == 6
+    assert kpis["avg_lead_score"] is not None
+    orch.shutdown()
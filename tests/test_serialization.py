@@ -0,0 +1,34 @@
+"""Tests for response encoding."""
+
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from incluu_agents import Result, Task
+from incluu_agents.serialization import dumps, json_dumps
+
+
+def test_dumps_matches_stdlib_fallback():
+    value = {
+        "ok": True,
+        "data": {1: "a", "n": np.int64(3), "arr": np.arange(3), "at": datetime(2024, 1, 2, 3, 4, 5), "s": "é"},
+        "error": None,
+    }
+    assert dumps(value) == json_dumps(value)
+    assert json.loads(dumps(value))["data"] == {"1": "a", "n": 3, "arr": [0, 1, 2], "at": "2024-01-02T03:04:05", "s": "é"}
+
+
+def test_task_and_result_are_slotted():
+    assert not hasattr(Task("x"), "__dict__")
+    assert not hasattr(Result(ok=True), "__dict__")
+
+
+def test_tasks_route_keeps_response_shape():
+    client = TestClient(app)
+    resp = client.post("/tasks", json={"name": "job_search", "payload": {"count": 1}})
+    assert resp.headers["content-type"] == "application/json"
+    assert set(resp.json()) == {"ok", "data", "error"}
+    assert client.post("/tasks", json={"name": "nope", "payload": {}}).json()["ok"] is False
@@ -0,0 +1,115 @@
+"""Tests for the agent state stores."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from incluu_agents import Orchestrator, SalesAgent, SupportAgent, HealthAgent
+from incluu_agents.state import MemoryStore, SQLiteStore, StateStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "state.db"))
+
+
+def test_put_get_and_seed_without_overwrite(store):
+    assert store.put_many("c", {"1": {"v": 1}, "2": {"v": 2}}) == 2
+    assert store.put_many("c", {"2": {"v": 20}, "3": {"v": 3}}, overwrite=False) == 1
+    assert store.get("c", "2") == {"v": 2}
+    assert store.get("c", "9") is None
+    assert store.items("c") == {"1": {"v": 1}, "2": {"v": 2}, "3": {"v": 3}}
+
+
+def test_update_is_compare_and_set(store):
+    store.put("c", "1", {"status": "new", "score": 5})
+    assert store.update("c", "1", {"status": "contacted"}, expect={"status": "new"}) == {
+        "status": "contacted", "score": 5,
+    }
+    assert store.update("c", "1", {"status": "contacted"}, expect={"status": "new"}) is None
+    assert store.update("c", "missing", {"status": "x"}) is None
+
+
+def test_changes_since_version(store):
+    store.put_many("c", {"1": {"v": 1}, "2": {"v": 2}})
+    version, changed = store.changes("c")
+    assert set(changed) == {"1", "2"}
+    store.update("c", "2", {"v": 22})
+    version2, changed = store.changes("c", version)
+    assert changed == {"2": {"v": 22}}
+    assert store.changes("c", version2) == (version2, {})
+
+
+def test_allocate_ids(store):
+    assert list(store.allocate_ids("c", 2, floor=10)) == [11, 12]
+    assert list(store.allocate_ids("c", 1)) == [13]
+    assert list(store.allocate_ids("c", 1, floor=5)) == [14]
+
+
+def test_sqlite_stores_see_each_others_writes(tmp_path):
+    path = str(tmp_path / "state.db")
+    a, b = SQLiteStore(path), SQLiteStore(path)
+    a.put("c", "1", {"v": 1})
+    assert b.items("c") == {"1": {"v": 1}}
+    a.update("c", "1", {"v": 2})
+    assert b.items("c") == {"1": {"v": 2}}
+    assert list(a.allocate_ids("c", 1)) == [1]
+    assert list(b.allocate_ids("c", 1)) == [2]
+
+
+def test_sqlite_close_closes_every_threads_connection(tmp_path):
+    store = SQLiteStore(str(tmp_path / "state.db"))
+    store.put("c", "1", {"v": 1})
+    worker = threading.Thread(target=store.get, args=("c", "1"))
+    worker.start()
+    worker.join()
+    connections = list(store._connections)
+    assert len(connections) == 2
+    store.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert store.get("c", "1") == {"v": 1}  # reopens on use
+    store.close()
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("AGENT_STATE_DB", raising=False)
+    assert isinstance(StateStore.from_env(), MemoryStore)
+    monkeypatch.setenv("AGENT_STATE_DB", str(tmp_path / "state.db"))
+    assert isinstance(StateStore.from_env(), SQLiteStore)
+
+
+def _worker(path, tmp_path, name):
+    orch = Orchestrator(log_file=str(tmp_path / f"{name}.log"), store=SQLiteStore(path))
+    leads = [{"id": i, "score": i * 10} for i in range(1, 7)]
+    orch.register_agent(SalesAgent(leads=leads))
+    orch.register_agent(SupportAgent(tickets=[{"id": 1, "issue": f"Seeded by {name}"}]))
+    orch.register_agent(HealthAgent())
+    return orch
+
+
+def test_workers_sharing_sqlite_stay_consistent(tmp_path):
+    path = str(tmp_path / "state.db")
+    one, two = _worker(path, tmp_path, "one"), _worker(path, tmp_path, "two")
+    first = one.post_task("sales_outreach", {"count": 2})["data"]["contacted"]
+    second = two.post_task("sales_outreach", {"count": 2})["data"]["contacted"]
+    assert [lead["id"] for lead in first] == [6, 5]
+    assert [lead["id"] for lead in second] == [4, 3]
+
+    new = two.post_task("lead_generation", {"count": 2})["data"]["leads"]
+    assert [lead["id"] for lead in new] == [7, 8]
+    more = one.post_task("lead_generation", {"count": 1})["data"]["leads"]
+    assert more[0]["id"] == 9
+
+    summary = two.post_task("support_summary", {})["data"]["suggestions"]
+    assert summary == [{"id": 1, "response": "We are looking into: Seeded by one"}]
+
+    a = one.post_task("health_appointment", {})["data"]["appointment"]
+    b = two.post_task("health_appointment", {})["data"]["appointment"]
+    assert a["id"] != b["id"]
+    one.shutdown()
+    two.shutdown()
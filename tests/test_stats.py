@@ -0,0 +1,104 @@
+"""Tests for vectorised report summaries."""
+
+import base64
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.main import app
+from incluu_agents import Orchestrator, AnalyticsAgent
+from incluu_agents import stats
+from incluu_agents.admission import AdmissionController, TaskLimits
+
+
+def test_exact_summary():
+    summary = stats.summarize([1, 2, 3, 4, float("nan")], percentiles=(50,), bins=3)
+    assert summary["count"] == 4
+    assert summary["mean"] == 2.5 and summary["min"] == 1 and summary["max"] == 4
+    assert summary["percentiles"] == {"p50": 2.5}
+    assert sum(summary["histogram"]["counts"]) == 4
+    assert summary["exact"]
+
+
+def test_chunked_summary_matches_exact():
+    values = np.random.default_rng(0).normal(100, 15, 200_000)
+    exact = stats.summarize(values)
+    chunked = stats.summarize(values, exact_limit=1000, chunk_size=7919)
+    assert not chunked["exact"]
+    assert chunked["count"] == exact["count"]
+    for key in ("mean", "std", "min", "max"):
+        assert np.isclose(chunked[key], exact[key])
+    for label, value in exact["percentiles"].items():
+        assert abs(chunked["percentiles"][label] - value) <= 0.01 * abs(value)
+    assert sum(chunked["histogram"]["counts"]) == exact["count"]
+
+
+def test_decode_array_rejects_bad_input():
+    encoded = base64.b64encode(np.arange(3, dtype="<f4").tobytes()).decode()
+    assert stats.decode_array(encoded, "float32").tolist() == [0, 1, 2]
+    for args in (("!!", "float64"), (encoded, "float64"), (encoded, "complex128")):
+        with pytest.raises(ValueError):
+            stats.decode_array(*args)
+
+
+def test_generate_report_accepts_base64(tmp_path):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(AnalyticsAgent())
+    encoded = base64.b64encode(np.array([1.0, 2.0, 3.0, 4.0]).tobytes()).decode()
+    res = orch.post_task(name="generate_report", payload={"data_b64": encoded})
+    assert res["data"]["summary"]["mean"] == 2.5
+    res = orch.post_task(name="generate_report", payload={"data": ["a", "b"]})
+    assert res["ok"] is False
+    orch.shutdown()
+
+
+def test_binary_summary_endpoint():
+    client = TestClient(app)
+    body = np.arange(1, 101, dtype="<f8").tobytes()
+    resp = client.post(
+        "/analytics/summary?bins=4",
+        content=body,
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert resp.status_code == 200
+    summary = resp.json()["data"]["summary"]
+    assert summary["count"] == 100 and summary["mean"] == 50.5
+    assert summary["histogram"]["counts"] == [25, 25, 25, 25]
+    assert client.post("/analytics/summary", content=b"abc").status_code == 400
+
+
+def test_binary_summary_endpoint_streams_large_bodies(monkeypatch):
+    monkeypatch.setattr(stats, "CHUNK_SIZE", 64)
+    values = np.arange(1, 1001, dtype="<i4")
+
+    def parts():
+        raw = values.tobytes()
+        for i in range(0, len(raw), 77):  # splits values across parts
+            yield raw[i:i + 77]
+
+    client = TestClient(app)
+    resp = client.post("/analytics/summary?dtype=int32", content=parts())
+    summary = resp.json()["data"]["summary"]
+    assert summary["count"] == 1000 and summary["mean"] == 500.5 and not summary["exact"]
+    assert abs(summary["percentiles"]["p50"] - 500) < 5
+    assert client.post("/analytics/summary?dtype=int32", content=iter([b"\0" * 300, b"\0"])).status_code == 400
+
+
+def test_bins_are_capped(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        stats.summarize(np.arange(10.0), bins=stats.MAX_BINS + 1)
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(AnalyticsAgent())
+    res = orch.post_task(name="generate_report", payload={"data": [1, 2], "bins": 200_000_000})
+    assert res["ok"] is False and "bins" in res["error"]
+    orch.shutdown()
+
+    monkeypatch.setattr(main, "admission", AdmissionController({"generate_report": TaskLimits(rate=0.1, burst=1)}))
+    client = TestClient(app)
+    body = np.arange(4, dtype="<f8").tobytes()
+    assert client.post("/analytics/summary?bins=200000000", content=body).status_code == 400
+    assert client.post("/analytics/summary", content=body).status_code == 200
+    assert client.post("/analytics/summary", content=body).status_code == 429
+    assert main.admission.stats()["admitted"] == {"generate_report": 1}
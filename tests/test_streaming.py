@@ -0,0 +1,109 @@
+"""Tests for streamed task results."""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from incluu_agents import Orchestrator
+from incluu_agents.orchestrator import INLINE, Agent, Result, Task
+
+
+class CountingAgent(Agent):
+    name = "counting_agent"
+    tasks = ("count",)
+
+    def __init__(self) -> None:
+        self.produced = 0
+
+    def handle(self, task: Task) -> Result:
+        def records():
+            for i in range(task.payload["n"]):
+                if i == task.payload.get("fail_at"):
+                    raise RuntimeError("boom")
+                self.produced += 1
+                yield {"i": i}
+
+        return Result(ok=True, data={"total": task.payload["n"], "records": records()})
+
+
+class AsyncAgent(Agent):
+    name = "async_agent"
+    tasks = ("ticks",)
+    execution = INLINE
+
+    async def handle_async(self, task: Task) -> Result:
+        async def ticks():
+            for i in range(3):
+                yield i
+
+        return Result(ok=True, data={"ticks": ticks()})
+
+
+def make_orch(tmp_path, counting=None):
+    orch = Orchestrator(log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(counting or CountingAgent())
+    orch.register_agent(AsyncAgent())
+    return orch
+
+
+def test_generators_are_buffered_by_regular_dispatch(tmp_path):
+    orch = make_orch(tmp_path)
+    assert orch.post_task("count", {"n": 3})["data"]["records"] == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert asyncio.run(orch.post_task_async("ticks", {}))["data"]["ticks"] == [0, 1, 2]
+
+
+def test_stream_pulls_records_on_demand(tmp_path):
+    agent = CountingAgent()
+    orch = make_orch(tmp_path, agent)
+
+    async def run():
+        stream = await orch.post_task_stream("count", {"n": 10}, chunk_size=4)
+        assert stream.field == "records"
+        assert stream.response["data"] == {"total": 10}
+        first = await stream.chunks.__anext__()
+        assert len(first) == 4 and agent.produced == 4
+        rest = [record async for chunk in stream.chunks for record in chunk]
+        return first + rest
+
+    records = asyncio.run(run())
+    assert [r["i"] for r in records] == list(range(10))
+
+
+def test_stream_endpoint_ndjson_and_sse():
+    with TestClient(app) as client:
+        resp = client.post("/tasks/stream", json={"name": "job_search", "payload": {"count": 300}})
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in resp.text.splitlines()]
+        assert events[0]["event"] == "meta" and events[0]["ok"]
+        assert [e["event"] for e in events[1:-1]] == ["record"] * 300
+        assert events[-1] == {"event": "end", "count": 300}
+
+        resp = client.post(
+            "/tasks/stream",
+            json={"name": "job_search", "payload": {"count": 2}},
+            headers={"Accept": "text/event-stream"},
+        )
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert resp.text.startswith("event: meta\ndata: ")
+        assert resp.text.count("event: record\n") == 2
+        assert resp.text.endswith('event: end\ndata: {"count":2}\n\n')
+        assert client.post("/tasks/stream?format=xml", json={"name": "job_search"}).status_code == 400
+
+
+def test_stream_reports_agent_failure(tmp_path):
+    orch = make_orch(tmp_path)
+
+    async def run():
+        stream = await orch.post_task_stream("count", {"n": 10, "fail_at": 5}, chunk_size=2)
+        records = []
+        try:
+            async for chunk in stream.chunks:
+                records.extend(chunk)
+        except RuntimeError as exc:
+            return records, str(exc)
+        return records, None
+
+    records, error = asyncio.run(run())
+    assert len(records) == 4 and error == "boom"
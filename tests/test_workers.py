@@ -0,0 +1,73 @@
+"""Tests for process-pool agents."""
+
+import asyncio
+import os
+
+import pytest
+
+from incluu_agents import Orchestrator, Agent, Result
+
+
+class CpuAgent(Agent):
+    name = "cpu_agent"
+    tasks = ("cpu_sum", "crash", "fail")
+    execution = "process"
+
+    def handle(self, task):
+        if task.name == "crash":
+            os._exit(1)
+        if task.name == "fail":
+            raise ValueError("bad input")
+        n = task.payload.get("n", 1000)
+        return Result(ok=True, data={"sum": sum(range(n)), "pid": os.getpid()})
+
+
+class InlineAgent(Agent):
+    name = "inline_agent"
+    tasks = ("echo",)
+    execution = "inline"
+
+    def handle(self, task):
+        return Result(ok=True, data=dict(task.payload))
+
+
+@pytest.fixture
+def orch(tmp_path):
+    orch = Orchestrator(process_workers=1, log_file=str(tmp_path / "audit.log"))
+    orch.register_agent(CpuAgent())
+    orch.register_agent(InlineAgent())
+    orch.warm_up()
+    yield orch
+    orch.shutdown()
+
+
+def test_process_agent_runs_in_worker(orch):
+    res = orch.post_task("cpu_sum", {"n": 10})
+    assert res["ok"] and res["data"]["sum"] == 45
+    assert res["data"]["pid"] != os.getpid()
+    res = asyncio.run(orch.post_task_async("cpu_sum", {"n": 5}))
+    assert res["data"]["sum"] == 10
+
+
+def test_worker_errors_and_crashes_become_failed_results(orch):
+    res = orch.post_task("fail", {})
+    assert res == {"ok": False, "data": {}, "error": "bad input"}
+    res = orch.post_task("crash", {})
+    assert res["ok"] is False
+    assert "crashed" in res["error"]
+    # A fresh pool replaces the broken one.
+    assert orch.post_task("cpu_sum", {"n": 3})["data"]["sum"] == 3
+
+
+def test_inline_agent_runs_on_event_loop(orch):
+    res = asyncio.run(orch.post_task_async("echo", {"x": 1}))
+    assert res["data"] == {"x": 1}
+
+
+def test_unknown_execution_class_is_rejected(tmp_path):
+    class Bad(Agent):
+        name = "bad"
+        execution = "gpu"
+
+    with pytest.raises(ValueError):
+        Orchestrator(log_file=str(tmp_path / "audit.log")).register_agent(Bad())